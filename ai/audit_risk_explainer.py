@@ -3,17 +3,15 @@ AI Audit Risk Explainer
 Explains audit readiness score drivers and remediation actions.
 """
 
+from ai.context import build_context, serialize_context
+
+
 def build_audit_risk_context(audit, data_quality, maturity):
-    return {
-        "audit_score": audit["total_score"],
-        "audit_breakdown": audit["breakdown"],
-        "data_quality_flags": data_quality["quality_flags"],
-        "csrd_maturity": maturity
-    }
+    return build_context(audit=audit, maturity=maturity, data_quality=data_quality)
 
 
-def generate_ai_audit_explanation(context, llm_client):
-    prompt = f"""
+def build_audit_prompt(context):
+    return f"""
 You are an ESG audit expert advising an organization.
 
 Using ONLY the data below, explain:
@@ -22,7 +20,7 @@ Using ONLY the data below, explain:
 3. Top 3 remediation actions to improve audit readiness
 
 DATA:
-{context}
+{serialize_context(context)}
 
 RULES:
 - Do not invent facts
@@ -30,4 +28,6 @@ RULES:
 - Be concise and professional
 """
 
-    return llm_client.generate(prompt)
+
+def generate_ai_audit_explanation(context, llm_client):
+    return llm_client.generate(build_audit_prompt(context))
@@ -0,0 +1,126 @@
+"""
+Batch Narrative Generation
+AI narratives for many entities at once through one pooled client, with concurrency and rate limits
+"""
+
+from ai.esg_narrative_copilot import NARRATIVE_SECTIONS, build_section_prompt
+from ai.orchestrator import DEFAULT_BACKOFF, DEFAULT_RETRIES, DEFAULT_TIMEOUT, LLMTask, run_llm_tasks
+from ai.rate_limit import RateLimiter
+from pipeline.instrumentation import span
+
+DEFAULT_CONCURRENCY = 16
+
+
+def generate_narratives(
+    contexts: dict,
+    client=None,
+    fallbacks: dict = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    requests_per_minute: float = None,
+    tokens_per_minute: float = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    sections: list = None,
+) -> dict:
+    """
+    Narratives for {entity: context} (contexts as built by
+    build_esg_context), one request per entity and section, all through
+    `client` (default: the pooled OpenAI client).
+
+    At most `concurrency` requests are in flight, spaced to stay within the
+    per-minute request / token budgets. Every item succeeds or fails on its
+    own: a failed section falls back to fallbacks[entity][section] if given
+    (e.g. generate_esg_narrative output), else None, and never affects other
+    entities.
+
+    Returns {entity: {"status", "sections", "results"}}, where status is
+    "ok" (every section from the model or cache), "partial" or "failed",
+    sections maps section -> text and results holds each section's
+    orchestrator result (source, attempts, latency, error).
+    """
+    if client is None:
+        from ai.llm_client import get_llm_client
+
+        client = get_llm_client()
+    sections = sections or NARRATIVE_SECTIONS
+    fallbacks = fallbacks or {}
+
+    tasks = []
+    errors = {}
+    for entity, context in contexts.items():
+        try:
+            for section in sections:
+                tasks.append(LLMTask(
+                    (entity, section),
+                    build_section_prompt(context, section),
+                    client,
+                    fallbacks.get(entity, {}).get(section),
+                ))
+        except Exception as exc:
+            # A context that cannot be rendered fails only its own entity
+            tasks = [task for task in tasks if task.name[0] != entity]
+            errors[entity] = f"{type(exc).__name__}: {exc}"
+
+    rate_limiter = None
+    if requests_per_minute or tokens_per_minute:
+        rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+    with span("llm.batch_narratives", entities=len(contexts), requests=len(tasks)):
+        results = run_llm_tasks(
+            tasks,
+            timeout=timeout,
+            retries=retries,
+            backoff=backoff,
+            concurrency=concurrency,
+            rate_limiter=rate_limiter,
+        )
+
+    narratives = {}
+    for entity in contexts:
+        if entity in errors:
+            narratives[entity] = {
+                "status": "failed",
+                "sections": {section: fallbacks.get(entity, {}).get(section) for section in sections},
+                "results": {},
+                "error": errors[entity],
+            }
+            continue
+
+        entity_results = {section: results[(entity, section)] for section in sections}
+        succeeded = sum(result["source"] != "fallback" for result in entity_results.values())
+        narratives[entity] = {
+            "status": "ok" if succeeded == len(sections) else "partial" if succeeded else "failed",
+            "sections": {section: result["text"] for section, result in entity_results.items()},
+            "results": entity_results,
+        }
+    return narratives
+
+
+def batch_summary(narratives: dict, elapsed_s: float = None) -> dict:
+    """
+    Counts by status plus request-level figures (retries, fallbacks and
+    percentiles of request latency, excluding time queued behind the
+    concurrency / rate limits) for a generate_narratives() result.
+    """
+    results = [result for narrative in narratives.values() for result in narrative["results"].values()]
+    latencies = sorted(result["latency_ms"] - result["queued_ms"] for result in results)
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else None
+
+    summary = {
+        "entities": len(narratives),
+        "ok": sum(n["status"] == "ok" for n in narratives.values()),
+        "partial": sum(n["status"] == "partial" for n in narratives.values()),
+        "failed": sum(n["status"] == "failed" for n in narratives.values()),
+        "requests": len(results),
+        "retries": sum(result["attempts"] - 1 for result in results if result["attempts"]),
+        "fallbacks": sum(result["source"] == "fallback" for result in results),
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+    }
+    if elapsed_s:
+        summary["elapsed_s"] = elapsed_s
+        summary["requests_per_s"] = len(results) / elapsed_s
+    return summary
@@ -0,0 +1,234 @@
+"""
+LLM Prompt Context
+One compact, deterministic, token-budgeted serialization of ESG data for prompts
+"""
+
+import functools
+import json
+import math
+import re
+
+# Tokens the serialized context may use in a prompt
+DEFAULT_MAX_TOKENS = 600
+
+# Fields that go first when the context is over budget: lower numbers are
+# kept longer, 0 is never dropped. The longest matching path prefix wins.
+FIELD_PRIORITY = {
+    "audit.score": 0,
+    "kpi.total_co2_kg": 0,
+    "kpi.renewable_energy_pct": 0,
+    "maturity.level": 0,
+    "maturity.label": 0,
+    "kpi": 1,
+    "audit.breakdown": 2,
+    "quality": 3,
+    "maturity": 4,
+}
+DEFAULT_PRIORITY = 5
+
+# Decimal places kept for non-integral numbers
+DECIMALS = 2
+
+_KEY_REPLACEMENTS = [("₂", "2"), ("%", " pct"), ("/", " ")]
+
+
+def normalize_key(key) -> str:
+    """
+    "Total CO₂ (kg)" -> "total_co2_kg", "Renewable Energy (%)" ->
+    "renewable_energy_pct": ASCII snake_case, units kept.
+    """
+    key = str(key)
+    for old, new in _KEY_REPLACEMENTS:
+        key = key.replace(old, new)
+    key = key.encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^0-9a-z]+", "_", key.lower()).strip("_")
+
+
+def _normalize_value(value):
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, dict):
+        return {normalize_key(k): _normalize_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(v) for v in value]
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return None
+        value = round(value, DECIMALS)
+        return int(value) if value.is_integer() else value
+    return value
+
+
+def build_context(kpis: dict = None, audit: dict = None, maturity: dict = None, data_quality: dict = None) -> dict:
+    """
+    The single prompt context for narrative and audit prompts. Sections
+    that are not given are left out. Keys are normalized, numbers rounded
+    and duplicated values (the maturity's copy of the audit score) dropped,
+    so equal data always gives an equal context.
+
+    `data_quality` may be the assess_data_quality() result or just its
+    quality flags.
+    """
+    context = {}
+    if kpis is not None:
+        context["kpi"] = _normalize_value(kpis)
+    if audit is not None:
+        context["audit"] = {
+            "score": _normalize_value(audit["total_score"]),
+            "breakdown": _normalize_value(audit["breakdown"]),
+        }
+    if maturity is not None:
+        context["maturity"] = {
+            "level": _normalize_value(maturity.get("maturity_level")),
+            "label": maturity.get("maturity_label"),
+            "year": _normalize_value(maturity.get("year")),
+        }
+    if data_quality is not None:
+        flags = data_quality.get("quality_flags", data_quality)
+        context["quality"] = _normalize_value(flags)
+    return context
+
+
+# -----------------------------
+# Token counting
+# -----------------------------
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Tokens in `text` for the gpt-4o family: exact with tiktoken installed,
+    otherwise an upper-bound estimate (each word, 3-digit group and
+    punctuation mark counted as one token).
+    """
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(re.findall(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]", text))
+
+
+# -----------------------------
+# Serialization
+# -----------------------------
+def _leaves(value, path=()):
+    if isinstance(value, dict) and value:
+        for key, item in value.items():
+            yield from _leaves(item, path + (key,))
+    elif isinstance(value, list) and value:
+        for index, item in enumerate(value):
+            yield from _leaves(item, path + (index,))
+    else:
+        yield path, value
+
+
+def _priority(path: tuple) -> int:
+    for end in range(len(path), 0, -1):
+        prefix = ".".join(str(part) for part in path[:end])
+        if prefix in FIELD_PRIORITY:
+            return FIELD_PRIORITY[prefix]
+    return DEFAULT_PRIORITY
+
+
+def _rebuild(leaves: list):
+    root = {}
+    for path, value in leaves:
+        node = root
+        for part in path[:-1]:
+            node = node.setdefault(part, {})
+        node[path[-1]] = value
+    return _lists(root)
+
+
+def _lists(node):
+    # Integer keys came from lists: turn them back into (shorter) lists
+    if not isinstance(node, dict):
+        return node
+    if node and all(isinstance(key, int) for key in node):
+        return [_lists(node[key]) for key in sorted(node)]
+    return {key: _lists(value) for key, value in node.items()}
+
+
+_BARE = re.compile(r"^[A-Za-z0-9_.+\-]+$")
+
+
+def _scalar(value) -> str:
+    if isinstance(value, str):
+        return value if _BARE.match(value) else json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (list, dict)) and not value:
+        return "[]" if isinstance(value, list) else "{}"
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _lines(path: str, value) -> list:
+    if isinstance(value, list):
+        value = dict(enumerate(value))
+    if not isinstance(value, dict) or not value:
+        return [f"{path}={_scalar(value)}"]
+
+    nested = {key: item for key, item in value.items() if isinstance(item, (dict, list)) and item}
+    scalars = " ".join(
+        f"{key}={_scalar(item)}"
+        for key, item in sorted(value.items(), key=lambda kv: str(kv[0]))
+        if key not in nested
+    )
+    lines = [f"{path}: {scalars}"] if scalars else []
+    for key in sorted(nested, key=str):
+        lines += _lines(f"{path}.{key}", nested[key])
+    return lines
+
+
+def _render(context: dict) -> str:
+    """
+    One line per group, keys sorted: "kpi: renewable_energy_pct=25.12
+    total_co2_kg=45288.6", nested groups as "audit.breakdown: ...". Fewer
+    tokens than JSON (no quotes or braces) and diffs line by line.
+    """
+    lines = []
+    for key in sorted(context, key=str):
+        lines += _lines(str(key), context[key])
+    return "\n".join(lines)
+
+
+def serialize_context(context: dict, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+    """
+    Compact key-sorted text of `context` (see _render), byte-identical for
+    equal data. When it would exceed `max_tokens`, the fewest fields needed are
+    dropped in FIELD_PRIORITY order (later list items first) and
+    "omitted" records how many; raises ValueError when even the
+    never-dropped fields do not fit.
+    """
+    text = _render(context)
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    leaves = list(_leaves(context))
+    # Drop order: lowest priority first, then later list items, then by path
+    order = sorted(
+        range(len(leaves)),
+        key=lambda i: (_priority(leaves[i][0]), [(isinstance(part, str), part) for part in leaves[i][0]]),
+        reverse=True,
+    )
+    droppable = [i for i in order if _priority(leaves[i][0]) > 0]
+
+    def render(dropped: int) -> str:
+        removed = set(droppable[:dropped])
+        kept = _rebuild([leaf for i, leaf in enumerate(leaves) if i not in removed])
+        return _render({**kept, "omitted": dropped})
+
+    # Fewest drops that fit (token count falls as more fields are dropped)
+    low, high = 1, len(droppable)
+    if count_tokens(render(high)) > max_tokens:
+        raise ValueError(f"Context does not fit in {max_tokens} tokens even with only its required fields")
+    while low < high:
+        middle = (low + high) // 2
+        if count_tokens(render(middle)) <= max_tokens:
+            high = middle
+        else:
+            low = middle + 1
+    return render(low)
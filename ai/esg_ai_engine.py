@@ -1,8 +1,11 @@
-def build_esg_context(kpis, audit, maturity, quality):
-    return {
-        "kpis": kpis,
-        "audit_score": audit["total_score"],
-        "audit_issues": audit["breakdown"],
-        "maturity": maturity,
-        "data_quality": quality
-    }
+from ai import esg_narrative_copilot
+
+
+def build_esg_context(kpis, audit, maturity, quality=None, data_quality=None):
+    # The prompt context is built in one place (ai.context); this keeps the
+    # original `quality` argument working next to the copilot's `data_quality`
+    if quality is not None and data_quality is not None:
+        raise TypeError("build_esg_context() got both quality and data_quality")
+    return esg_narrative_copilot.build_esg_context(
+        kpis, audit, maturity, data_quality if data_quality is not None else quality
+    )
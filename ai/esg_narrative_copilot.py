@@ -3,30 +3,31 @@ AI-powered ESG Narrative Copilot
 Grounded, audit-safe narrative generation
 """
 
+from ai.context import build_context, serialize_context
+
+
 def build_esg_context(kpis, audit, maturity, data_quality):
-    return {
-        "kpis": kpis,
-        "audit_score": audit["total_score"],
-        "audit_breakdown": audit["breakdown"],
-        "maturity": maturity,
-        "data_quality": data_quality["quality_flags"]
-    }
+    return build_context(kpis=kpis, audit=audit, maturity=maturity, data_quality=data_quality)
 
 
-def generate_ai_narrative(context, llm_client):
-    """
-    Uses an LLM client to generate ESG narrative.
-    The model is strictly grounded in provided context.
-    """
+NARRATIVE_SECTIONS = ["Environment", "Governance", "Strategy"]
+
+SECTION_FOCUS = {
+    "Environment": "emissions, energy use and renewable share",
+    "Governance": "audit readiness, data quality and internal controls",
+    "Strategy": "CSRD maturity and the priorities that follow from it",
+}
 
-    prompt = f"""
+
+def build_narrative_prompt(context):
+    return f"""
 You are a senior ESG reporting consultant.
 
 Generate a professional ESG narrative using ONLY the data provided.
 Do not assume or invent any facts.
 
 DATA:
-{context}
+{serialize_context(context)}
 
 STRUCTURE:
 1. Environment
@@ -40,5 +41,35 @@ STYLE:
 - No marketing language
 """
 
-    response = llm_client.generate(prompt)
+
+def build_section_prompt(context, section):
+    """
+    Prompt for a single narrative section, so the sections can be generated
+    (and fall back) independently.
+    """
+    return f"""
+You are a senior ESG reporting consultant.
+
+Write the {section} section of an ESG narrative ({SECTION_FOCUS[section]})
+using ONLY the data provided. Do not assume or invent any facts.
+Return one or two paragraphs without a heading.
+
+DATA:
+{serialize_context(context)}
+
+STYLE:
+- Formal
+- Audit-ready
+- Plain English
+- No marketing language
+"""
+
+
+def generate_ai_narrative(context, llm_client):
+    """
+    Uses an LLM client to generate ESG narrative.
+    The model is strictly grounded in provided context.
+    """
+
+    response = llm_client.generate(build_narrative_prompt(context))
     return response
@@ -1,17 +1,262 @@
-from openai import OpenAI
+import asyncio
+import hashlib
 import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline.instrumentation import span
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_TEMPERATURE = 0.2
+SYSTEM_PROMPT = "You are a senior ESG reporting expert."
+
+# Runs generate() for clients without agenerate(). Not the loop's default
+# executor: asyncio.run() waits for that on exit, which would turn a hung
+# call that already timed out back into a hang.
+_BLOCKING_CALLS = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-call")
+
+# Keep-alive connections per HTTP client
+POOL_CONNECTIONS = 32
+
+
+async def agenerate(client, prompt: str) -> str:
+    """
+    Awaits `client`'s reply whether or not it has a native async path.
+    """
+    if hasattr(client, "agenerate"):
+        return await client.agenerate(prompt)
+    return await asyncio.get_running_loop().run_in_executor(_BLOCKING_CALLS, client.generate, prompt)
+
+
+async def agenerate_stream(client, prompt: str):
+    """
+    Async iterator over `client`'s reply as text chunks; clients without a
+    streaming path yield their whole reply as one chunk.
+    """
+    if hasattr(client, "agenerate_stream"):
+        async for chunk in client.agenerate_stream(prompt):
+            yield chunk
+    else:
+        yield await agenerate(client, prompt)
+
 
 class OpenAILLMClient:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    """
+    OpenAI chat completions through one AsyncOpenAI client and its pool of
+    keep-alive connections. An async HTTP client is bound to the event loop
+    it runs on, while callers come from many short-lived loops (each
+    asyncio.run() of a Streamlit rerun) and from plain threads, so the
+    client lives on one background loop of its own, started on first use,
+    and every call is handed to that loop. close() releases the pool.
+    """
 
-    def generate(self, prompt: str) -> str:
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a senior ESG reporting expert."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        temperature: float = DEFAULT_TEMPERATURE,
+        base_url: str = None,
+        max_connections: int = POOL_CONNECTIONS,
+        max_retries: int = 2,
+    ):
+        # Imported here so the app only pays for the SDK once AI is switched on
+        import httpx
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        self._client_factory = lambda: AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=base_url,
+            max_retries=max_retries,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            ),
+        )
+        self.model = model
+        self.temperature = temperature
+        self.system_prompt = SYSTEM_PROMPT
+        self.client = None
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def _messages(self, prompt: str) -> list:
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+
+    # -----------------------------
+    # Background loop
+    # -----------------------------
+    def _submit(self, coro):
+        """
+        Schedules `coro` on the client's loop and returns its
+        concurrent.futures.Future.
+        """
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-client", daemon=True).start()
+                self.client = self._client_factory()
+                self._loop = loop
+            return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def close(self):
+        """
+        Closes the connection pool and stops the background loop; the next
+        call starts fresh ones.
+        """
+        with self._lock:
+            loop, client = self._loop, self.client
+            self._loop = self.client = None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(client.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
+    async def _create(self, prompt: str):
+        return await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt),
+            temperature=self.temperature,
+        )
+
+    async def _pump(self, prompt: str, put):
+        # Runs on the client's loop: passes each text chunk, then None, to
+        # `put`, which hands it to the caller's thread or loop
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt),
+            temperature=self.temperature,
+            stream=True,
         )
+        try:
+            async for event in stream:
+                if event.choices and event.choices[0].delta.content:
+                    put(event.choices[0].delta.content)
+        finally:
+            await stream.close()
+        put(None)
+
+    # -----------------------------
+    # Calls
+    # -----------------------------
+    def generate(self, prompt: str) -> str:
+        with span("llm.generate", model=self.model, prompt_chars=len(prompt)):
+            response = self._submit(self._create(prompt)).result()
         return response.choices[0].message.content
+
+    def generate_stream(self, prompt: str):
+        """
+        The reply as it is generated, one text chunk at a time.
+        """
+        chunks = queue.Queue()
+        future = self._submit(self._pump(prompt, chunks.put))
+        future.add_done_callback(lambda f: f.cancelled() or f.exception() is None or chunks.put(None))
+        try:
+            while (chunk := chunks.get()) is not None:
+                yield chunk
+            future.result()
+        finally:
+            future.cancel()
+
+    async def agenerate(self, prompt: str) -> str:
+        # Cancelling the caller (e.g. a timeout) cancels the request too
+        response = await asyncio.wrap_future(self._submit(self._create(prompt)))
+        return response.choices[0].message.content
+
+    async def agenerate_stream(self, prompt: str):
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        future = asyncio.wrap_future(self._submit(self._pump(prompt, lambda chunk: loop.call_soon_threadsafe(chunks.put_nowait, chunk))))
+        future.add_done_callback(lambda f: f.cancelled() or f.exception() is None or chunks.put_nowait(None))
+        try:
+            while (chunk := await chunks.get()) is not None:
+                yield chunk
+            await future
+        finally:
+            future.cancel()
+
+
+_pooled_clients = {}
+_pooled_clients_lock = threading.Lock()
+
+
+def get_llm_client(model: str = DEFAULT_MODEL, temperature: float = DEFAULT_TEMPERATURE, base_url: str = None) -> OpenAILLMClient:
+    """
+    The process-wide client for (model, temperature, base_url), so reruns,
+    sessions and batch items share one pool of keep-alive connections
+    instead of opening a new one per call. The SDK's own retries are off:
+    callers go through ai.orchestrator, which retries with backoff and
+    honours Retry-After.
+    """
+    key = (model, temperature, base_url)
+    with _pooled_clients_lock:
+        if key not in _pooled_clients:
+            _pooled_clients[key] = OpenAILLMClient(model, temperature, base_url=base_url, max_retries=0)
+        return _pooled_clients[key]
+
+
+class StubLLMClient:
+    """
+    Offline stand-in for OpenAILLMClient: a deterministic reply per prompt,
+    an optional artificial latency, and a record of every prompt it was sent.
+
+    `latency` is seconds per call (time to first token when streaming), or
+    a function of the prompt; the first `failures` calls raise RuntimeError
+    (to exercise retries). Streaming yields the reply word by word,
+    `token_delay` seconds apart.
+    """
+
+    def __init__(self, model: str = "stub", temperature: float = DEFAULT_TEMPERATURE, latency=0.0, failures: int = 0, token_delay: float = 0.0):
+        self.model = model
+        self.temperature = temperature
+        self.system_prompt = SYSTEM_PROMPT
+        self.latency = latency
+        self.failures = failures
+        self.token_delay = token_delay
+        self.prompts = []
+
+    @property
+    def calls(self) -> int:
+        return len(self.prompts)
+
+    def _latency(self, prompt: str) -> float:
+        return self.latency(prompt) if callable(self.latency) else self.latency
+
+    def _reply(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if len(self.prompts) <= self.failures:
+            raise RuntimeError(f"stub failure {len(self.prompts)} of {self.failures}")
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return f"[{self.model}] Narrative for prompt {digest} ({len(prompt)} characters)."
+
+    def generate(self, prompt: str) -> str:
+        latency = self._latency(prompt)
+        if latency:
+            time.sleep(latency)
+        return self._reply(prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        latency = self._latency(prompt)
+        if latency:
+            await asyncio.sleep(latency)
+        return self._reply(prompt)
+
+    def generate_stream(self, prompt: str):
+        latency = self._latency(prompt)
+        if latency:
+            time.sleep(latency)
+        for i, token in enumerate(re.findall(r"\S+\s*", self._reply(prompt))):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            yield token
+
+    async def agenerate_stream(self, prompt: str):
+        latency = self._latency(prompt)
+        if latency:
+            await asyncio.sleep(latency)
+        for i, token in enumerate(re.findall(r"\S+\s*", self._reply(prompt))):
+            if i and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield token
@@ -0,0 +1,246 @@
+"""
+AI Orchestration
+Concurrent LLM calls with per-call timeouts, bounded retries and deterministic fallback
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import queue
+import threading
+import time
+
+from ai.llm_client import agenerate, agenerate_stream
+from ai.rate_limit import RateLimiter
+from pipeline.instrumentation import span
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+
+
+class LLMTask:
+    """
+    One prompt to send to `client`. `fallback` is the deterministic text
+    used when every attempt fails or the task is cancelled (None: the caller
+    renders its own fallback).
+    """
+
+    def __init__(self, name: str, prompt: str, client, fallback: str = None):
+        self.name = name
+        self.prompt = prompt
+        self.client = client
+        self.fallback = fallback
+
+
+def retry_after(exc) -> float:
+    """
+    Seconds the server asked us to wait (Retry-After / retry-after-ms on a
+    429 or 503 response), or None.
+    """
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return float(headers["retry-after-ms"]) / 1e3
+        if headers.get("retry-after") is not None:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def _result(task: LLMTask, text, source: str, attempts: int, start: float, error=None, queued: float = 0.0) -> dict:
+    return {
+        "name": task.name,
+        "text": text,
+        "source": source,
+        "attempts": attempts,
+        "latency_ms": (time.perf_counter() - start) * 1e3,
+        # Part of latency_ms spent waiting for a concurrency slot / rate budget
+        "queued_ms": queued * 1e3,
+        "error": None if error is None else f"{type(error).__name__}: {error}",
+    }
+
+
+async def _attempt(task: LLMTask, timeout: float, on_chunk=None) -> str:
+    if on_chunk is None:
+        return await asyncio.wait_for(agenerate(task.client, task.prompt), timeout)
+
+    # Streaming: `timeout` bounds the wait for each chunk (including the
+    # first), not the whole reply
+    chunks = []
+    stream = agenerate_stream(task.client, task.prompt)
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(anext(stream), timeout)
+            except StopAsyncIteration:
+                return "".join(chunks)
+            chunks.append(chunk)
+            on_chunk(chunk)
+    finally:
+        await stream.aclose()
+
+
+async def run_task(
+    task: LLMTask,
+    timeout: float = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    on_chunk=None,
+    semaphore: asyncio.Semaphore = None,
+    rate_limiter=None,
+) -> dict:
+    """
+    Calls the model with a `timeout` per attempt and up to `retries` retries
+    (waiting backoff, 2 × backoff, ... in between, or longer when the
+    server sends Retry-After). Returns a result dict whose source is "ai",
+    "cache" (answered by a CachedLLMClient) or "fallback". Cancelling the
+    task also yields the fallback.
+
+    Each attempt first takes a slot from `semaphore` and budget from
+    `rate_limiter` (an ai.rate_limit.RateLimiter), if given; the timeout
+    starts once both are granted.
+
+    With `on_chunk`, the reply is streamed and each text chunk is passed to
+    it as it arrives. A retry after a partly streamed attempt starts the
+    text over, so callers should show the final result's text once it
+    arrives.
+    """
+    start = time.perf_counter()
+    error = None
+    attempts = 0
+
+    wait = 0.0
+    queued = 0.0
+
+    try:
+        for attempt in range(retries + 1):
+            if attempt:
+                await asyncio.sleep(max(wait, backoff * 2 ** (attempt - 1)))
+            attempts += 1
+            ready = time.perf_counter()
+            try:
+                async with semaphore or contextlib.nullcontext():
+                    if rate_limiter is not None:
+                        await rate_limiter.acquire(task.prompt)
+                    queued += time.perf_counter() - ready
+                    text = await _attempt(task, timeout, on_chunk)
+            except asyncio.TimeoutError:
+                error = TimeoutError(f"no response within {timeout:g}s")
+                continue
+            except Exception as exc:
+                error = exc
+                wait = retry_after(exc) or 0.0
+                if wait and rate_limiter is not None:
+                    rate_limiter.pause(wait)
+                continue
+            if not text or not text.strip():
+                error = ValueError("empty response")
+                continue
+
+            cached = getattr(task.client, "cached_entry", None)
+            source = "cache" if cached is not None and cached(task.prompt) is not None else "ai"
+            return _result(task, text, source, attempts, start, queued=queued)
+    except asyncio.CancelledError:
+        error = asyncio.CancelledError("cancelled")
+
+    return _result(task, task.fallback, "fallback", attempts, start, error, queued)
+
+
+def _outcome(future, task: LLMTask) -> dict:
+    # A task cancelled before it ever ran never reached run_task's handler
+    if future.cancelled():
+        return _result(task, task.fallback, "fallback", 0, time.perf_counter(), asyncio.CancelledError("cancelled"))
+    return future.result()
+
+
+async def run_tasks(
+    tasks: list,
+    timeout: float = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    deadline: float = None,
+    on_chunk=None,
+    on_done=None,
+    concurrency: int = None,
+    rate_limiter=None,
+) -> dict:
+    """
+    Runs every task concurrently, so the total latency is that of the
+    slowest task rather than the sum. Tasks still running after `deadline`
+    seconds (if given) are cancelled and fall back. Returns {name: result}.
+
+    Optional callbacks: on_chunk(name, chunk) streams the replies, and
+    on_done(result) is called as each task finishes. `concurrency` caps the
+    requests in flight and `rate_limiter` spaces them out (see run_task).
+    Without a rate limiter, an unlimited one still makes a Retry-After
+    hold back every task, not just the one that got the 429.
+    """
+    semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+    rate_limiter = rate_limiter or RateLimiter()
+    running = {}
+    for task in tasks:
+        chunk_callback = None if on_chunk is None else functools.partial(on_chunk, task.name)
+        future = asyncio.ensure_future(run_task(task, timeout, retries, backoff, chunk_callback, semaphore, rate_limiter))
+        if on_done is not None:
+            future.add_done_callback(lambda done, task=task: on_done(_outcome(done, task)))
+        running[future] = task
+    done, pending = await asyncio.wait(running, timeout=deadline)
+    for future in pending:
+        future.cancel()
+    if pending:
+        await asyncio.wait(pending)
+
+    return {task.name: _outcome(future, task) for future, task in running.items()}
+
+
+def run_llm_tasks(tasks: list, **options) -> dict:
+    """
+    Blocking entry point for run_tasks() (Streamlit scripts and the batch
+    CLI are synchronous). Inside a running event loop, the tasks run on a
+    fresh loop in a helper thread.
+    """
+    with span("llm.orchestrate", tasks=len(tasks)):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(run_tasks(tasks, **options))
+
+        outcome = {}
+        context = contextvars.copy_context()
+        worker = threading.Thread(target=context.run, args=(lambda: outcome.update(asyncio.run(run_tasks(tasks, **options))),))
+        worker.start()
+        worker.join()
+        return outcome
+
+
+def stream_llm_tasks(tasks: list, **options):
+    """
+    Runs the tasks concurrently on a helper thread and yields
+    (name, chunk, None) for each streamed chunk and (name, None, result)
+    when a task finishes, in arrival order. Lets a synchronous caller (the
+    Streamlit script thread) render every reply while it is generated.
+    """
+    events = queue.Queue()
+    finished = object()
+
+    def work():
+        try:
+            run_llm_tasks(
+                tasks,
+                on_chunk=lambda name, chunk: events.put((name, chunk, None)),
+                on_done=lambda result: events.put((result["name"], None, result)),
+                **options,
+            )
+        finally:
+            events.put(finished)
+
+    # The caller's context goes along, so spans land in its tracer
+    threading.Thread(target=contextvars.copy_context().run, args=(work,), name="llm-stream", daemon=True).start()
+    while (event := events.get()) is not finished:
+        yield event
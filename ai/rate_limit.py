@@ -0,0 +1,84 @@
+"""
+LLM Rate Limiting
+Request and token budgets per minute, shared by every concurrent call in the process
+"""
+
+import asyncio
+import threading
+import time
+
+from ai.context import count_tokens
+
+# Completion tokens reserved per request, since the reply length is only
+# known afterwards
+DEFAULT_COMPLETION_TOKENS = 500
+
+
+class RateLimiter:
+    """
+    Token buckets for requests per minute and tokens per minute (either may
+    be None for no limit). Each bucket starts full and refills continuously,
+    so short bursts up to the per-minute budget go through at once.
+
+    pause() holds every caller back, e.g. for a 429's Retry-After. Safe to
+    share between threads and event loops.
+    """
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None, completion_tokens: int = DEFAULT_COMPLETION_TOKENS):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.completion_tokens = completion_tokens
+        self._requests = requests_per_minute
+        self._tokens = tokens_per_minute
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.waited_s = 0.0
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _reserve(self, tokens: int) -> float:
+        """
+        Takes one request and `tokens` tokens when both are available and
+        returns 0, else returns how long to wait before trying again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+
+            self._refill(now)
+            wait = 0.0
+            if self.requests_per_minute and self._requests < 1:
+                wait = max(wait, (1 - self._requests) * 60 / self.requests_per_minute)
+            if self.tokens_per_minute:
+                # A request larger than the whole budget waits for a full bucket
+                tokens = min(tokens, self.tokens_per_minute)
+                if self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+            if wait:
+                return wait
+
+            if self.requests_per_minute:
+                self._requests -= 1
+            if self.tokens_per_minute:
+                self._tokens -= tokens
+            return 0.0
+
+    async def acquire(self, prompt: str = ""):
+        tokens = count_tokens(prompt) + self.completion_tokens
+        while (wait := self._reserve(tokens)) > 0:
+            self.waits += 1
+            self.waited_s += wait
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
@@ -0,0 +1,397 @@
+"""
+LLM Response Cache
+Disk-backed, TTL + size-bounded LRU cache of generated AI text with per-entry audit metadata
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from ai.llm_client import agenerate, agenerate_stream
+from pipeline.cache import content_hash
+from pipeline.instrumentation import span
+
+PATH_ENV_VAR = "ESG_LLM_CACHE"
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "esg_platform", "llm_responses.sqlite3")
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    model TEXT,
+    temperature REAL,
+    system_prompt_hash TEXT,
+    context_hash TEXT,
+    data_version TEXT,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    latency_ms REAL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+CREATE INDEX IF NOT EXISTS responses_data_version ON responses (data_version);
+"""
+
+# Returned by get() / entries(); the prompt and response text are only
+# included by get()
+_METADATA_COLUMNS = [
+    "key",
+    "model",
+    "temperature",
+    "system_prompt_hash",
+    "context_hash",
+    "data_version",
+    "created_at",
+    "expires_at",
+    "last_access",
+    "hits",
+    "latency_ms",
+    "size",
+]
+
+
+def _json_default(value):
+    # numpy / pandas scalars in KPI dicts
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def canonical_json(value) -> str:
+    """
+    Key-sorted, whitespace-free JSON, so equal contexts hash equally
+    regardless of dict order.
+    """
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+def response_key(model: str, temperature: float, system_prompt: str, prompt: str, context=None) -> str:
+    return content_hash(canonical_json({
+        "model": model,
+        "temperature": float(temperature),
+        "system_prompt": system_prompt,
+        "prompt": prompt,
+        "context": context,
+    }))
+
+
+# -----------------------------
+# Disk cache
+# -----------------------------
+class ResponseCache:
+    """
+    Generated text keyed on response_key(), stored in a SQLite file so it
+    survives restarts and is shared by every session and worker process.
+
+    Entries expire `ttl` seconds after they were written; when the stored
+    text exceeds `max_bytes`, the least recently read entries are evicted.
+    Each entry records its model, temperature, prompt, context hash, data
+    version, creation time, hit count and original generation latency so a
+    cached disclosure can be traced back to what produced it.
+    """
+
+    def __init__(self, path: str = None, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path or os.getenv(PATH_ENV_VAR) or DEFAULT_PATH
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        # One short-lived connection per call: safe across Streamlit's
+        # script threads and across batch worker processes
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str):
+        """
+        The entry's metadata plus "prompt" and "response", or None when the
+        key is missing or expired. A hit refreshes the entry's LRU position.
+        """
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and row["expires_at"] <= now:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                (now, key),
+            )
+            self.hits += 1
+
+        entry = dict(row)
+        entry["hits"] += 1
+        entry["last_access"] = now
+        return entry
+
+    def put(
+        self,
+        key: str,
+        response: str,
+        prompt: str,
+        model: str = None,
+        temperature: float = None,
+        system_prompt: str = None,
+        context=None,
+        data_version: str = None,
+        latency_ms: float = None,
+        ttl: float = None,
+    ):
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        size = len(response.encode("utf-8")) + len(prompt.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        row = (
+            key,
+            response,
+            prompt,
+            model,
+            None if temperature is None else float(temperature),
+            None if system_prompt is None else content_hash(system_prompt),
+            None if context is None else content_hash(canonical_json(context)),
+            data_version,
+            now,
+            now + ttl,
+            now,
+            0,
+            latency_ms,
+            size,
+        )
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now: float):
+        conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self.evictions += len(stale)
+
+    def invalidate(self, key: str = None, data_version: str = None, model: str = None) -> int:
+        """
+        Removes the entries matching every given filter (e.g. all responses
+        generated from a superseded data version) and returns how many were
+        removed. With no filters, removes everything.
+        """
+        filters = {"key": key, "data_version": data_version, "model": model}
+        clauses = [f"{column} = ?" for column, value in filters.items() if value is not None]
+        values = [value for value in filters.values() if value is not None]
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock, closing(self._connect()) as conn, conn:
+            return conn.execute(f"DELETE FROM responses{where}", values).rowcount
+
+    def clear(self):
+        self.invalidate()
+        self.hits = self.misses = self.evictions = 0
+
+    def entries(self) -> list:
+        """
+        Metadata of every live entry, most recently used first (for audit).
+        """
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                f"SELECT {', '.join(_METADATA_COLUMNS)} FROM responses WHERE expires_at > ? ORDER BY last_access DESC",
+                (time.time(),),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self) -> dict:
+        with closing(self._connect()) as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    The process-wide response cache (stored at $ESG_LLM_CACHE or under
+    ~/.cache/esg_platform).
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
+
+
+# -----------------------------
+# Client wrapper
+# -----------------------------
+class CachedLLMClient:
+    """
+    Drop-in wrapper for an LLM client (anything with `generate(prompt)` and
+    model / temperature / system_prompt attributes) that answers repeated
+    prompts from a ResponseCache.
+
+    Entries are tagged with `data_version` (e.g. the content hash of the
+    uploaded data) so they can be invalidated together with invalidate().
+    Blank replies are never stored. With `refresh=True` the cache is not read, and the fresh
+    response replaces the stored one.
+    """
+
+    def __init__(self, client, cache: ResponseCache = None, data_version: str = None, ttl: float = None, refresh: bool = False):
+        self.client = client
+        self.cache = cache or get_response_cache()
+        self.data_version = data_version
+        self.ttl = ttl
+        self.refresh = refresh
+        # Entry that served the most recent generate() call, None when it
+        # went to the model
+        self.last_entry = None
+        self.served = {}
+
+    @property
+    def model(self):
+        return getattr(self.client, "model", type(self.client).__name__)
+
+    @property
+    def temperature(self):
+        return getattr(self.client, "temperature", None)
+
+    @property
+    def system_prompt(self):
+        return getattr(self.client, "system_prompt", None)
+
+    def key_for(self, prompt: str, context=None) -> str:
+        return response_key(self.model, self.temperature or 0.0, self.system_prompt, prompt, context)
+
+    def _lookup(self, key: str):
+        if self.refresh:
+            self.last_entry = None
+        else:
+            with span("llm.cache_lookup", model=self.model) as s:
+                self.last_entry = self.cache.get(key)
+                s.set(hit=self.last_entry is not None)
+        self.served[key] = self.last_entry
+        return self.last_entry
+
+    def _store(self, key: str, prompt: str, response: str, context, start: float):
+        # A blank reply (or a stream that ended without text) is a failure,
+        # not an answer worth serving again
+        if not response or not response.strip():
+            return
+        self.cache.put(
+            key,
+            response,
+            prompt,
+            model=self.model,
+            temperature=self.temperature,
+            system_prompt=self.system_prompt,
+            context=context,
+            data_version=self.data_version,
+            latency_ms=(time.perf_counter() - start) * 1e3,
+            ttl=self.ttl,
+        )
+
+    def cached_entry(self, prompt: str, context=None):
+        """
+        The cache entry that answered the last call for this prompt, None
+        when that call went to the model. Unlike last_entry, this is safe to
+        read after several concurrent agenerate() calls.
+        """
+        return self.served.get(self.key_for(prompt, context))
+
+    def generate(self, prompt: str, context=None) -> str:
+        key = self.key_for(prompt, context)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry["response"]
+
+        start = time.perf_counter()
+        response = self.client.generate(prompt)
+        self._store(key, prompt, response, context, start)
+        return response
+
+    async def agenerate(self, prompt: str, context=None) -> str:
+        # SQLite calls block, so they run off the event loop
+        key = self.key_for(prompt, context)
+        entry = await asyncio.to_thread(self._lookup, key)
+        if entry is not None:
+            return entry["response"]
+
+        start = time.perf_counter()
+        response = await agenerate(self.client, prompt)
+        await asyncio.to_thread(self._store, key, prompt, response, context, start)
+        return response
+
+    def generate_stream(self, prompt: str, context=None):
+        """
+        Streams the reply (a cached reply arrives as one chunk). The full
+        text is cached once the stream completes; an abandoned or failed
+        stream stores nothing.
+        """
+        key = self.key_for(prompt, context)
+        entry = self._lookup(key)
+        if entry is not None:
+            yield entry["response"]
+            return
+
+        start = time.perf_counter()
+        stream = self.client.generate_stream(prompt) if hasattr(self.client, "generate_stream") else iter([self.client.generate(prompt)])
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+        self._store(key, prompt, "".join(chunks), context, start)
+
+    async def agenerate_stream(self, prompt: str, context=None):
+        key = self.key_for(prompt, context)
+        entry = await asyncio.to_thread(self._lookup, key)
+        if entry is not None:
+            yield entry["response"]
+            return
+
+        start = time.perf_counter()
+        chunks = []
+        async for chunk in agenerate_stream(self.client, prompt):
+            chunks.append(chunk)
+            yield chunk
+        await asyncio.to_thread(self._store, key, prompt, "".join(chunks), context, start)
@@ -3,28 +3,36 @@ import streamlit as st
 
 st.write("OPENAI key loaded:", bool(os.getenv("OPENAI_API_KEY")))
 
+import logging
+import traceback
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from datetime import datetime
 
-from esg.emissions import calculate_emissions, aggregate_kpis
-from esg.scope3 import estimate_scope3_emissions, aggregate_scope3_kpi
-from audit.audit_score import calculate_audit_readiness_score
+from esg.rollup_cube import GRANULARITIES
+from esg.scope3 import unresolved_spend_lines
 from audit.csrd_maturity import calculate_csrd_maturity
-from frameworks.framework_registry import get_all_framework_mappings
+from frameworks.framework_registry import get_framework_mapping, get_framework_names
 from frameworks.framework_coverage import get_framework_coverage
 from explainability.audit_trace import generate_audit_trace
-from reports.pdf_report import generate_esg_pdf
-from reports.csrd_gap_analysis import generate_csrd_gap_pdf
+from explainability.lineage import describe_lineage
+from reports.downloads import report_download
 from finance.esg_finance_mapping import get_esg_financial_linkage
 
-from quality.data_quality import assess_data_quality
+from pipeline.cache import content_hash, get_cache
+from pipeline.instrumentation import Tracer, get_tracer, start_tracing, stop_tracing
+from pipeline.runner import cached_core_pipeline, cached_scope3_pipeline, read_bytes
 from reports.narrative_builder import generate_esg_narrative
 from versioning.period_comparison import compare_periods
 
-from ai.esg_narrative_copilot import build_esg_context, generate_ai_narrative
-from ai.llm_client import OpenAILLMClient
+from ai.esg_narrative_copilot import NARRATIVE_SECTIONS, build_esg_context, build_section_prompt
+
+logger = logging.getLogger("esg.app")
+
+# Overall limit for the AI copilots on one rerun; calls still running are
+# cancelled and fall back to the rule-based text
+AI_DEADLINE_S = 60.0
 
 # -----------------------------
 # Helper: Financial Signal Formatter
@@ -38,6 +46,30 @@ def format_financial_signal(signal: str) -> str:
         return f"🟢 {signal}"
     return signal
 
+# -----------------------------
+# Helper: Cached LLM Client
+# -----------------------------
+def cached_llm_client(data: bytes, data_name: str, refresh: bool = False):
+    """
+    The pooled OpenAI client behind the disk response cache. Responses are
+    tagged with the input's content hash. The cache is shared by every
+    session, so responses for an input this session has moved away from
+    are left to expire with the TTL rather than invalidated: another
+    session may still be working on that input.
+    """
+    from ai.llm_client import get_llm_client
+    from ai.response_cache import CachedLLMClient, get_response_cache
+
+    data_version = content_hash(data, data_name)
+    return CachedLLMClient(get_llm_client(), get_response_cache(), data_version=data_version, refresh=refresh)
+
+
+def cached_response_caption(task):
+    entry = task.client.cached_entry(task.prompt)
+    if entry is not None:
+        generated = datetime.fromtimestamp(entry["created_at"]).strftime("%Y-%m-%d %H:%M")
+        st.caption(f"Served from the response cache (generated {generated} by {entry['model']}).")
+
 # -----------------------------
 # App Configuration
 # -----------------------------
@@ -49,54 +81,88 @@ st.set_page_config(
 st.title("🌱 ESG Reporting Platform")
 st.caption("Enterprise ESG Reporting • CSRD Compliance • Audit Intelligence")
 
+# -----------------------------
+# Diagnostics (hidden: ?diagnostics=1 or ESG_DIAGNOSTICS=1)
+# -----------------------------
+show_diagnostics = (
+    st.query_params.get("diagnostics") == "1"
+    or os.getenv("ESG_DIAGNOSTICS") == "1"
+)
+
+# Each session traces into its own tracer, and only for the length of a
+# run: tracing starts here and stops at the end of the script
+diagnostics_token = None
+if show_diagnostics:
+    diagnostics_token = start_tracing(st.session_state.setdefault("tracer", Tracer()))
+elif "tracer" in st.session_state:
+    # A previous run that ended in an exception left it enabled
+    st.session_state["tracer"].disable()
+
 # -----------------------------
 # Load Data
 # -----------------------------
 st.subheader("📂 Data Input")
 
-uploaded_file = st.file_uploader("Upload ESG Data (CSV)", type="csv")
+uploaded_file = st.file_uploader(
+    "Upload ESG Data (CSV / Parquet / Arrow)",
+    type=["csv", "parquet", "arrow", "feather"],
+)
 
 if uploaded_file is not None:
-    df = pd.read_csv(uploaded_file)
+    data, data_name = uploaded_file.getvalue(), uploaded_file.name
 else:
-    df = pd.read_csv("data/sample_company_data.csv")
+    data_name = "data/sample_company_data.csv"
+    data = read_bytes(data_name)
 
 # -----------------------------
-# Core ESG Calculations
+# Core ESG Calculations (cached on the input's content hash)
 # -----------------------------
-df = calculate_emissions(df)
-kpis = aggregate_kpis(df)
-
-audit = calculate_audit_readiness_score(df, kpis)
+try:
+    core = cached_core_pipeline(data, data_name)
+except (ValueError, KeyError, ImportError) as exc:
+    # Malformed uploads (unparseable dates, missing columns, unsupported
+    # format) are reported to the user instead of as a traceback
+    message = f"missing column {exc}" if isinstance(exc, KeyError) else exc
+    st.error(f"Could not process {data_name}: {message}")
+    if diagnostics_token is not None:
+        stop_tracing(diagnostics_token)
+    st.stop()
+
+df = core["df"]
+kpis = core["kpis"]
+cube = core["cube"]
+
+audit = core["audit"]
 score = audit["total_score"]
 
-quality_result = assess_data_quality(df)
+quality_result = core["quality"]
+findings = core["findings"]
+lineage = core["lineage"]
 
 scope3_present = False
 
 # -----------------------------
 # CSRD Maturity (needed by multiple tabs/pages)
 # -----------------------------
-maturity = calculate_csrd_maturity(
-    year=datetime.now().year,
-    audit_score=score,
-    scope3_present=False,  # updated later if scope 3 is loaded
-)
+maturity = core["maturity"]  # updated later if scope 3 is loaded
 
 # -----------------------------
 # 🔑 STORE SHARED STATE (CRITICAL FOR PAGES)
 # -----------------------------
 st.session_state["df"] = df
 st.session_state["kpis"] = kpis
+st.session_state["cube"] = cube
 st.session_state["audit_score"] = score
 st.session_state["audit"] = audit
 st.session_state["quality"] = quality_result
+st.session_state["findings"] = findings
+st.session_state["lineage"] = lineage
 st.session_state["maturity"] = maturity
 
 # -----------------------------
 # Tabs (Demo / Overview Mode)
 # -----------------------------
-tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
+tab_names = [
     "📊 Overview",
     "📘 Frameworks",
     "🛡️ Audit & Data Quality",
@@ -105,7 +171,12 @@ tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
     "📖 ESG Narrative",
     "💰 ESG → Financial Impact",
     "📄 Reports & Versioning",
-])
+]
+if show_diagnostics:
+    tab_names.append("🩺 Diagnostics")
+
+tabs = st.tabs(tab_names)
+tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = tabs[:8]
 
 # -----------------------------
 # TAB 1: Overview
@@ -113,28 +184,41 @@ tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
 with tab1:
     st.subheader("📊 Key ESG Metrics")
 
+    filter_col, granularity_col = st.columns([3, 1])
+    selected_facilities = filter_col.multiselect("Facilities", cube.facilities())
+    granularity = granularity_col.selectbox("Granularity", list(GRANULARITIES))
+
+    view_kpis = cube.kpis(selected_facilities)
+
     col1, col2, col3, col4, col5 = st.columns(5)
-    col1.metric("Total Energy (kWh)", kpis["Total Energy (kWh)"])
-    col2.metric("Renewable (%)", f"{kpis['Renewable Energy (%)']}%")
-    col3.metric("Scope 1 CO₂ (kg)", kpis["Scope 1 CO₂ (kg)"])
-    col4.metric("Scope 2 CO₂ (kg)", kpis["Scope 2 CO₂ (kg)"])
-    col5.metric("Total CO₂ (kg)", kpis["Total CO₂ (kg)"])
+    col1.metric("Total Energy (kWh)", view_kpis["Total Energy (kWh)"])
+    col2.metric("Renewable (%)", f"{view_kpis['Renewable Energy (%)']}%")
+    col3.metric("Scope 1 CO₂ (kg)", view_kpis["Scope 1 CO₂ (kg)"])
+    col4.metric("Scope 2 CO₂ (kg)", view_kpis["Scope 2 CO₂ (kg)"])
+    col5.metric("Total CO₂ (kg)", view_kpis["Total CO₂ (kg)"])
+
+    trend_df = cube.trend(granularity, selected_facilities)
 
-    df["date"] = pd.to_datetime(df["date"])
-    trend_df = df.groupby("date", as_index=False)["total_co2_kg"].sum()
+    import plotly.express as px
 
     fig = px.line(trend_df, x="date", y="total_co2_kg", title="CO₂ Emissions Trend")
     st.plotly_chart(fig, use_container_width=True)
 
+    with st.expander("🏭 Facility Drill-down"):
+        st.dataframe(
+            cube.by_facility(granularity, selected_facilities),
+            use_container_width=True,
+            hide_index=True,
+        )
+
 # -----------------------------
 # TAB 2: Frameworks
 # -----------------------------
 with tab2:
     st.subheader("📘 ESG Framework Compliance")
 
-    frameworks = get_all_framework_mappings()
-    selected = st.selectbox("Select Framework", list(frameworks.keys()))
-    st.dataframe(pd.DataFrame(frameworks[selected]), use_container_width=True)
+    selected = st.selectbox("Select Framework", get_framework_names())
+    st.dataframe(pd.DataFrame(get_framework_mapping(selected)), use_container_width=True)
 
     st.subheader("🧩 Framework Coverage Heatmap")
     st.dataframe(pd.DataFrame(get_framework_coverage()), use_container_width=True)
@@ -178,45 +262,61 @@ with tab3:
     use_ai_audit = st.toggle("Use AI Audit Risk Explanation")
 
     if use_ai_audit:
-        try:
-            from ai.audit_risk_explainer import (
-                build_audit_risk_context,
-                generate_ai_audit_explanation
-            )
-            from ai.llm_client import OpenAILLMClient
+        from ai.audit_risk_explainer import build_audit_risk_context
 
-            llm = OpenAILLMClient()
+        refresh_ai_audit = st.button("🔄 Regenerate", key="regenerate_audit")
 
-            risk_context = build_audit_risk_context(
-                audit=audit,
-                data_quality=quality_result,
-                maturity=maturity
-            )
+        # Filled in once the AI calls below have finished
+        audit_ai_slot = st.empty()
+        audit_ai_slot.info("⏳ Analyzing audit risk drivers...")
 
-            with st.spinner("Analyzing audit risk drivers..."):
-                ai_audit_text = generate_ai_audit_explanation(
-                    risk_context,
-                    llm
-                )
-
-            st.markdown(ai_audit_text)
+        risk_context = build_audit_risk_context(
+            audit=audit,
+            data_quality=quality_result,
+            maturity=maturity
+        )
+    else:
+        with st.expander("🔍 Audit Explainability (Rule-based)"):
+            st.json(generate_audit_trace(df, kpis, audit, lineage))
 
-            st.caption(
-                "AI-generated audit explanation grounded strictly in reported ESG data, "
-                "audit metrics, and data quality indicators."
+    # -----------------------------
+    # KPI Lineage (drill down on demand)
+    # -----------------------------
+    with st.expander("🧬 Trace a KPI to its source rows"):
+        target = st.selectbox(
+            "KPI or audit area",
+            list(lineage["kpis"]) + list(lineage["audit"]),
+            key="tab3_lineage"
+        )
+        entry = lineage["kpis"].get(target) or lineage["audit"][target]
+        st.json(describe_lineage(entry))
+
+        if entry["factors"]:
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        "Factor": factor_id,
+                        "Value": lineage["factors"][factor_id]["factor"],
+                        "Rows": len(lineage["factors"][factor_id]["rows"]),
+                    }
+                    for factor_id in entry["factors"]
+                ]),
+                use_container_width=True
             )
 
-        except Exception:
-            st.warning(
-                "⚠️ AI audit explanation is temporarily unavailable. "
-                "Showing standard audit explainability instead."
+        source_rows = entry["rows"]
+        if len(source_rows):
+            lineage_page = st.number_input(
+                f"Source rows page (of {source_rows.n_pages()})",
+                min_value=1,
+                max_value=source_rows.n_pages(),
+                value=1,
+                key="tab3_lineage_page"
+            )
+            st.dataframe(
+                df.iloc[source_rows.page(lineage_page - 1)],
+                use_container_width=True
             )
-
-            with st.expander("🔍 Audit Explainability (Rule-based)"):
-                st.json(generate_audit_trace(df, kpis))
-    else:
-        with st.expander("🔍 Audit Explainability (Rule-based)"):
-            st.json(generate_audit_trace(df, kpis))
 
     # -----------------------------
     # Data Quality & Validation
@@ -240,10 +340,48 @@ with tab3:
     st.dataframe(flags_df, use_container_width=True)
 
     st.caption(
-        "Measured = Directly captured | Estimated = Model-based | "
+        "Measured = Directly captured | Flagged = Measured, with outlier readings | "
+        "Estimated = Model-based | "
         "Assumed = Incomplete or missing data"
     )
 
+    outliers = quality_result["outliers"]
+    if len(outliers):
+        with st.expander(f"📍 Outlier readings ({len(outliers)})"):
+            st.dataframe(outliers, use_container_width=True)
+            st.caption(
+                "Score = distance from the facility's typical value (median / MAD "
+                "within this upload), in robust z units; readings above 3.5 are flagged."
+            )
+
+    # -----------------------------
+    # Rule Violations (row level, paged)
+    # -----------------------------
+    st.subheader("🔎 Rule Violations")
+
+    summary = findings.summary()
+    st.dataframe(summary, use_container_width=True)
+
+    violated = findings.violated()
+    if violated:
+        rule_id = st.selectbox("Inspect rule", violated, key="tab3_rule")
+        page = st.number_input(
+            f"Page (of {findings.n_pages(rule_id)})",
+            min_value=1,
+            max_value=findings.n_pages(rule_id),
+            value=1,
+            key="tab3_page"
+        )
+        st.dataframe(
+            df.iloc[findings.page(rule_id, page - 1)],
+            use_container_width=True
+        )
+    else:
+        st.success("✅ All configured validation rules pass")
+
+    if findings.skipped:
+        st.caption(f"Not evaluated (columns not present): {', '.join(findings.skipped)}")
+
 # -----------------------------
 # TAB 4: Scope 3
 # -----------------------------
@@ -251,20 +389,32 @@ with tab4:
     st.subheader("🌍 Scope 3 Emissions (Estimated)")
 
     scope3_file = st.file_uploader(
-        "Upload Scope 3 Spend Data (CSV)",
-        type="csv",
+        "Upload Scope 3 Spend Data or AP Ledger (CSV / Parquet / Arrow)",
+        type=["csv", "parquet", "arrow", "feather"],
         key="scope3"
     )
 
+    scope3 = None
     if scope3_file is not None:
-        scope3_df = pd.read_csv(scope3_file)
-        scope3_result = estimate_scope3_emissions(scope3_df)
-        scope3_total = aggregate_scope3_kpi(scope3_result)
+        try:
+            scope3 = cached_scope3_pipeline(scope3_file.getvalue(), scope3_file.name)
+        except (ValueError, KeyError, ImportError) as exc:
+            # e.g. ledger lines in a currency without an EUR rate
+            message = f"missing column {exc}" if isinstance(exc, KeyError) else exc
+            st.error(f"Could not process {scope3_file.name}: {message}")
+
+    if scope3 is not None:
+        scope3_result = scope3["result"]
+        scope3_total = scope3["total"]
         scope3_present = scope3_total > 0
 
         st.metric("Estimated Scope 3 CO₂ (kg)", scope3_total)
         st.dataframe(scope3_result, use_container_width=True)
 
+        unresolved = unresolved_spend_lines(scope3_result)
+        if unresolved:
+            st.warning(f"⚠️ {unresolved} spend lines have no matching emission factor")
+
         # Update maturity once scope 3 is known
         maturity = calculate_csrd_maturity(
             year=datetime.now().year,
@@ -293,41 +443,126 @@ with tab6:
     use_ai = st.toggle("🤖 Use AI Narrative Copilot")
 
     if use_ai:
-        try:
-            llm = OpenAILLMClient()
-    
-            context = build_esg_context(
-                kpis=kpis,
-                audit=st.session_state["audit"],
-                maturity=maturity,
-                data_quality=st.session_state["quality"]
-            )
-    
-            with st.spinner("Generating AI-powered ESG narrative..."):
-                ai_text = generate_ai_narrative(context, llm)
-    
-            st.markdown(ai_text)
-    
-            st.caption(
-                "AI-generated narrative grounded strictly in reported ESG data."
-            )
-    
-        except Exception as e:
-            st.warning(
-                "⚠️ AI service is temporarily unavailable. "
-                "Showing standard ESG narrative instead."
-            )
-    
-            narrative = generate_esg_narrative(kpis, score, maturity)
-            for section, text in narrative.items():
-                st.markdown(f"### {section}")
-                st.write(text)
+        refresh_ai_narrative = st.button("🔄 Regenerate", key="regenerate_narrative")
+
+        # Filled in once the AI calls below have finished
+        narrative_ai_slot = st.empty()
+        narrative_ai_slot.info("⏳ Generating AI-powered ESG narrative...")
+
+        context = build_esg_context(
+            kpis=kpis,
+            audit=st.session_state["audit"],
+            maturity=maturity,
+            data_quality=st.session_state["quality"]
+        )
     else:
         narrative = generate_esg_narrative(kpis, score, maturity)
         for section, text in narrative.items():
             st.markdown(f"### {section}")
             st.write(text)
 
+# -----------------------------
+# AI Copilots (audit explanation and narrative sections run concurrently
+# and stream into their tabs; each has its own timeout / retries and falls
+# back on its own)
+# -----------------------------
+# Shown on the diagnostics tab
+ai_results = {}
+ai_error = None
+
+if use_ai_audit or use_ai:
+    from ai.audit_risk_explainer import build_audit_prompt
+    from ai.orchestrator import LLMTask, stream_llm_tasks
+
+    ai_tasks = {}
+    fallback_narrative = generate_esg_narrative(kpis, score, maturity)
+
+    # One placeholder per task, rewritten as its text streams in
+    ai_slots = {}
+    if use_ai_audit:
+        ai_slots["audit"] = audit_ai_slot
+    if use_ai:
+        with narrative_ai_slot.container():
+            narrative_notice = st.empty()
+            for section in NARRATIVE_SECTIONS:
+                st.markdown(f"### {section}")
+                ai_slots[section] = st.empty()
+            narrative_footer = st.empty()
+
+    def render_ai_result(name, result):
+        succeeded = result is not None and result["source"] != "fallback"
+
+        with ai_slots[name].container():
+            if name != "audit":
+                st.write(result["text"] if succeeded else fallback_narrative[name])
+                if succeeded:
+                    cached_response_caption(ai_tasks[name])
+            elif succeeded:
+                st.markdown(result["text"])
+
+                cached_response_caption(ai_tasks["audit"])
+                st.caption(
+                    "AI-generated audit explanation grounded strictly in reported ESG data, "
+                    "audit metrics, and data quality indicators."
+                )
+            else:
+                st.warning(
+                    "⚠️ AI audit explanation is temporarily unavailable. "
+                    "Showing standard audit explainability instead."
+                )
+
+                with st.expander("🔍 Audit Explainability (Rule-based)"):
+                    st.json(generate_audit_trace(df, kpis, audit, lineage))
+
+    try:
+        if use_ai_audit:
+            ai_tasks["audit"] = LLMTask(
+                "audit",
+                build_audit_prompt(risk_context),
+                cached_llm_client(data, data_name, refresh_ai_audit),
+            )
+        if use_ai:
+            narrative_llm = cached_llm_client(data, data_name, refresh_ai_narrative)
+            for section in NARRATIVE_SECTIONS:
+                ai_tasks[section] = LLMTask(
+                    section,
+                    build_section_prompt(context, section),
+                    narrative_llm,
+                    fallback_narrative[section],
+                )
+
+        streamed = {name: "" for name in ai_tasks}
+        for name, chunk, result in stream_llm_tasks(list(ai_tasks.values()), deadline=AI_DEADLINE_S):
+            if result is None:
+                streamed[name] += chunk
+                ai_slots[name].markdown(streamed[name] + "▌")
+            else:
+                ai_results[name] = result
+                render_ai_result(name, result)
+    except Exception:
+        # e.g. no client (missing API key or SDK): the remaining panels fall back
+        logger.exception("AI copilots failed; showing the rule-based text")
+        ai_error = traceback.format_exc()
+
+    for name in ai_slots:
+        if name not in ai_results:
+            render_ai_result(name, None)
+
+    if use_ai:
+        fallen_back = [
+            section for section in NARRATIVE_SECTIONS
+            if section not in ai_results or ai_results[section]["source"] == "fallback"
+        ]
+        if fallen_back:
+            narrative_notice.warning(
+                "⚠️ AI service is temporarily unavailable. "
+                f"Showing standard ESG narrative for: {', '.join(fallen_back)}."
+            )
+        if len(fallen_back) < len(NARRATIVE_SECTIONS):
+            narrative_footer.caption(
+                "AI-generated narrative grounded strictly in reported ESG data."
+            )
+
 
 # -----------------------------
 # TAB 7: ESG → Financial Impact
@@ -352,18 +587,19 @@ with tab7:
 with tab8:
     st.subheader("📄 Reports")
 
-    st.download_button(
-        "⬇️ ESG Environmental Report",
-        generate_esg_pdf(kpis),
-        file_name="esg_environmental_report.pdf",
-        mime="application/pdf",
+    report_download(
+        "esg_environmental",
+        "ESG Environmental Report",
+        "esg_environmental_report.pdf",
+        kpis,
     )
 
-    st.download_button(
-        "⬇️ CSRD Gap Analysis Report",
-        generate_csrd_gap_pdf(kpis, score),
-        file_name="csrd_gap_analysis_report.pdf",
-        mime="application/pdf",
+    report_download(
+        "csrd_gap",
+        "CSRD Gap Analysis Report",
+        "csrd_gap_analysis_report.pdf",
+        kpis,
+        score,
     )
 
     st.subheader("📅 Year-over-Year Comparison")
@@ -375,3 +611,55 @@ with tab8:
 
     comparison = compare_periods(kpis, previous_kpis)
     st.dataframe(pd.DataFrame(comparison), use_container_width=True)
+
+# -----------------------------
+# TAB 9: Diagnostics (hidden)
+# -----------------------------
+if show_diagnostics:
+    with tabs[8]:
+        tracer = get_tracer()
+
+        st.subheader("⏱️ Pipeline Stages")
+        st.caption(
+            "Spans recorded by this session's runs. Cached stages only "
+            "appear on the run that computed them."
+        )
+        st.dataframe(tracer.summary(), use_container_width=True)
+
+        with st.expander("All spans"):
+            st.dataframe(pd.DataFrame(tracer.spans()), use_container_width=True)
+
+        st.subheader("🗄️ Computation Cache")
+        st.json(get_cache().stats())
+
+        if use_ai_audit or use_ai:
+            st.subheader("🤖 AI Copilots")
+            if ai_error:
+                st.error("The AI copilots failed on this run; the rule-based text is shown instead.")
+                st.code(ai_error)
+            if ai_results:
+                st.dataframe(
+                    pd.DataFrame(ai_results.values())[["name", "source", "attempts", "latency_ms", "queued_ms", "error"]],
+                    use_container_width=True,
+                )
+
+        export_json, export_chrome, clear_col = st.columns(3)
+        with export_json:
+            st.download_button(
+                "⬇️ Spans (JSON)",
+                tracer.to_json(),
+                file_name="esg_spans.json",
+                mime="application/json",
+            )
+        with export_chrome:
+            st.download_button(
+                "⬇️ Chrome Trace",
+                tracer.to_chrome_trace(),
+                file_name="esg_pipeline.trace.json",
+                mime="application/json",
+            )
+        with clear_col:
+            if st.button("🧹 Clear spans"):
+                tracer.clear()
+
+    stop_tracing(diagnostics_token)
@@ -1,5 +1,32 @@
 import pandas as pd
 
+REQUIRED_COLUMNS = [
+    "date",
+    "facility",
+    "energy_kwh",
+    "renewable_kwh",
+    "fuel_liters",
+]
+
+# Most points each assessment area can contribute
+MAX_SCORES = {
+    "Data Completeness": 30,
+    "Emissions Coverage": 30,
+    "Renewable Transparency": 20,
+    "CSRD / GRI Alignment": 20,
+}
+
+# Data Completeness points lost per missing required column
+MISSING_COLUMN_PENALTY = 6
+
+# Emissions Coverage when only one of Scope 1 / Scope 2 is reported
+PARTIAL_COVERAGE_SCORE = 15
+
+# Renewable Transparency: (minimum renewable share %, points), highest first;
+# any renewable share above 0 earns RENEWABLE_ANY_SCORE
+RENEWABLE_TIERS = [(40, 20), (20, 12)]
+RENEWABLE_ANY_SCORE = 6
+
 
 def calculate_audit_readiness_score(df: pd.DataFrame, kpis: dict) -> dict:
     score = 0
@@ -8,20 +35,9 @@ def calculate_audit_readiness_score(df: pd.DataFrame, kpis: dict) -> dict:
     # -----------------------------
     # 1. Data Completeness (30)
     # -----------------------------
-    required_columns = [
-        "date",
-        "facility",
-        "energy_kwh",
-        "renewable_kwh",
-        "fuel_liters",
-    ]
-
-    missing_cols = [c for c in required_columns if c not in df.columns]
-
-    if not missing_cols:
-        completeness_score = 30
-    else:
-        completeness_score = max(0, 30 - (len(missing_cols) * 6))
+    missing_cols = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+
+    completeness_score = max(0, MAX_SCORES["Data Completeness"] - len(missing_cols) * MISSING_COLUMN_PENALTY)
 
     breakdown["Data Completeness"] = completeness_score
     score += completeness_score
@@ -33,9 +49,9 @@ def calculate_audit_readiness_score(df: pd.DataFrame, kpis: dict) -> dict:
     scope2_present = kpis["Scope 2 CO₂ (kg)"] > 0
 
     if scope1_present and scope2_present:
-        emissions_score = 30
+        emissions_score = MAX_SCORES["Emissions Coverage"]
     elif scope1_present or scope2_present:
-        emissions_score = 15
+        emissions_score = PARTIAL_COVERAGE_SCORE
     else:
         emissions_score = 0
 
@@ -47,14 +63,10 @@ def calculate_audit_readiness_score(df: pd.DataFrame, kpis: dict) -> dict:
     # -----------------------------
     renewable_pct = kpis["Renewable Energy (%)"]
 
-    if renewable_pct >= 40:
-        renewable_score = 20
-    elif renewable_pct >= 20:
-        renewable_score = 12
-    elif renewable_pct > 0:
-        renewable_score = 6
-    else:
-        renewable_score = 0
+    renewable_score = next(
+        (points for minimum, points in RENEWABLE_TIERS if renewable_pct >= minimum),
+        RENEWABLE_ANY_SCORE if renewable_pct > 0 else 0,
+    )
 
     breakdown["Renewable Transparency"] = renewable_score
     score += renewable_score
@@ -63,7 +75,7 @@ def calculate_audit_readiness_score(df: pd.DataFrame, kpis: dict) -> dict:
     # 4. Framework Alignment (20)
     # -----------------------------
     # Since CSRD + GRI mapping exists
-    framework_score = 20
+    framework_score = MAX_SCORES["CSRD / GRI Alignment"]
     breakdown["CSRD / GRI Alignment"] = framework_score
     score += framework_score
 
@@ -1,23 +1,23 @@
+MATURITY_LABELS = {5: "Optimized", 4: "Managed", 3: "Defined", 2: "Basic", 1: "Ad-hoc"}
+
+# Minimum audit score per maturity level, highest first; level 5 also
+# requires Scope 3 to be reported, and anything below level 2 is level 1
+MATURITY_THRESHOLDS = {5: 85, 4: 70, 3: 50, 2: 30}
+SCOPE3_REQUIRED_LEVEL = 5
+
+
 def calculate_csrd_maturity(year: int, audit_score: int, scope3_present: bool) -> dict:
-    if audit_score >= 85 and scope3_present:
-        level = 5
-        label = "Optimized"
-    elif audit_score >= 70:
-        level = 4
-        label = "Managed"
-    elif audit_score >= 50:
-        level = 3
-        label = "Defined"
-    elif audit_score >= 30:
-        level = 2
-        label = "Basic"
-    else:
-        level = 1
-        label = "Ad-hoc"
+    level = next(
+        (
+            candidate for candidate, minimum in MATURITY_THRESHOLDS.items()
+            if audit_score >= minimum and (candidate < SCOPE3_REQUIRED_LEVEL or scope3_present)
+        ),
+        1,
+    )
 
     return {
         "year": year,
         "maturity_level": level,
-        "maturity_label": label,
+        "maturity_label": MATURITY_LABELS[level],
         "audit_score": audit_score,
     }
@@ -0,0 +1,131 @@
+"""
+Startup Import Budget
+Fails when the app's top-level imports pull in a lazily loaded dependency or exceed a time budget
+"""
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+
+# Loaded at the point of use (AI toggle, report request, chart, framework
+# selection) and never by importing the app's modules
+LAZY_MODULES = [
+    "openai",
+    "reportlab",
+    "plotly",
+    "frameworks.csrd_gri_mapping",
+    "frameworks.sasb_mapping",
+    "frameworks.tcfd_mapping",
+]
+
+# Cumulative import time of the startup modules in a fresh interpreter.
+# Generous for a container CPU; the lazy-module check is the strict part.
+DEFAULT_BUDGET_MS = 2500.0
+
+_PROBE = """
+import importlib, json, sys, time
+imported, missing = [], []
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    try:
+        importlib.import_module(name)
+        imported.append(name)
+    except ImportError as exc:
+        missing.append([name, str(exc)])
+print(json.dumps({
+    "ms": (time.perf_counter() - start) * 1e3,
+    "imported": imported,
+    "missing": missing,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+def startup_modules(path: str = APP_PATH) -> list:
+    """
+    Modules imported at the top level of a script (not inside functions,
+    `with` blocks or branches), in order of first appearance.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names.append(node.module)
+    return list(dict.fromkeys(names))
+
+
+def _slowest_imports(stderr: str, count: int = 10) -> list:
+    """
+    Top-level packages with the largest cumulative time in -X importtime output.
+    """
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            timings[name.strip()] = int(cumulative) / 1e3
+    return sorted(timings.items(), key=lambda item: -item[1])[:count]
+
+
+def measure_imports(modules: list) -> dict:
+    """
+    Imports `modules` in a fresh interpreter (so nothing is cached) and
+    reports the time taken, the modules that ended up loaded and the
+    slowest top-level imports.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE, *modules],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["slowest"] = _slowest_imports(completed.stderr)
+    return result
+
+
+def check_budget(result: dict, budget_ms: float = DEFAULT_BUDGET_MS) -> list:
+    loaded = set(result["modules"])
+    problems = [
+        f"{module} is imported at startup"
+        for module in LAZY_MODULES
+        if module in loaded
+    ]
+    if result["ms"] > budget_ms:
+        problems.append(f"startup imports took {result['ms']:.0f} ms (budget {budget_ms:.0f} ms)")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the app's startup imports against a budget.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    result = measure_imports(startup_modules())
+    for name, error in result["missing"]:
+        print(f"not installed, skipped: {name} ({error})")
+    print(f"startup imports: {result['ms']:.0f} ms for {len(result['imported'])} module(s)")
+    for name, ms in result["slowest"]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    problems = check_budget(result, args.budget_ms)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Batch Narrative Benchmark
+Throughput of portfolio narrative generation against the local mock LLM server
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from ai.batch_narratives import batch_summary, generate_narratives
+from ai.esg_narrative_copilot import build_esg_context
+from ai.llm_client import OpenAILLMClient, get_llm_client
+from audit.audit_score import calculate_audit_readiness_score
+from audit.csrd_maturity import calculate_csrd_maturity
+from benchmarks.mock_llm_server import MockLLMServer
+from benchmarks.synthetic import DEFAULT_SEED, synthetic_esg_data
+from esg.emissions import aggregate_kpis, calculate_emissions
+from quality.data_quality import assess_data_quality
+
+DEFAULT_ENTITIES = 200
+DEFAULT_CONCURRENCY = [1, 8, 32]
+
+# Distinct contexts built from pipeline runs; entities beyond this reuse them
+DISTINCT_CONTEXTS = 20
+
+
+def synthetic_contexts(entities: int, seed: int = DEFAULT_SEED) -> dict:
+    contexts = []
+    for i in range(min(entities, DISTINCT_CONTEXTS)):
+        emissions = calculate_emissions(synthetic_esg_data(500, seed + i, days=90))
+        kpis = aggregate_kpis(emissions)
+        audit = calculate_audit_readiness_score(emissions, kpis)
+        maturity = calculate_csrd_maturity(2024, audit["total_score"], i % 2 == 0)
+        contexts.append(build_esg_context(kpis, audit, maturity, assess_data_quality(emissions)))
+    return {f"entity_{i:04d}": contexts[i % len(contexts)] for i in range(entities)}
+
+
+class UnpooledClient:
+    """
+    Builds a fresh OpenAI client for every request (the behaviour before
+    get_llm_client), for comparison.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.model = "mock"
+        self.temperature = 0.2
+
+    async def agenerate(self, prompt: str) -> str:
+        client = OpenAILLMClient(self.model, base_url=self.base_url, max_retries=0)
+        try:
+            return await client.agenerate(prompt)
+        finally:
+            await asyncio.to_thread(client.close)
+
+
+def run_case(contexts: dict, concurrency: int, args, pooled: bool = True) -> dict:
+    server_options = {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "requests_per_second": args.server_rps,
+        "rate_limit_probability": args.rate_limit_probability,
+    }
+    with MockLLMServer(**server_options) as server:
+        client = get_llm_client("mock", base_url=server.base_url) if pooled else UnpooledClient(server.base_url)
+        start = time.perf_counter()
+        narratives = generate_narratives(
+            contexts,
+            client=client,
+            concurrency=concurrency,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+            timeout=args.timeout,
+            retries=args.retries,
+            backoff=args.backoff,
+        )
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "client": "pooled" if pooled else "unpooled",
+        **batch_summary(narratives, elapsed),
+        "server": dict(server.counts),
+    }
+
+
+def _format(result: dict) -> str:
+    return (
+        f"{result['client']:>8}  c={result['concurrency']:<3}  {result['elapsed_s']:7.2f} s  "
+        f"{result['requests_per_s']:7.1f} req/s  p50 {result['p50_ms']:7.0f} ms  p95 {result['p95_ms']:7.0f} ms  "
+        f"ok {result['ok']}/{result['entities']}  retries {result['retries']}  fallbacks {result['fallbacks']}  "
+        f"429s {result['server']['rate_limited']}  connections {result['server']['connections']}"
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark batch narrative generation against a local mock LLM server.")
+    parser.add_argument("--entities", type=int, default=DEFAULT_ENTITIES)
+    parser.add_argument("--concurrency", default=",".join(map(str, DEFAULT_CONCURRENCY)), help="Comma-separated limits, e.g. 1,8,32")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock server latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--server-rps", type=float, default=None, help="Mock server requests/s before it answers 429")
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0, help="Share of requests answered 429 at random")
+    parser.add_argument("--rpm", type=float, default=None, help="Client-side requests per minute")
+    parser.add_argument("--tpm", type=float, default=None, help="Client-side tokens per minute")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=0.25)
+    parser.add_argument("--compare-unpooled", action="store_true", help="Also run with a new client per request")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="Write the results JSON here")
+    args = parser.parse_args(argv)
+
+    # The mock server ignores the key, but the SDK requires one
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+    contexts = synthetic_contexts(args.entities, args.seed)
+    results = []
+    for concurrency in [int(value) for value in args.concurrency.split(",")]:
+        for pooled in [True, False] if args.compare_unpooled else [True]:
+            result = run_case(contexts, concurrency, args, pooled)
+            print(_format(result))
+            results.append(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+    return 1 if any(result["failed"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+LLM Checks
+Offline checks of the orchestrator's retry, timeout, rate-limit and caching paths; exits 1 on failure
+"""
+
+import json
+import os
+import sys
+import tempfile
+import urllib.error
+import urllib.request
+
+from ai.llm_client import StubLLMClient
+from ai.orchestrator import LLMTask, run_llm_tasks
+from ai.rate_limit import RateLimiter
+from ai.response_cache import CachedLLMClient, ResponseCache
+from benchmarks.mock_llm_server import MockLLMServer
+
+
+class _EmptyOnceClient(StubLLMClient):
+    # First reply is blank, later ones are normal
+    def _reply(self, prompt: str) -> str:
+        reply = super()._reply(prompt)
+        return "" if self.calls == 1 else reply
+
+
+class _BrokenStreamClient(StubLLMClient):
+    # Streams one chunk, then the connection drops
+    async def agenerate_stream(self, prompt: str):
+        yield self._reply(prompt).split(" ")[0] + " "
+        raise ConnectionError("stream interrupted")
+
+
+class _HTTPStatusError(Exception):
+    # Carries the response headers the way the OpenAI SDK's errors do
+    def __init__(self, error: urllib.error.HTTPError):
+        super().__init__(f"HTTP {error.code}")
+        self.response = type("Response", (), {"headers": {k.lower(): v for k, v in error.headers.items()}})()
+
+
+class _UrllibClient:
+    """
+    Minimal blocking chat completions client for the mock server.
+    """
+
+    model = "mock"
+    temperature = 0.0
+    system_prompt = None
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    def generate(self, prompt: str) -> str:
+        body = json.dumps({"model": self.model, "messages": [{"role": "user", "content": prompt}]}).encode("utf-8")
+        request = urllib.request.Request(self.base_url + "/chat/completions", body, {"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.load(response)["choices"][0]["message"]["content"]
+        except urllib.error.HTTPError as exc:
+            raise _HTTPStatusError(exc) from exc
+
+
+def check_empty_reply_retry():
+    """
+    A blank reply counts as a failed attempt and is retried.
+    """
+    client = _EmptyOnceClient()
+    result = run_llm_tasks([LLMTask("summary", "prompt", client, fallback="fallback")], retries=1, backoff=0)["summary"]
+
+    assert result["source"] == "ai", result
+    assert result["attempts"] == 2, result
+    assert result["text"].strip(), result
+
+
+def check_timeout_fallback():
+    """
+    A reply slower than the timeout falls back to the deterministic text.
+    """
+    client = StubLLMClient(latency=0.5)
+    result = run_llm_tasks([LLMTask("summary", "prompt", client, fallback="fallback")], timeout=0.05, retries=0)["summary"]
+
+    assert result["source"] == "fallback", result
+    assert result["text"] == "fallback", result
+    assert result["error"].startswith("TimeoutError"), result
+
+
+def check_rate_limit_pause():
+    """
+    A 429's Retry-After pauses the shared RateLimiter, so the next task waits
+    instead of hitting the server, and every task still gets its reply.
+    """
+    limiter = RateLimiter()
+    with MockLLMServer(latency=0.0, jitter=0.0, requests_per_second=2) as server:
+        client = _UrllibClient(server.base_url)
+        tasks = [LLMTask(f"section_{i}", f"prompt {i}", client) for i in range(4)]
+        results = run_llm_tasks(tasks, retries=3, backoff=0.05, concurrency=1, rate_limiter=limiter)
+        counts = dict(server.counts)
+
+    assert counts["rate_limited"] > 0, counts
+    assert limiter.waits > 0, (limiter.waits, counts)
+    assert all(result["source"] == "ai" for result in results.values()), results
+
+
+def check_stream_cached_after_completion():
+    """
+    A streamed reply is stored only once the stream completes, and a stream
+    that fails part-way stores nothing.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, "responses.sqlite3"))
+        client = CachedLLMClient(StubLLMClient(), cache)
+        key = client.key_for("prompt")
+        mid_stream = []
+
+        task = LLMTask("summary", "prompt", client)
+        result = run_llm_tasks([task], on_chunk=lambda name, chunk: mid_stream.append(cache.get(key)))["summary"]
+        assert result["source"] == "ai", result
+        assert mid_stream and all(entry is None for entry in mid_stream), mid_stream
+        assert cache.get(key)["response"] == result["text"]
+
+        again = run_llm_tasks([task], on_chunk=lambda name, chunk: None)["summary"]
+        assert again["source"] == "cache", again
+
+        broken = CachedLLMClient(_BrokenStreamClient(), cache)
+        result = run_llm_tasks([LLMTask("summary", "other prompt", broken, fallback="fallback")], retries=0, on_chunk=lambda name, chunk: None)["summary"]
+        assert result["source"] == "fallback", result
+        assert cache.get(broken.key_for("other prompt")) is None
+
+
+CHECKS = [
+    check_empty_reply_retry,
+    check_timeout_fallback,
+    check_rate_limit_pause,
+    check_stream_cached_after_completion,
+]
+
+
+def main(argv=None) -> int:
+    failures = 0
+    for check in CHECKS:
+        try:
+            check()
+        except Exception as exc:
+            failures += 1
+            print(f"FAIL: {check.__name__}: {type(exc).__name__}: {exc}")
+        else:
+            print(f"ok: {check.__name__}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Mock LLM Server
+Local OpenAI-compatible chat completions endpoint with simulated latency and 429 rate limiting
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_WORDS = (
+    "the organization reported emissions energy renewable share audit readiness "
+    "controls data quality maturity scope disclosure governance strategy targets"
+).split()
+
+
+def mock_reply(prompt: str, words: int = 80) -> str:
+    """
+    Deterministic text for a prompt (same prompt, same reply).
+    """
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.mock.record("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        mock = self.server.mock
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+
+        mock.record("requests")
+        retry_after = mock.admit()
+        if retry_after is not None:
+            mock.record("rate_limited")
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                {"Retry-After": f"{retry_after:.3f}", "retry-after-ms": str(int(retry_after * 1e3))},
+            )
+            return
+
+        time.sleep(mock.sample_latency())
+        prompt = "\n".join(message.get("content", "") for message in request.get("messages", []))
+        reply = mock_reply(prompt, mock.reply_words)
+        model = request.get("model", "mock")
+
+        if request.get("stream"):
+            self._stream(reply, model)
+        else:
+            self._send_json(200, {
+                "id": f"chatcmpl-mock-{mock.counts['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": len(prompt) // 4 + 1,
+                    "completion_tokens": len(reply) // 4 + 1,
+                    "total_tokens": (len(prompt) + len(reply)) // 4 + 2,
+                },
+            })
+        mock.record("completed")
+
+    def _stream(self, reply: str, model: str):
+        # Server-sent events; the connection is closed to end the body
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        for token in reply.split(" "):
+            event = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token + " "}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            time.sleep(self.server.mock.token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+class MockLLMServer:
+    """
+    Serves /v1/chat/completions on localhost in a background thread.
+
+    Each request sleeps `latency` ± `jitter` seconds. Beyond
+    `requests_per_second` (sliding one-second window) requests get a 429
+    with Retry-After, and a further `rate_limit_probability` of requests are
+    rejected at random. `counts` tracks connections opened, requests,
+    429s and completed replies.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        jitter: float = 0.05,
+        requests_per_second: float = None,
+        rate_limit_probability: float = 0.0,
+        reply_words: int = 80,
+        token_delay: float = 0.0,
+        seed: int = 0,
+        port: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.requests_per_second = requests_per_second
+        self.rate_limit_probability = rate_limit_probability
+        self.reply_words = reply_words
+        self.token_delay = token_delay
+        self.counts = {"connections": 0, "requests": 0, "rate_limited": 0, "completed": 0}
+        self._rng = random.Random(seed)
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def record(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def sample_latency(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def admit(self):
+        """
+        None when the request may proceed, else the Retry-After in seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.rate_limit_probability and self._rng.random() < self.rate_limit_probability:
+                return 0.2
+            if not self.requests_per_second:
+                return None
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.requests_per_second:
+                return max(0.01, 1.0 - (now - self._recent[0]))
+            self._recent.append(now)
+            return None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible mock endpoint.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--rps", type=float, default=None, help="requests per second before 429s")
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server = MockLLMServer(args.latency, args.jitter, args.rps, args.rate_limit_probability, port=args.port).start()
+    print(f"mock LLM endpoint: {server.base_url}  (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
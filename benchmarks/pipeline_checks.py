@@ -0,0 +1,238 @@
+"""
+Pipeline Checks
+Small end-to-end checks of input shapes the pipeline must handle and of results that must match between code paths; exits 1 on failure
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from audit.audit_score import calculate_audit_readiness_score
+from audit.csrd_maturity import calculate_csrd_maturity
+from audit.portfolio import BREAKDOWN_COLUMNS, score_portfolio
+from benchmarks.synthetic import synthetic_esg_data, synthetic_ledger, synthetic_portfolio
+from esg.emission_factors import EmissionFactorTable
+from esg.emissions import aggregate_kpis, calculate_emissions, stream_kpis
+from esg.ingestion import load_esg_data
+from esg.scope3 import estimate_scope3_emissions, unresolved_spend_lines
+from esg.scope3_factors import RESOLUTION_UNRESOLVED, load_scope3_catalogue
+from esg.scope3_ledger import stream_ledger_emissions
+from quality.anomaly import FacilityAnomalyDetector
+from quality.data_quality import assess_data_quality, assess_data_quality_batches
+from quality.profile import profile_batches, profile_frame
+
+
+def _factor_table() -> EmissionFactorTable:
+    # Two diesel versions, so "latest" is distinguishable from "first"
+    return EmissionFactorTable(pd.DataFrame({
+        "region": ["DEFAULT", "DEFAULT", "DEFAULT", "DEFAULT"],
+        "source": ["diesel", "diesel", "petrol", "grid"],
+        "valid_from": ["2000-01-01", "2020-01-01", "2000-01-01", "2000-01-01"],
+        "factor": [2.0, 2.5, 2.2, 0.4],
+    }))
+
+
+def check_fuel_type_only():
+    """
+    A fuel_type column without region or date: each row takes its fuel's
+    latest DEFAULT factor, a missing fuel falls back to diesel.
+    """
+    factors = _factor_table()
+    df = pd.DataFrame({
+        "facility": ["A", "B", "C"],
+        "energy_kwh": [10.0, 10.0, 10.0],
+        "renewable_kwh": [0.0, 0.0, 0.0],
+        "fuel_liters": [1.0, 1.0, 1.0],
+        "fuel_type": ["diesel", "petrol", None],
+    })
+    emissions = calculate_emissions(df, factors)
+
+    expected = [2.5, 2.2, 2.5]
+    assert np.allclose(emissions["scope_1_co2_kg"], expected), emissions["scope_1_co2_kg"].tolist()
+    assert np.allclose(emissions["scope_2_co2_kg"], 4.0), emissions["scope_2_co2_kg"].tolist()
+
+    records = factors.records.iloc[factors.lookup_records(df["fuel_type"])]
+    assert records["factor"].tolist() == expected, records["factor"].tolist()
+
+
+def check_unknown_factor_raises():
+    """
+    An unknown fuel or a date before its source's first factor has no
+    factor; calculate_emissions must refuse it rather than return NaN that
+    the KPI sums would skip.
+    """
+    factors = _factor_table()
+    df = pd.DataFrame({
+        "facility": ["A", "B"],
+        "energy_kwh": [10.0, 10.0],
+        "renewable_kwh": [0.0, 0.0],
+        "fuel_liters": [1.0, 1.0],
+        "fuel_type": ["diesel", "diesel"],
+        "date": ["2021-06-01", "2021-06-01"],
+    })
+    assert np.allclose(calculate_emissions(df, factors)["scope_1_co2_kg"], 2.5)
+
+    for bad in (df.assign(fuel_type=["diesel", "lpg"]), df.assign(date=["2021-06-01", "1999-06-01"])):
+        try:
+            calculate_emissions(bad, factors)
+        except ValueError as exc:
+            assert "1 rows have no emission factor" in str(exc), exc
+        else:
+            raise AssertionError("a row without an emission factor was accepted")
+
+
+def check_detector_carries_state():
+    """
+    A detector passed to assess_data_quality keeps each facility's history,
+    so a second batch is scored against the first.
+    """
+    frames = [
+        pd.DataFrame({
+            "facility": ["A"] * 20 + ["B"] * 20,
+            "energy_kwh": np.full(40, 100.0) + np.arange(40) % 3,
+            "renewable_kwh": np.full(40, 10.0),
+            "fuel_liters": np.full(40, 5.0),
+        })
+        for _ in range(2)
+    ]
+    detector = FacilityAnomalyDetector()
+
+    assess_data_quality(calculate_emissions(frames[0]), detector=detector)
+    assert len(detector) == 2, len(detector)
+    first = detector.summary()["energy_kwh"]["readings"]
+
+    assess_data_quality(calculate_emissions(frames[1]), detector=detector)
+    assert len(detector) == 2, len(detector)
+    readings = detector.summary()["energy_kwh"]["readings"]
+    assert (first, readings) == (40, 80), (first, readings)
+
+
+def check_portfolio_matches_scalar():
+    """
+    score_portfolio gives every entity exactly the KPIs, breakdown, score
+    and maturity of the scalar functions run on that entity alone.
+    """
+    df = synthetic_portfolio(100 * 365, entities=100)
+    portfolio = score_portfolio(df, year=2024, scope3_present=True)
+
+    mismatches = []
+    for entity, rows in df.groupby("entity"):
+        emissions = calculate_emissions(rows.drop(columns="entity"))
+        kpis = aggregate_kpis(emissions)
+        audit = calculate_audit_readiness_score(emissions, kpis)
+        maturity = calculate_csrd_maturity(2024, audit["total_score"], True)
+
+        row = portfolio.loc[entity]
+        expected = {
+            **kpis,
+            **{area: audit["breakdown"][area] for area in BREAKDOWN_COLUMNS},
+            "total_score": audit["total_score"],
+            "maturity_level": maturity["maturity_level"],
+        }
+        mismatches += [(entity, key, row[key], value) for key, value in expected.items() if row[key] != value]
+
+    assert len(portfolio) == 100, len(portfolio)
+    assert not mismatches, mismatches[:5]
+
+
+def check_stream_kpis_match_full_pass():
+    """
+    stream_kpis gives the same KPI dict as aggregate_kpis over the whole
+    file, for CSV and Parquet and for chunks that do not line up with the
+    summation blocks.
+    """
+    df = synthetic_esg_data(200_000, seed=2).drop(columns="meter")
+    writers = {
+        "esg.csv": lambda path: df.to_csv(path, index=False),
+        "esg.parquet": lambda path: df.to_parquet(path, index=False),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, write in writers.items():
+            path = os.path.join(tmp, name)
+            write(path)
+            expected = aggregate_kpis(calculate_emissions(load_esg_data(path)))
+            for chunksize in (7_000, 50_000, 250_000):
+                streamed = stream_kpis(path, chunksize)
+                assert streamed == expected, (name, chunksize, streamed, expected)
+
+
+def check_batched_quality_matches_single_pass():
+    """
+    Merged per-chunk profiles equal a single-pass profile, and
+    assess_data_quality_batches reports the same missing-data and range
+    issues and null-driven flags as assess_data_quality. One batch gives
+    exactly the single-frame result, outliers included.
+    """
+    emissions = calculate_emissions(synthetic_esg_data(150_000, seed=5))
+    emissions.loc[emissions.index[::997], "total_co2_kg"] *= -1
+    chunks = [emissions.iloc[start:start + 40_000] for start in range(0, len(emissions), 40_000)]
+
+    assert profile_batches(chunks) == profile_frame(emissions)
+
+    single = assess_data_quality(emissions)
+    batched = assess_data_quality_batches(chunks)
+
+    def profile_issues(result):
+        return [issue for issue in result["issues"] if issue["Type"] != "Consistency Warning"]
+
+    assert profile_issues(batched) == profile_issues(single), (batched["issues"], single["issues"])
+    assert len(profile_issues(single)) == 2, single["issues"]
+    for metric, flag in single["quality_flags"].items():
+        if flag in ("Assumed", "Estimated"):
+            assert batched["quality_flags"][metric] == flag, (metric, batched["quality_flags"])
+
+    whole = assess_data_quality_batches([emissions])
+    assert whole["issues"] == single["issues"] and whole["quality_flags"] == single["quality_flags"]
+    assert whole["outliers"].equals(single["outliers"])
+
+
+def check_unresolved_ledger_lines():
+    """
+    The unresolved count of a ledger estimate is its invoice lines without
+    a factor, not its supplier × category rows, and matches the count for
+    the same lines given as pre-summarized spend.
+    """
+    ledger = synthetic_ledger(20_000)
+    resolution = load_scope3_catalogue().resolve(ledger["category"])["factor_resolution"]
+    expected = int((resolution == RESOLUTION_UNRESOLVED).sum())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ledger.parquet")
+        ledger.to_parquet(path, index=False)
+        result = stream_ledger_emissions(path)
+
+    spend = pd.DataFrame({"category": ledger["category"], "annual_spend_eur": ledger["amount"]})
+    assert expected > 0
+    assert unresolved_spend_lines(result) == expected, (unresolved_spend_lines(result), expected)
+    assert unresolved_spend_lines(estimate_scope3_emissions(spend)) == expected
+
+
+CHECKS = [
+    check_fuel_type_only,
+    check_unknown_factor_raises,
+    check_detector_carries_state,
+    check_portfolio_matches_scalar,
+    check_stream_kpis_match_full_pass,
+    check_batched_quality_matches_single_pass,
+    check_unresolved_ledger_lines,
+]
+
+
+def main(argv=None) -> int:
+    failures = 0
+    for check in CHECKS:
+        try:
+            check()
+        except Exception as exc:
+            failures += 1
+            print(f"FAIL: {check.__name__}: {type(exc).__name__}: {exc}")
+        else:
+            print(f"ok: {check.__name__}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
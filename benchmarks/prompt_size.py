@@ -0,0 +1,113 @@
+"""
+Prompt Size Benchmark
+Prompt characters and tokens with the compact context versus the previous str(dict) contexts
+"""
+
+import argparse
+import json
+import sys
+
+from ai.audit_risk_explainer import build_audit_prompt, build_audit_risk_context
+from ai.context import count_tokens, serialize_context
+from ai.esg_narrative_copilot import (
+    NARRATIVE_SECTIONS,
+    build_esg_context,
+    build_narrative_prompt,
+    build_section_prompt,
+)
+from benchmarks.synthetic import DEFAULT_SEED, synthetic_esg_data
+from audit.audit_score import calculate_audit_readiness_score
+from audit.csrd_maturity import calculate_csrd_maturity
+from esg.emissions import aggregate_kpis, calculate_emissions
+from quality.data_quality import assess_data_quality
+
+
+def _standard_inputs(seed: int) -> dict:
+    emissions = calculate_emissions(synthetic_esg_data(1_000, seed))
+    kpis = aggregate_kpis(emissions)
+    audit = calculate_audit_readiness_score(emissions, kpis)
+    return {
+        "kpis": kpis,
+        "audit": audit,
+        "maturity": calculate_csrd_maturity(2024, audit["total_score"], True),
+        "quality": assess_data_quality(emissions),
+    }
+
+
+def legacy_contexts(inputs: dict) -> dict:
+    """
+    The context shapes the prompts embedded with str() before ai.context.
+    """
+    return {
+        "narrative": {
+            "kpis": inputs["kpis"],
+            "audit_score": inputs["audit"]["total_score"],
+            "audit_breakdown": inputs["audit"]["breakdown"],
+            "maturity": inputs["maturity"],
+            "data_quality": inputs["quality"]["quality_flags"],
+        },
+        "audit": {
+            "audit_score": inputs["audit"]["total_score"],
+            "audit_breakdown": inputs["audit"]["breakdown"],
+            "data_quality_flags": inputs["quality"]["quality_flags"],
+            "csrd_maturity": inputs["maturity"],
+        },
+    }
+
+
+def _sizes(text: str) -> dict:
+    return {"chars": len(text), "tokens": count_tokens(text)}
+
+
+def compare(inputs: dict) -> dict:
+    legacy = legacy_contexts(inputs)
+    narrative = build_esg_context(inputs["kpis"], inputs["audit"], inputs["maturity"], inputs["quality"])
+    audit = build_audit_risk_context(inputs["audit"], inputs["quality"], inputs["maturity"])
+
+    # Prompt templates are unchanged apart from the DATA block, so the
+    # legacy prompt is the current one with the old str(dict) spliced in
+    def legacy_prompt(prompt: str, context, old_context) -> str:
+        return prompt.replace(serialize_context(context), str(old_context))
+
+    prompts = {
+        "context": (str(legacy["narrative"]), serialize_context(narrative)),
+        "narrative": (legacy_prompt(build_narrative_prompt(narrative), narrative, legacy["narrative"]), build_narrative_prompt(narrative)),
+        "audit": (legacy_prompt(build_audit_prompt(audit), audit, legacy["audit"]), build_audit_prompt(audit)),
+    }
+    for section in NARRATIVE_SECTIONS:
+        prompt = build_section_prompt(narrative, section)
+        prompts[f"section:{section}"] = (legacy_prompt(prompt, narrative, legacy["narrative"]), prompt)
+
+    rows = {}
+    for name, (old, new) in prompts.items():
+        before, after = _sizes(old), _sizes(new)
+        rows[name] = {
+            "before": before,
+            "after": after,
+            "token_reduction": 1 - after["tokens"] / before["tokens"],
+        }
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare prompt sizes with the compact context against the previous format.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="Write the results JSON here")
+    args = parser.parse_args(argv)
+
+    rows = compare(_standard_inputs(args.seed))
+    for name, row in rows.items():
+        print(
+            f"{name:22} {row['before']['tokens']:5d} -> {row['after']['tokens']:5d} tokens  "
+            f"{row['before']['chars']:6d} -> {row['after']['chars']:6d} chars  "
+            f"(-{row['token_reduction']:.0%})"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
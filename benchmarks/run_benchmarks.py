@@ -0,0 +1,315 @@
+"""
+ESG Pipeline Benchmarks
+Wall time, CPU time and peak memory of every reporting stage on synthetic data, with baseline comparison
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from ai.esg_narrative_copilot import build_esg_context
+from audit.audit_score import calculate_audit_readiness_score
+from audit.portfolio import score_portfolio
+from audit.csrd_maturity import calculate_csrd_maturity
+from benchmarks.synthetic import (
+    DEFAULT_SEED,
+    synthetic_esg_data,
+    synthetic_ledger,
+    synthetic_portfolio,
+    synthetic_scope3_spend,
+)
+from esg.compact import compact_frame
+from esg.emissions import aggregate_kpis, calculate_emissions, stream_kpis
+from esg.scope3 import estimate_scope3_emissions
+from esg.scope3_ledger import stream_ledger_emissions
+from pipeline.instrumentation import Tracer
+from quality.data_quality import assess_data_quality
+from reports.csrd_gap_analysis import generate_csrd_gap_pdf
+from reports.narrative_builder import generate_esg_narrative
+from reports.pdf_report import generate_esg_pdf
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+# A stage is a regression when it is this much slower / larger than the baseline...
+DEFAULT_TOLERANCE = 0.25
+
+# ...and by more than this, so sub-millisecond stages cannot fail on noise
+MIN_REGRESSION_MS = 2.0
+MIN_REGRESSION_KB = 256.0
+
+# Stages whose cost does not depend on the input size run once per benchmark
+FIXED_SIZE = "fixed"
+
+
+# -----------------------------
+# Stages
+# -----------------------------
+def _esg_inputs(rows, seed):
+    df = synthetic_esg_data(rows, seed)
+    emissions = calculate_emissions(df)
+    kpis = aggregate_kpis(emissions)
+    audit = calculate_audit_readiness_score(emissions, kpis)
+    return {"df": df, "emissions": emissions, "kpis": kpis, "audit": audit}
+
+
+def _report_inputs(rows, seed):
+    inputs = _esg_inputs(1_000, seed)
+    inputs["maturity"] = calculate_csrd_maturity(2024, inputs["audit"]["total_score"], True)
+    inputs["quality"] = assess_data_quality(inputs["emissions"])
+    return inputs
+
+
+def _ledger_inputs(rows, seed):
+    # The directory is removed once the inputs are dropped
+    directory = tempfile.TemporaryDirectory(prefix="esg_bench_")
+    path = os.path.join(directory.name, "ledger.parquet")
+    synthetic_ledger(rows, seed).to_parquet(path, index=False)
+    return {"path": path, "directory": directory}
+
+
+def _esg_file_inputs(rows, seed):
+    directory = tempfile.TemporaryDirectory(prefix="esg_bench_")
+    path = os.path.join(directory.name, "esg.parquet")
+    synthetic_esg_data(rows, seed).to_parquet(path, index=False)
+    return {"path": path, "directory": directory}
+
+
+# name -> (input builder, stage call, scales with rows)
+STAGES = {
+    "calculate_emissions": (_esg_inputs, lambda x: calculate_emissions(x["df"]), True),
+    "aggregate_kpis": (_esg_inputs, lambda x: aggregate_kpis(x["emissions"]), True),
+    "stream_kpis": (_esg_file_inputs, lambda x: stream_kpis(x["path"]), True),
+    "assess_data_quality": (_esg_inputs, lambda x: assess_data_quality(x["emissions"]), True),
+    "compact_frame": (_esg_inputs, lambda x: compact_frame(x["emissions"], x["kpis"]), True),
+    "calculate_audit_readiness_score": (
+        _esg_inputs, lambda x: calculate_audit_readiness_score(x["emissions"], x["kpis"]), True
+    ),
+    "score_portfolio": (
+        lambda rows, seed: {"df": synthetic_portfolio(rows, seed=seed)},
+        lambda x: score_portfolio(x["df"], year=2024),
+        True,
+    ),
+    "estimate_scope3_emissions": (
+        lambda rows, seed: {"spend": synthetic_scope3_spend(rows, seed)},
+        lambda x: estimate_scope3_emissions(x["spend"]),
+        True,
+    ),
+    "stream_ledger_emissions": (_ledger_inputs, lambda x: stream_ledger_emissions(x["path"]), True),
+    "generate_esg_pdf": (_report_inputs, lambda x: generate_esg_pdf(x["kpis"]), False),
+    "generate_csrd_gap_pdf": (
+        _report_inputs, lambda x: generate_csrd_gap_pdf(x["kpis"], x["audit"]["total_score"]), False
+    ),
+    "generate_esg_narrative": (
+        _report_inputs,
+        lambda x: generate_esg_narrative(x["kpis"], x["audit"]["total_score"], x["maturity"]),
+        False,
+    ),
+    "build_esg_context": (
+        _report_inputs, lambda x: build_esg_context(x["kpis"], x["audit"], x["maturity"], x["quality"]), False
+    ),
+}
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+def measure(name: str, call, repeats: int, memory: bool = True) -> dict:
+    """
+    Times `repeats` untraced calls, then makes one more call under a
+    tracemalloc span for peak memory (tracing slows allocation, so it is
+    never part of the timed calls).
+    """
+    wall, cpu = [], []
+    for _ in range(repeats):
+        cpu_start, start = time.process_time(), time.perf_counter()
+        call()
+        wall.append((time.perf_counter() - start) * 1e3)
+        cpu.append((time.process_time() - cpu_start) * 1e3)
+
+    result = {
+        "wall_ms": statistics.median(wall),
+        "min_wall_ms": min(wall),
+        "cpu_ms": statistics.median(cpu),
+        "repeats": repeats,
+        "peak_mem_kb": None,
+    }
+
+    if memory:
+        tracer = Tracer()
+        tracer.enable()
+        try:
+            with tracer.span(name):
+                call()
+        finally:
+            tracer.disable()
+        result["peak_mem_kb"] = tracer.spans()[-1]["peak_mem_delta_kb"]
+
+    return result
+
+
+def _repeats_for(rows: int, repeats: int = None) -> int:
+    if repeats:
+        return repeats
+    return 5 if rows <= 100_000 else 3 if rows <= 1_000_000 else 1
+
+
+def run_benchmarks(
+    sizes=None,
+    stages=None,
+    seed: int = DEFAULT_SEED,
+    repeats: int = None,
+    memory: bool = True,
+    log=print,
+) -> dict:
+    """
+    Runs every stage at every size. Inputs are generated once per
+    (builder, size) and are not part of the measurement.
+
+    Returns:
+        dict: { "meta": {...}, "results": [{ "stage", "rows", "wall_ms", ... }] }
+    """
+    sizes = sorted(sizes or DEFAULT_SIZES)
+    stages = stages or list(STAGES)
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown benchmark stage(s): {', '.join(unknown)}")
+
+    results = []
+    for rows in sizes:
+        inputs = {}
+        for stage in stages:
+            build, call, scales = STAGES[stage]
+            if not scales and rows != sizes[0]:
+                continue
+
+            if build not in inputs:
+                inputs[build] = build(rows, seed)
+            x = inputs[build]
+            measured = measure(stage, lambda: call(x), _repeats_for(rows if scales else 0, repeats), memory)
+
+            result = {"stage": stage, "rows": rows if scales else FIXED_SIZE, **measured}
+            if scales and measured["wall_ms"] > 0:
+                result["rows_per_s"] = rows / measured["wall_ms"] * 1e3
+            results.append(result)
+            log(_format_result(result))
+
+    return {"meta": environment(seed), "results": results}
+
+
+def environment(seed: int) -> dict:
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "seed": seed,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _format_result(result: dict) -> str:
+    memory = f"{result['peak_mem_kb'] / 1024:9.1f} MB" if result["peak_mem_kb"] is not None else "        -"
+    rows = f"{result['rows']:,}" if result["rows"] != FIXED_SIZE else FIXED_SIZE
+    return f"{result['stage']:<34}{rows:>12}{result['wall_ms']:12.2f} ms{memory}"
+
+
+# -----------------------------
+# Baseline comparison
+# -----------------------------
+def _key(result: dict) -> tuple:
+    return result["stage"], str(result["rows"])
+
+
+def compare_to_baseline(current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """
+    One entry per (stage, rows) present in both runs with the time and memory
+    ratios against the baseline, and whether either counts as a regression.
+    """
+    base = {_key(result): result for result in baseline["results"]}
+    comparison = []
+
+    for result in current["results"]:
+        before = base.get(_key(result))
+        if before is None:
+            continue
+
+        entry = {"stage": result["stage"], "rows": result["rows"], "regressions": []}
+        checks = [
+            ("wall_ms", MIN_REGRESSION_MS),
+            ("peak_mem_kb", MIN_REGRESSION_KB),
+        ]
+        for metric, floor in checks:
+            now, then = result.get(metric), before.get(metric)
+            if now is None or then is None:
+                continue
+            entry[f"{metric}_ratio"] = now / then if then else None
+            if now > then * (1 + tolerance) and now - then > floor:
+                entry["regressions"].append(metric)
+        comparison.append(entry)
+
+    return comparison
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+
+# -----------------------------
+# Command line
+# -----------------------------
+def _sizes(text: str) -> list:
+    return [int(float(size)) for size in text.split(",") if size]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ESG pipeline stages on synthetic data.")
+    parser.add_argument("--sizes", type=_sizes, default=DEFAULT_SIZES, help="Comma-separated row counts, e.g. 1e3,1e5,1e6")
+    parser.add_argument("--stages", help="Comma-separated stage names (default: all)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeats", type=int, help="Timed calls per stage (default: by size)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced peak-memory call")
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--baseline", help="Compare against this results JSON; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        sizes=args.sizes,
+        stages=args.stages.split(",") if args.stages else None,
+        seed=args.seed,
+        repeats=args.repeats,
+        memory=not args.no_memory,
+    )
+    if args.output:
+        save_results(results, args.output)
+
+    if not args.baseline:
+        return 0
+
+    comparison = compare_to_baseline(results, load_results(args.baseline), args.tolerance)
+    regressions = [entry for entry in comparison if entry["regressions"]]
+    for entry in regressions:
+        ratios = ", ".join(f"{metric} x{entry[f'{metric}_ratio']:.2f}" for metric in entry["regressions"])
+        print(f"REGRESSION {entry['stage']} @ {entry['rows']}: {ratios}")
+    print(f"{len(comparison)} stage(s) compared, {len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Synthetic ESG Data
+Deterministic facility × day × meter readings and Scope 3 ledgers at any scale
+"""
+
+import argparse
+import math
+
+import numpy as np
+import pandas as pd
+
+from esg.scope3_factors import EMISSION_FACTORS
+from esg.scope3_ledger import FX_TABLE_PATH
+
+DEFAULT_SEED = 42
+DEFAULT_DAYS = 365
+DEFAULT_START = "2024-01-01"
+
+REGIONS = ["DEFAULT", "DE", "FR", "PL", "US"]
+FUEL_TYPES = ["diesel"]
+
+# Share of readings left empty and of readings in the wrong unit (1000x),
+# so quality checks and anomaly detection have something to find
+MISSING_RATE = 0.001
+UNIT_ERROR_RATE = 0.0005
+
+# Ledger categories: catalogue codes, a display-name variant and one the
+# catalogue cannot resolve
+LEDGER_CATEGORIES = list(EMISSION_FACTORS) + ["Logistics", "business_travel"]
+
+
+# Share of ledger suppliers invoicing in EUR; the rest use the other
+# currencies of the FX table, so lines need the dated rate lookup
+LEDGER_EUR_SHARE = 0.5
+
+
+def _fx_calendar():
+    """
+    (currencies, first date every currency has a rate for, last valid_from)
+    of the FX table, and each currency's latest rate.
+    """
+    records = pd.read_csv(FX_TABLE_PATH, parse_dates=["valid_from"]).sort_values("valid_from")
+    first = records.groupby("currency")["valid_from"].min().max()
+    latest = records.groupby("currency")["rate_to_eur"].last()
+    return list(latest.index), first, records["valid_from"].max(), latest
+
+
+def _labels(prefix: str, count: int) -> list:
+    width = len(str(max(count - 1, 1)))
+    return [f"{prefix} {i:0{width}d}" for i in range(count)]
+
+
+def _strings(codes: np.ndarray, labels: list) -> pd.Series:
+    return pd.Series(np.array(labels, dtype=object)[codes]).astype("string")
+
+
+def _dates(start: str, days: np.ndarray) -> np.ndarray:
+    return (np.datetime64(start, "D") + days).astype("datetime64[ns]")
+
+
+def grid_shape(rows: int, days: int = DEFAULT_DAYS, meters: int = 1) -> tuple:
+    """
+    (facilities, days, meters) whose product covers `rows`; the generated
+    frame is cut to exactly `rows` readings.
+    """
+    days = max(1, min(days, math.ceil(rows / meters)))
+    return max(1, math.ceil(rows / (days * meters))), days, meters
+
+
+def synthetic_esg_data(
+    rows: int,
+    seed: int = DEFAULT_SEED,
+    days: int = DEFAULT_DAYS,
+    meters: int = 1,
+    start: str = DEFAULT_START,
+) -> pd.DataFrame:
+    """
+    `rows` daily readings ordered by facility, day and meter, in the columns
+    load_esg_data returns plus `meter`. The same arguments always give the
+    same frame.
+
+    Each facility has its own energy level, renewable share, fuel use and
+    region; readings follow a yearly season with lognormal noise. With more
+    than one meter, several readings share a facility and date.
+    """
+    rng = np.random.default_rng(seed)
+    n_facilities, days, meters = grid_shape(rows, days, meters)
+
+    i = np.arange(rows, dtype="int64")
+    facility = i // (days * meters)
+    day = (i // meters) % days
+    meter = (i % meters).astype("int16")
+
+    base_energy = rng.lognormal(np.log(10_000), 0.6, n_facilities) / meters
+    renewable_share = rng.uniform(0.0, 0.6, n_facilities)
+    base_fuel = rng.lognormal(np.log(400), 0.5, n_facilities) / meters
+    region = rng.integers(0, len(REGIONS), n_facilities)
+
+    season = 1 + 0.2 * np.cos(2 * np.pi * day / 365)
+    energy = base_energy[facility] * season * rng.lognormal(0, 0.1, rows)
+    renewable = energy * np.clip(renewable_share[facility] * rng.lognormal(0, 0.1, rows), 0, 1)
+    fuel = base_fuel[facility] * (2 - season) * rng.lognormal(0, 0.15, rows)
+
+    energy[rng.random(rows) < UNIT_ERROR_RATE] *= 1000
+    for values in (energy, renewable, fuel):
+        values[rng.random(rows) < MISSING_RATE] = np.nan
+
+    return pd.DataFrame(
+        {
+            "date": _dates(start, day),
+            "facility": _strings(facility, _labels("Facility", n_facilities)),
+            "meter": meter,
+            "region": _strings(region[facility], REGIONS),
+            "fuel_type": _strings(np.zeros(rows, dtype="int8"), FUEL_TYPES),
+            "energy_kwh": energy.round(1),
+            "renewable_kwh": renewable.round(1),
+            "fuel_liters": fuel.round(1),
+        }
+    )
+
+
+def synthetic_portfolio(rows: int, entities: int = 100, seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """
+    synthetic_esg_data plus an `entity` key, the input of
+    audit.portfolio.score_portfolio. Facilities are dealt to the entities in
+    turn, so every entity has whole facilities.
+    """
+    df = synthetic_esg_data(rows, seed)
+    facility = pd.factorize(df["facility"])[0]
+    df["entity"] = _strings(facility % entities, _labels("Entity", entities))
+    return df
+
+
+def synthetic_ledger(
+    rows: int,
+    seed: int = DEFAULT_SEED,
+    suppliers: int = None,
+    start: str = None,
+) -> pd.DataFrame:
+    """
+    `rows` accounts-payable lines (supplier, category, amount, currency, date)
+    for stream_ledger_emissions. Each supplier sells one category and
+    invoices in one currency: EUR for LEDGER_EUR_SHARE of them, any other
+    currency of the FX table for the rest, with amounts in that currency.
+
+    Dates run from `start` (default: the first date every currency has a
+    rate for) to a year past the table's last valid_from, so lines fall on
+    both sides of every rate change.
+    """
+    rng = np.random.default_rng(seed + 1)
+    suppliers = suppliers or max(10, rows // 1000)
+
+    currencies, first, last, latest = _fx_calendar()
+    start = pd.Timestamp(start) if start else first
+    days = max(1, (last - start).days + 365)
+    others = [currency for currency in currencies if currency != "EUR"]
+
+    supplier = rng.integers(0, suppliers, rows)
+    supplier_category = rng.integers(0, len(LEDGER_CATEGORIES), suppliers)
+    labels = ["EUR"] + others
+    supplier_currency = np.where(
+        rng.random(suppliers) < LEDGER_EUR_SHARE, 0, rng.integers(1, len(labels), suppliers)
+    )
+    currency = supplier_currency[supplier]
+    rate = latest.reindex(labels).to_numpy()[currency]
+
+    return pd.DataFrame(
+        {
+            "supplier": _strings(supplier, _labels("Supplier", suppliers)),
+            "category": _strings(supplier_category[supplier], LEDGER_CATEGORIES),
+            "amount": (rng.lognormal(np.log(2_000), 1.0, rows) / rate).round(2),
+            "currency": _strings(currency, labels),
+            "date": _dates(start.strftime("%Y-%m-%d"), rng.integers(0, days, rows)),
+        }
+    )
+
+
+def synthetic_scope3_spend(rows: int, seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """
+    The ledger lines as pre-summarized spend (category, annual_spend_eur),
+    the input of estimate_scope3_emissions.
+    """
+    ledger = synthetic_ledger(rows, seed)
+    return pd.DataFrame({"category": ledger["category"], "annual_spend_eur": ledger["amount"]})
+
+
+# -----------------------------
+# Command line
+# -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic ESG dataset or Scope 3 ledger.")
+    parser.add_argument("output", help="Target file (.csv, .parquet or .arrow)")
+    parser.add_argument("--rows", type=float, default=100_000)
+    parser.add_argument("--kind", choices=["esg", "ledger"], default="esg")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    parser.add_argument("--meters", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+
+    rows = int(args.rows)
+    if args.kind == "esg":
+        df = synthetic_esg_data(rows, args.seed, args.days, args.meters)
+    else:
+        df = synthetic_ledger(rows, args.seed)
+
+    if args.output.endswith((".parquet", ".pq")):
+        df.to_parquet(args.output, index=False)
+    elif args.output.endswith((".arrow", ".feather", ".ipc")):
+        df.to_feather(args.output)
+    else:
+        df.to_csv(args.output, index=False)
+    print(f"Wrote {len(df):,} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
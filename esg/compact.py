@@ -0,0 +1,141 @@
+"""
+Compact Frame Representation
+Categorical keys and downcast measurements for frames held in memory across reruns
+"""
+
+import numpy as np
+import pandas as pd
+
+from esg.emissions import KPI_SUM_COLUMNS, column_total, kpis_from_totals
+
+# Repeated labels stored once, with one small integer code per row
+CATEGORY_COLUMNS = ["facility", "region", "fuel_type", "category", "supplier", "currency", "factor_code"]
+
+# Measurements that may be stored as int32 / float32
+MEASUREMENT_COLUMNS = [
+    "energy_kwh",
+    "renewable_kwh",
+    "fuel_liters",
+    "scope_1_co2_kg",
+    "scope_2_co2_kg",
+    "total_co2_kg",
+    "annual_spend_eur",
+    "amount",
+    "scope3_co2_kg",
+]
+
+# Columns whose total is reported as a KPI of its own, rounded to this many
+# decimals (the Scope 3 total, see esg.scope3.aggregate_scope3_kpi); kept
+# float64 when a float32 copy would move it
+ROUNDED_TOTAL_COLUMNS = {"scope3_co2_kg": ("Scope 3 CO₂ (kg)", 2)}
+
+# Labels are only made categorical when they repeat, i.e. when there are at
+# most this many distinct values per row
+MAX_CATEGORY_RATIO = 0.5
+
+_INT32 = np.iinfo("int32")
+
+
+def _categorical(series: pd.Series) -> pd.Series:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    if len(uniques) > MAX_CATEGORY_RATIO * max(len(series), 1):
+        return series
+    return pd.Series(pd.Categorical.from_codes(codes, uniques), index=series.index, name=series.name)
+
+
+def _integer(values: np.ndarray):
+    """
+    The values as int32 when they are all whole numbers in range, else None.
+    """
+    if not len(values) or np.isnan(values).any():
+        return None
+    if values.min() < _INT32.min or values.max() > _INT32.max or not np.array_equal(values, np.trunc(values)):
+        return None
+    return values.astype("int32")
+
+
+def compact_frame(df: pd.DataFrame, kpis: dict = None) -> pd.DataFrame:
+    """
+    A low-memory copy of `df` for keeping around (the input is not modified,
+    and unchanged columns are shared rather than copied):
+
+    - repeated labels (facility, region, fuel type, category, ...) become
+      categoricals
+    - dates given as text are parsed once to datetime64
+    - whole-number measurements become int32 (lossless)
+    - other measurements become float32 (about 7 significant digits)
+
+    KPI tolerance: a KPI column (see KPI_SUM_COLUMNS) is only downcast to
+    float32 when the KPIs derived from its sum, together with the columns
+    downcast before it, still round to exactly the same values as with the
+    full-precision columns, so re-aggregating the compact frame reproduces
+    the reported KPIs (check_kpi_rounding verifies this). Columns that would
+    move a rounded KPI stay float64. Pass the frame's KPIs as `kpis` to skip
+    recomputing them. The same holds for the rounded totals of
+    ROUNDED_TOTAL_COLUMNS.
+    """
+    result = df.copy(deep=False)
+
+    for col in CATEGORY_COLUMNS:
+        if col in result.columns:
+            result[col] = _categorical(result[col])
+
+    if "date" in result.columns and not pd.api.types.is_datetime64_any_dtype(result["date"]):
+        result["date"] = pd.to_datetime(result["date"], errors="coerce")
+
+    kpi_columns = [col for col in KPI_SUM_COLUMNS if col in result.columns]
+    totals = {col: column_total(result[col].to_numpy(dtype="float64", na_value=np.nan)) for col in kpi_columns}
+    if kpis is None and len(kpi_columns) == len(KPI_SUM_COLUMNS):
+        kpis = kpis_from_totals(totals)
+
+    for col in MEASUREMENT_COLUMNS:
+        if col not in result.columns or result[col].dtype != "float64":
+            continue
+        values = result[col].to_numpy()
+
+        integer = _integer(values)
+        if integer is not None:
+            result[col] = integer
+            continue
+
+        single = values.astype("float32")
+        if col in totals:
+            # Checked against the columns already downcast, since the
+            # renewable share depends on two of them
+            downcast = {**totals, col: column_total(single)}
+            if kpis is None or kpis_from_totals(downcast) != kpis:
+                continue
+            totals = downcast
+        if col in ROUNDED_TOTAL_COLUMNS:
+            _, digits = ROUNDED_TOTAL_COLUMNS[col]
+            if round(column_total(single), digits) != round(column_total(values), digits):
+                continue
+        result[col] = single
+
+    return result
+
+
+def check_kpi_rounding(df: pd.DataFrame, kpis: dict) -> dict:
+    """
+    The KPIs that re-aggregating `df` (e.g. a compact frame) does not
+    reproduce, as {kpi: (reported, recomputed)}. Checks the Scope 1/2 KPIs
+    when `df` has the KPI_SUM_COLUMNS, and the ROUNDED_TOTAL_COLUMNS totals
+    `kpis` reports. Empty when every KPI rounds to the reported value.
+    """
+    def total(col):
+        return column_total(df[col].to_numpy(dtype="float64", na_value=np.nan))
+
+    recomputed = {}
+    if all(col in df.columns for col in KPI_SUM_COLUMNS):
+        recomputed.update(kpis_from_totals({col: total(col) for col in KPI_SUM_COLUMNS}))
+    for col, (kpi, digits) in ROUNDED_TOTAL_COLUMNS.items():
+        if col in df.columns:
+            recomputed[kpi] = round(total(col), digits)
+
+    return {
+        kpi: (kpis[kpi], value)
+        for kpi, value in recomputed.items()
+        if kpi in kpis and value != kpis[kpi]
+    }
@@ -0,0 +1,212 @@
+"""
+Emission Factor Catalogue
+Region- and time-versioned emission factors applied through vectorized as-of lookups
+"""
+
+import hashlib
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_REGION = "DEFAULT"
+GRID_SOURCE = "grid"
+DEFAULT_FUEL = "diesel"
+
+FACTOR_TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "emission_factors.csv",
+)
+
+# Dates are resolved at day granularity; a missing date means "latest factor"
+_LATEST_DAY = np.iinfo(np.int32).max
+_DAY_OFFSET = 1 << 31
+
+
+class EmissionFactorTable:
+    """
+    Catalogue of emission factors keyed by (region, source, valid_from).
+
+    `source` is "grid" for purchased electricity (kg CO₂ / kWh) or a fuel type
+    such as "diesel" (kg CO₂ / liter). The records are sorted once into a
+    composite (key, valid_from) array, so resolving the factor for every row is
+    a single np.searchsorted pass rather than a per-row lookup.
+    """
+
+    def __init__(self, records: pd.DataFrame):
+        records = records.copy()
+        records["valid_from"] = pd.to_datetime(records["valid_from"])
+        records = records.sort_values(["region", "source", "valid_from"]).reset_index(drop=True)
+
+        self.records = records
+        self.regions = pd.Index(records["region"].unique())
+        self.sources = pd.Index(records["source"].unique())
+        self.version = hashlib.sha256(
+            records.to_csv(index=False).encode("utf-8")
+        ).hexdigest()[:12]
+
+        region_codes = self.regions.get_indexer(records["region"])
+        source_codes = self.sources.get_indexer(records["source"])
+        composite = _composite(
+            region_codes, source_codes, len(self.sources), _to_days(records["valid_from"])
+        )
+        order = np.argsort(composite, kind="stable")
+        self._composite = composite[order]
+        self._factors = records["factor"].to_numpy(dtype="float64")[order]
+        self._record_ids = order
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+    def latest(self, source: str, region: str = DEFAULT_REGION) -> float:
+        match = self.records[(self.records["region"] == region) & (self.records["source"] == source)]
+        if match.empty:
+            raise KeyError(f"No emission factor for region={region!r}, source={source!r}")
+        return float(match["factor"].iloc[-1])
+
+    def _is_constant(self, source) -> bool:
+        if not isinstance(source, str):
+            return False
+        match = (self.records["region"] == DEFAULT_REGION) & (self.records["source"] == source)
+        return match.sum() == 1
+
+    def row_keys(self, regions=None, dates=None):
+        """
+        Per-row (region code, day) pairs. Several lookups over the same rows
+        (e.g. grid and fuel) can share them through the `keys` argument.
+        """
+        if regions is None and dates is None:
+            return None
+        n = len(regions) if regions is not None else len(dates)
+        days = np.full(n, _LATEST_DAY, dtype="int64") if dates is None else _to_days(dates)
+
+        default_code = self.regions.get_loc(DEFAULT_REGION)
+        if regions is None:
+            region_codes = np.full(n, default_code, dtype="int64")
+        else:
+            region_codes = _index_codes(self.regions, regions, default_code)
+            region_codes[region_codes < 0] = default_code
+
+        return region_codes, days
+
+    def lookup(self, source, regions=None, dates=None, keys=None):
+        """
+        Resolves the factor valid for each row.
+
+        `source` is a scalar or a per-row array of sources, `regions` and `dates`
+        are per-row arrays (or None). Rows whose region has no factor valid on
+        their date fall back to the DEFAULT region; a scalar is returned when
+        the answer cannot vary across rows. Rows with no factor at all (an
+        unknown source, or a date before its first valid_from) get NaN,
+        which calculate_emissions refuses.
+        """
+        if isinstance(source, str) and regions is None and (dates is None or self._is_constant(source)):
+            return self.latest(source)
+
+        positions = self._positions(source, regions, dates, keys)
+        factors = np.full(len(positions), np.nan)
+        hit = positions >= 0
+        factors[hit] = self._factors[positions[hit]]
+        return factors
+
+    def lookup_records(self, source, regions=None, dates=None, keys=None) -> np.ndarray:
+        """
+        Like lookup(), but returns the position in `records` of the factor
+        applied to each row (-1 where none is valid), for lineage and audit.
+        A single position is returned when lookup() would return a scalar.
+        """
+        if isinstance(source, str) and regions is None and (dates is None or self._is_constant(source)):
+            match = (self.records["region"] == DEFAULT_REGION) & (self.records["source"] == source)
+            if not match.any():
+                raise KeyError(f"No emission factor for region={DEFAULT_REGION!r}, source={source!r}")
+            return int(np.flatnonzero(match.to_numpy())[-1])
+
+        positions = self._positions(source, regions, dates, keys)
+        hit = positions >= 0
+        positions[hit] = self._record_ids[positions[hit]]
+        return positions
+
+    def _positions(self, source, regions, dates, keys) -> np.ndarray:
+        keys = keys or self.row_keys(regions, dates)
+        if keys is not None:
+            return self._resolve(source, keys)
+
+        # Per-row sources only: every row takes its source's latest DEFAULT
+        # factor, so resolve each distinct source once and broadcast back
+        codes, uniques = pd.factorize(pd.Series(source, copy=False), use_na_sentinel=True)
+        sources = np.append(np.asarray(uniques, dtype=object), DEFAULT_FUEL)
+        n = len(sources)
+        default_code = self.regions.get_loc(DEFAULT_REGION)
+        latest = (np.full(n, default_code, dtype="int64"), np.full(n, _LATEST_DAY, dtype="int64"))
+        positions = self._resolve(sources, latest)
+        return positions[np.where(codes < 0, len(uniques), codes)]
+
+    def _resolve(self, source, keys) -> np.ndarray:
+        region_codes, days = keys
+        n = len(days)
+
+        if isinstance(source, str):
+            source_codes = np.full(n, self.sources.get_loc(source), dtype="int64")
+        else:
+            source_codes = _index_codes(self.sources, source, self.sources.get_indexer([DEFAULT_FUEL])[0])
+
+        default_code = self.regions.get_loc(DEFAULT_REGION)
+
+        positions = self._asof(region_codes, source_codes, days)
+
+        fallback = (positions < 0) & (region_codes != default_code)
+        if fallback.any():
+            positions[fallback] = self._asof(
+                np.full(fallback.sum(), default_code, dtype="int64"),
+                source_codes[fallback],
+                days[fallback],
+            )
+
+        return positions
+
+    def _asof(self, region_codes, source_codes, days) -> np.ndarray:
+        """
+        Position in the sorted composite of the entry valid for each row, or -1.
+        """
+        keys = _composite(region_codes, source_codes, len(self.sources), days)
+        idx = np.searchsorted(self._composite, keys, side="right") - 1
+
+        # A hit must land on an entry of the same (region, source) key
+        valid = (idx >= 0) & (source_codes >= 0)
+        valid[valid] = (self._composite[idx[valid]] >> 32) == (keys[valid] >> 32)
+
+        return np.where(valid, idx, -1)
+
+
+def _index_codes(index: pd.Index, values, missing_code: int) -> np.ndarray:
+    """
+    index.get_indexer(values) with missing values mapped to `missing_code`,
+    matching only the distinct values against the index.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, copy=False), use_na_sentinel=True)
+    matched = np.append(index.get_indexer(uniques), missing_code).astype("int64")
+    return matched[codes]
+
+
+def _to_days(dates) -> np.ndarray:
+    values = pd.to_datetime(pd.Series(dates, copy=False))
+    days = values.to_numpy(dtype="datetime64[D]").astype("int64")
+    days[values.isna().to_numpy()] = _LATEST_DAY
+    return days
+
+
+def _composite(region_codes, source_codes, n_sources, days) -> np.ndarray:
+    key = np.asarray(region_codes, dtype="int64") * n_sources + np.asarray(source_codes, dtype="int64")
+    return (key << 32) | (np.asarray(days, dtype="int64") + _DAY_OFFSET)
+
+
+@lru_cache(maxsize=8)
+def load_factor_table(path: str = FACTOR_TABLE_PATH) -> EmissionFactorTable:
+    """
+    Loads, sorts and indexes a factor catalogue once per path.
+
+    Expected columns: region, source, valid_from, factor
+    """
+    return EmissionFactorTable(pd.read_csv(path))
@@ -1,26 +1,194 @@
+import numpy as np
 import pandas as pd
 
-# Emission factors (simplified, realistic)
-GRID_EMISSION_FACTOR = 0.82   # kg CO2 per kWh
-FUEL_EMISSION_FACTOR = 2.31   # kg CO2 per liter (diesel)
+from esg.emission_factors import DEFAULT_FUEL, GRID_SOURCE, load_factor_table
+from esg.ingestion import iter_esg_batches
 
-def calculate_emissions(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+# Columns folded into the KPI partial aggregates
+KPI_SUM_COLUMNS = [
+    "energy_kwh",
+    "renewable_kwh",
+    "scope_1_co2_kg",
+    "scope_2_co2_kg",
+    "total_co2_kg",
+]
 
-    df["scope_2_co2_kg"] = (df["energy_kwh"] - df["renewable_kwh"]) * GRID_EMISSION_FACTOR
-    df["scope_1_co2_kg"] = df["fuel_liters"] * FUEL_EMISSION_FACTOR
+# Default rows per chunk when streaming a CSV
+STREAM_CHUNK_SIZE = 250_000
+
+# KPI columns are summed in blocks of this many rows, in row order, and the
+# block sums added one after another. A chunked pass (RunningTotals) then
+# adds exactly the same numbers in the same order as a single pass, so
+# streamed KPIs match aggregate_kpis to the cent.
+SUM_BLOCK_ROWS = 1 << 16
+
+
+# Optional columns that select a factor version per row
+FACTOR_KEY_COLUMNS = ["date", "region", "fuel_type"]
+
+
+def calculate_emissions(df: pd.DataFrame, factors=None) -> pd.DataFrame:
+    """
+    Adds Scope 1/2/total CO₂ columns.
+
+    Factors come from the emission factor catalogue (see esg.emission_factors),
+    resolved per row from the optional `region` and `fuel_type` columns and
+    the `date`. Without a `region` column every row uses the DEFAULT region.
+    """
+    factors = factors or load_factor_table()
+    # Shallow: the new columns are added to the copy only, the input columns are shared
+    df = df.copy(deep=False)
+
+    regions = df["region"] if "region" in df.columns else None
+    dates = df["date"] if "date" in df.columns else None
+    fuels = df["fuel_type"] if "fuel_type" in df.columns else DEFAULT_FUEL
+
+    keys = factors.row_keys(regions, dates)
+    grid_factor = factors.lookup(GRID_SOURCE, regions, dates, keys)
+    fuel_factor = factors.lookup(fuels, regions, dates, keys)
+    _check_resolved(df, dates, [("energy_kwh", GRID_SOURCE, grid_factor), ("fuel_liters", fuels, fuel_factor)])
+
+    df["scope_2_co2_kg"] = (df["energy_kwh"] - df["renewable_kwh"]) * grid_factor
+    df["scope_1_co2_kg"] = df["fuel_liters"] * fuel_factor
     df["total_co2_kg"] = df["scope_1_co2_kg"] + df["scope_2_co2_kg"]
 
     return df
 
 
-def aggregate_kpis(df: pd.DataFrame) -> dict:
+def _check_resolved(df: pd.DataFrame, dates, lookups: list):
+    """
+    Raises ValueError when a row with activity data got no emission factor
+    (a fuel type the catalogue does not know, or a date before the first
+    factor of its source): its emissions would be NaN and drop out of the
+    KPI sums unnoticed. `lookups` are (activity column, source, factors).
+    """
+    unresolved = np.zeros(len(df), dtype=bool)
+    details = []
+    for column, source, factor in lookups:
+        if np.ndim(factor) == 0:
+            continue
+        missing = np.isnan(factor) & df[column].notna().to_numpy()
+        if not missing.any():
+            continue
+        unresolved |= missing
+
+        if isinstance(source, str):
+            names = [source]
+        else:
+            names = pd.Series(source, copy=False)[missing].fillna(DEFAULT_FUEL).astype(str).unique().tolist()
+        detail = ", ".join(sorted(names))
+        if dates is not None:
+            first = pd.to_datetime(pd.Series(dates, copy=False)[missing]).min()
+            if pd.notna(first):
+                detail += f" from {first.date()}"
+        details.append(detail)
+
+    if unresolved.any():
+        raise ValueError(
+            f"{int(unresolved.sum())} rows have no emission factor for their source, region and date "
+            f"({'; '.join(details)}); add the factors to the factor table (data/emission_factors.csv)"
+        )
+
+
+def _kpi_values(values) -> np.ndarray:
+    # NaN-skipping like Series.sum; float32 columns of a compact frame (see
+    # esg.compact) are summed in float64
+    values = np.asarray(values, dtype="float64")
+    return np.where(np.isnan(values), 0.0, values)
+
+
+def _add_blocks(total, values: np.ndarray):
+    for start in range(0, len(values), SUM_BLOCK_ROWS):
+        total += values[start:start + SUM_BLOCK_ROWS].sum()
+    return total
+
+
+def column_total(values):
+    """
+    Sum of one KPI column (NaN skipped), block by block (see SUM_BLOCK_ROWS).
+    """
+    return _add_blocks(np.float64(0.0), _kpi_values(values))
+
+
+def emission_totals(df: pd.DataFrame) -> dict:
+    """
+    One sum per KPI column of an emissions frame.
+    """
     return {
-        "Total Energy (kWh)": int(df["energy_kwh"].sum()),
-        "Renewable Energy (%)": round(
-            (df["renewable_kwh"].sum() / df["energy_kwh"].sum()) * 100, 2
+        col: column_total(df[col].to_numpy(dtype="float64", na_value=np.nan))
+        for col in KPI_SUM_COLUMNS
+    }
+
+
+class RunningTotals:
+    """
+    emission_totals fed chunk by chunk. Rows short of a full block are
+    carried over to the next chunk, so the totals are bit-identical to
+    emission_totals over all the rows at once, whatever the chunk sizes.
+    """
+
+    def __init__(self):
+        self._totals = {col: np.float64(0.0) for col in KPI_SUM_COLUMNS}
+        self._pending = {col: np.empty(0) for col in KPI_SUM_COLUMNS}
+
+    def add(self, emissions: pd.DataFrame) -> "RunningTotals":
+        for col in KPI_SUM_COLUMNS:
+            values = np.concatenate([
+                self._pending[col],
+                _kpi_values(emissions[col].to_numpy(dtype="float64", na_value=np.nan)),
+            ])
+            complete = len(values) - len(values) % SUM_BLOCK_ROWS
+            self._totals[col] = _add_blocks(self._totals[col], values[:complete])
+            self._pending[col] = values[complete:]
+        return self
+
+    def totals(self) -> dict:
+        return {col: _add_blocks(self._totals[col], self._pending[col]) for col in KPI_SUM_COLUMNS}
+
+
+def kpis_from_totals(totals) -> dict:
+    """
+    KPIs from one set of totals, or from a DataFrame of totals (one row per
+    group, KPI_SUM_COLUMNS as columns), which gives a dict of Series.
+    """
+    if isinstance(totals, pd.DataFrame):
+        integer, rounded = (lambda v: v.astype("int64")), (lambda v, digits: v.round(digits))
+    else:
+        integer, rounded = int, round
+
+    return {
+        "Total Energy (kWh)": integer(totals["energy_kwh"]),
+        "Renewable Energy (%)": rounded(
+            (totals["renewable_kwh"] / totals["energy_kwh"]) * 100, 2
         ),
-        "Scope 1 CO₂ (kg)": round(df["scope_1_co2_kg"].sum(), 2),
-        "Scope 2 CO₂ (kg)": round(df["scope_2_co2_kg"].sum(), 2),
-        "Total CO₂ (kg)": round(df["total_co2_kg"].sum(), 2),
+        "Scope 1 CO₂ (kg)": rounded(totals["scope_1_co2_kg"], 2),
+        "Scope 2 CO₂ (kg)": rounded(totals["scope_2_co2_kg"], 2),
+        "Total CO₂ (kg)": rounded(totals["total_co2_kg"], 2),
     }
+
+
+def aggregate_kpis(df: pd.DataFrame) -> dict:
+    return kpis_from_totals(emission_totals(df))
+
+
+def stream_kpis(source, chunksize: int = STREAM_CHUNK_SIZE) -> dict:
+    """
+    Bounded-memory equivalent of aggregate_kpis(calculate_emissions(load_esg_data(source))).
+
+    The source (CSV, Parquet or Arrow IPC) is read about `chunksize` rows at
+    a time; each chunk is turned into Scope 1/2 emissions and folded into
+    running sums, so peak memory depends on the chunk size rather than on
+    the file size.
+    """
+    totals = RunningTotals()
+
+    batches = iter_esg_batches(
+        source,
+        columns=FACTOR_KEY_COLUMNS + ["energy_kwh", "renewable_kwh", "fuel_liters"],
+        batch_rows=chunksize,
+        include_missing=True,
+    )
+    for chunk in batches:
+        totals.add(calculate_emissions(chunk))
+
+    return kpis_from_totals(totals.totals())
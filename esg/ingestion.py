@@ -0,0 +1,299 @@
+"""
+Columnar ESG Data Ingestion
+Typed, column-pruned loading of CSV, Parquet and Arrow IPC inputs
+"""
+
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; CSV falls back to pandas
+    pa = None
+
+# -----------------------------
+# Declared schemas
+# -----------------------------
+ESG_SCHEMA = {
+    "date": "timestamp",
+    "facility": "string",
+    "energy_kwh": "float64",
+    "renewable_kwh": "float64",
+    "fuel_liters": "float64",
+    # Optional: select region / fuel specific emission factors
+    "region": "string",
+    "fuel_type": "string",
+}
+
+SCOPE3_SCHEMA = {
+    "category": "string",
+    "annual_spend_eur": "float64",
+}
+
+# Raw accounts-payable invoice lines
+LEDGER_SCHEMA = {
+    "supplier": "string",
+    "category": "string",
+    "amount": "float64",
+    "currency": "string",
+    "date": "timestamp",
+}
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+
+# Rough bytes per CSV row, used to turn a row budget into a block size
+_CSV_BYTES_PER_ROW = 64
+
+
+def _arrow_type(name):
+    return {
+        "timestamp": pa.timestamp("s"),
+        "string": pa.string(),
+        "float64": pa.float64(),
+    }[name]
+
+
+def _read_type(name):
+    # Dates are read as text and parsed by _parse_dates, which accepts more
+    # layouts than Arrow's timestamp parser ("2024/01/01", "01/02/2024",
+    # UTC offsets)
+    return pa.string() if name == "timestamp" else _arrow_type(name)
+
+
+def _parse_dates(df, schema):
+    """
+    Converts the schema's timestamp columns that arrived as text to
+    datetime64[s]: ISO 8601 on the fast path, any other layout pandas can
+    read otherwise. Values with a UTC offset are converted to UTC. Raises
+    ValueError naming the column when a value is not a date.
+    """
+    for col, kind in schema.items():
+        if kind != "timestamp" or col not in df.columns or pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue
+        try:
+            parsed = pd.to_datetime(df[col], format="ISO8601", utc=True)
+        except (ValueError, TypeError):
+            try:
+                parsed = pd.to_datetime(df[col], format="mixed", utc=True)
+            except (ValueError, TypeError) as exc:
+                raise ValueError(f"Column '{col}' contains values that are not dates: {exc}") from exc
+        df[col] = parsed.dt.tz_localize(None).astype("datetime64[s]")
+    return df
+
+
+def _pandas_dtypes(schema):
+    return {
+        col: (str if kind == "string" else kind)
+        for col, kind in schema.items()
+        if kind != "timestamp"
+    }
+
+
+def _is_path(source) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
+def detect_format(source) -> str:
+    """
+    Returns "parquet", "arrow" or "csv" based on the path / upload name.
+    """
+    name = source if _is_path(source) else getattr(source, "name", "")
+    name = str(name).lower()
+
+    if name.endswith(PARQUET_EXTENSIONS):
+        return "parquet"
+    if name.endswith(ARROW_EXTENSIONS):
+        return "arrow"
+    return "csv"
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+# -----------------------------
+# Arrow readers
+# -----------------------------
+def _csv_options(schema, columns, batch_rows=None, include_missing=False):
+    read_options = pa_csv.ReadOptions(use_threads=True)
+    if batch_rows:
+        read_options.block_size = max(batch_rows * _CSV_BYTES_PER_ROW, 1 << 20)
+
+    convert_options = pa_csv.ConvertOptions(
+        column_types={col: _read_type(kind) for col, kind in schema.items()},
+        include_columns=columns,
+        include_missing_columns=include_missing,
+    )
+    return read_options, convert_options
+
+
+def _open_ipc(source):
+    if _is_path(source):
+        data = pa.memory_map(str(source), "r")
+    else:
+        data = pa.py_buffer(source.read())
+
+    try:
+        return pa_ipc.open_file(data)
+    except pa.ArrowInvalid:
+        if hasattr(data, "seek"):
+            data.seek(0)
+        return pa_ipc.open_stream(data)
+
+
+def _cast_to_schema(table, schema):
+    for col, kind in schema.items():
+        idx = table.schema.get_field_index(col)
+        if idx < 0:
+            continue
+        current = table.schema.field(idx).type
+        if kind == "timestamp" and (pa.types.is_string(current) or pa.types.is_large_string(current)):
+            continue  # parsed by _parse_dates
+        if current != _arrow_type(kind):
+            table = table.set_column(idx, col, table.column(idx).cast(_arrow_type(kind)))
+    return table
+
+
+def _read_arrow_table(source, fmt, schema, columns):
+    if fmt == "parquet":
+        table = pq.read_table(source, columns=columns, memory_map=_is_path(source))
+    elif fmt == "arrow":
+        table = _open_ipc(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+    else:
+        read_options, convert_options = _csv_options(schema, columns)
+        table = pa_csv.read_csv(source, read_options=read_options, convert_options=convert_options)
+
+    return _cast_to_schema(table, schema)
+
+
+def _to_pandas(table):
+    # split_blocks + self_destruct keep the Arrow -> pandas handover close to a single copy
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+# -----------------------------
+# Public loaders
+# -----------------------------
+def read_table(source, schema: dict, columns: list = None) -> pd.DataFrame:
+    """
+    Loads `source` (path or file-like upload) into a DataFrame typed by `schema`.
+
+    Parquet and Arrow IPC files are memory-mapped when given as paths, CSV is
+    parsed with multiple threads, and only `columns` are materialized when given.
+    """
+    fmt = detect_format(source)
+    _rewind(source)
+
+    if pa is not None:
+        return _parse_dates(_to_pandas(_read_arrow_table(source, fmt, schema, columns)), schema)
+
+    if fmt != "csv":
+        raise ImportError("pyarrow is required to read Parquet / Arrow files")
+
+    df = pd.read_csv(
+        source,
+        usecols=columns,
+        dtype=_pandas_dtypes(schema),
+    )
+    return _parse_dates(df, schema)
+
+
+def _present(columns, names, include_missing):
+    if include_missing and columns is not None:
+        return [col for col in columns if col in names]
+    return columns
+
+
+def iter_batches(
+    source,
+    schema: dict,
+    columns: list = None,
+    batch_rows: int = 250_000,
+    include_missing: bool = False,
+):
+    """
+    Yields DataFrames of roughly `batch_rows` rows without loading the whole source.
+
+    With `include_missing`, requested columns absent from the source are
+    tolerated instead of raising.
+    """
+    fmt = detect_format(source)
+    _rewind(source)
+
+    if pa is None:
+        if fmt != "csv":
+            raise ImportError("pyarrow is required to read Parquet / Arrow files")
+        usecols = columns
+        if include_missing and columns is not None:
+            usecols = lambda col: col in columns
+        for chunk in pd.read_csv(
+            source,
+            usecols=usecols,
+            dtype=_pandas_dtypes(schema),
+            chunksize=batch_rows,
+        ):
+            yield _parse_dates(chunk, schema)
+        return
+
+    if fmt == "parquet":
+        parquet_file = pq.ParquetFile(source, memory_map=_is_path(source))
+        columns = _present(columns, parquet_file.schema_arrow.names, include_missing)
+        batches = parquet_file.iter_batches(batch_size=batch_rows, columns=columns)
+    elif fmt == "arrow":
+        reader = _open_ipc(source)
+        columns = _present(columns, reader.schema.names, include_missing)
+        if hasattr(reader, "num_record_batches"):
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        else:
+            batches = reader
+    else:
+        read_options, convert_options = _csv_options(schema, columns, batch_rows, include_missing)
+        batches = pa_csv.open_csv(source, read_options=read_options, convert_options=convert_options)
+
+    for batch in batches:
+        table = pa.Table.from_batches([batch])
+        if fmt == "arrow" and columns is not None:
+            table = table.select(columns)
+        yield _parse_dates(_to_pandas(_cast_to_schema(table, schema)), schema)
+
+
+def load_esg_data(source, columns: list = None) -> pd.DataFrame:
+    return read_table(source, ESG_SCHEMA, columns)
+
+
+def load_scope3_spend(source, columns: list = None) -> pd.DataFrame:
+    return read_table(source, SCOPE3_SCHEMA, columns)
+
+
+def peek_columns(source) -> list:
+    """
+    Column names of `source` without reading its rows.
+    """
+    fmt = detect_format(source)
+    _rewind(source)
+
+    if fmt == "parquet":
+        names = pq.ParquetFile(source).schema_arrow.names
+    elif fmt == "arrow":
+        names = _open_ipc(source).schema.names
+    else:
+        names = list(pd.read_csv(source, nrows=0).columns)
+
+    _rewind(source)
+    return names
+
+
+def iter_ledger_batches(source, batch_rows: int = 250_000):
+    return iter_batches(source, LEDGER_SCHEMA, list(LEDGER_SCHEMA), batch_rows)
+
+
+def iter_esg_batches(source, columns: list = None, batch_rows: int = 250_000, include_missing: bool = False):
+    return iter_batches(source, ESG_SCHEMA, columns, batch_rows, include_missing)
@@ -0,0 +1,195 @@
+"""
+Incremental KPI Accumulator
+Mergeable per-facility, per-period sums from which the headline KPIs are derived
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from esg.emissions import KPI_SUM_COLUMNS, calculate_emissions, kpis_from_totals
+
+# Sums kept per (facility, period) key, in this order
+STATE_COLUMNS = KPI_SUM_COLUMNS + ["rows"]
+
+
+class KPIAccumulator:
+    """
+    Running sums of energy, renewable energy and Scope 1/2/total CO₂ per
+    facility and period (month by default).
+
+    `append(new_rows)` only touches the new rows and the keys they fall in,
+    `merge(other)` combines shards computed elsewhere, and the KPIs are always
+    derived from the merged sums (the renewable share is never averaged).
+    """
+
+    def __init__(self, freq: str = "M"):
+        self.freq = freq
+        # (facility, period as int64 ns) -> row of self._values
+        self._positions = {}
+        self._values = np.zeros((0, len(STATE_COLUMNS)))
+        self.grand_total = np.zeros(len(STATE_COLUMNS))
+
+    def __len__(self):
+        return len(self._positions)
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+    def _partial(self, cells: pd.DataFrame) -> pd.DataFrame:
+        period = pd.to_datetime(cells["date"]).dt.to_period(self.freq).dt.start_time
+        return (
+            cells.assign(period=period)
+            .groupby(["facility", "period"], dropna=False)[STATE_COLUMNS]
+            .sum()
+        )
+
+    def _add(self, keys: list, values: np.ndarray):
+        positions = np.fromiter(
+            (self._positions.get(key, -1) for key in keys), dtype="int64", count=len(keys)
+        )
+
+        new = np.flatnonzero(positions < 0)
+        if len(new):
+            start = len(self._positions)
+            positions[new] = np.arange(start, start + len(new))
+            self._positions.update(zip((keys[i] for i in new), positions[new].tolist()))
+            self._reserve(len(self._positions))
+
+        # Keys are unique within a partial, so a plain fancy-index add is safe
+        self._values[positions] += values
+        self.grand_total += values.sum(axis=0)
+
+    def _reserve(self, size: int):
+        if size > len(self._values):
+            grown = np.zeros((max(size, 2 * len(self._values)), len(STATE_COLUMNS)))
+            grown[:len(self._values)] = self._values
+            self._values = grown
+
+    def append(self, new_rows: pd.DataFrame) -> "KPIAccumulator":
+        return self.append_emissions(calculate_emissions(new_rows))
+
+    def append_emissions(self, emissions: pd.DataFrame) -> "KPIAccumulator":
+        """
+        Same as append() for rows that already carry the calculate_emissions columns.
+        """
+        return self.append_cells(emissions_to_cells(emissions))
+
+    def append_cells(self, cells: pd.DataFrame) -> "KPIAccumulator":
+        """
+        Adds pre-summed cells (facility, date and the STATE_COLUMNS sums), e.g.
+        daily cells that are being rolled up into a coarser period.
+        """
+        partial = self._partial(cells)
+        self._add(_keys(partial.index), partial.to_numpy(dtype="float64"))
+        return self
+
+    def merge(self, other: "KPIAccumulator") -> "KPIAccumulator":
+        if other.freq != self.freq:
+            raise ValueError(f"Cannot merge accumulators with periods {self.freq!r} and {other.freq!r}")
+
+        merged = KPIAccumulator(self.freq)
+        for acc in (self, other):
+            merged._add(list(acc._positions), acc._values[:len(acc)])
+        return merged
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, freq: str = "M") -> "KPIAccumulator":
+        return cls(freq).append(df)
+
+    @classmethod
+    def from_cells(cls, cells: pd.DataFrame, freq: str, grand_total: np.ndarray) -> "KPIAccumulator":
+        """
+        Rebuilds an accumulator from its to_frame() output and grand total.
+        The total is passed in rather than re-summed so the KPIs stay
+        bit-identical.
+        """
+        acc = cls(freq)
+        if len(cells):
+            acc._add(_keys(cells.index), cells[STATE_COLUMNS].to_numpy(dtype="float64"))
+        acc.grand_total = np.array(grand_total, dtype="float64")
+        return acc
+
+    # -----------------------------
+    # Derived views
+    # -----------------------------
+    def totals(self) -> dict:
+        return dict(zip(STATE_COLUMNS, self.grand_total))
+
+    def kpis(self) -> dict:
+        return kpis_from_totals(self.totals())
+
+    def _key_arrays(self):
+        facilities = [facility for facility, _ in self._positions]
+        periods = _to_timestamps([period for _, period in self._positions])
+        return facilities, periods
+
+    def to_frame(self) -> pd.DataFrame:
+        facilities, periods = self._key_arrays()
+        index = pd.MultiIndex.from_arrays([facilities, periods], names=["facility", "period"])
+        values = self._values[:len(self)]
+        return pd.DataFrame(values, index=index, columns=STATE_COLUMNS).sort_index()
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def to_dict(self) -> dict:
+        facilities, periods = self._key_arrays()
+        dates = [None if pd.isna(p) else p.isoformat() for p in periods]
+        return {
+            "freq": self.freq,
+            "columns": STATE_COLUMNS,
+            "state": [
+                [facility, date, *values]
+                for facility, date, values in zip(facilities, dates, self._values[:len(self)].tolist())
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "KPIAccumulator":
+        acc = cls(data["freq"])
+        if data["state"]:
+            facilities = [row[0] for row in data["state"]]
+            periods = pd.DatetimeIndex(pd.to_datetime([row[1] for row in data["state"]]))
+            values = np.array([row[2:] for row in data["state"]], dtype="float64")
+            acc._add(list(zip(facilities, periods.as_unit("ns").asi8.tolist())), values)
+        return acc
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path) -> "KPIAccumulator":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def emissions_to_cells(emissions: pd.DataFrame, freq: str = None) -> pd.DataFrame:
+    """
+    One cell per input row, or per (facility, period) when `freq` is given.
+    """
+    cells = emissions[["facility", "date"] + KPI_SUM_COLUMNS].assign(rows=1)
+    if freq is None:
+        return cells
+
+    date = pd.to_datetime(cells["date"]).dt.to_period(freq).dt.start_time
+    return (
+        cells.assign(date=date)
+        .groupby(["facility", "date"], dropna=False)[STATE_COLUMNS]
+        .sum()
+        .reset_index()
+    )
+
+
+def _keys(index: pd.MultiIndex) -> list:
+    # Plain hashable keys: None for a missing facility, int64 ns (NaT as min int) for the period
+    facilities = index.get_level_values("facility").astype(object)
+    facilities = facilities.where(facilities.notna(), None)
+    periods = pd.DatetimeIndex(index.get_level_values("period")).as_unit("ns").asi8
+    return list(zip(facilities.tolist(), periods.tolist()))
+
+
+def _to_timestamps(periods) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(np.array(periods, dtype="int64").view("datetime64[ns]"))
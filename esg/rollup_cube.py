@@ -0,0 +1,130 @@
+"""
+Facility × Time Rollup Cube
+Pre-aggregated energy and emission sums behind the Overview trend and KPI cards
+"""
+
+import pandas as pd
+
+from esg.emissions import calculate_emissions, kpis_from_totals
+from esg.kpi_accumulator import STATE_COLUMNS, KPIAccumulator, emissions_to_cells
+
+GRANULARITIES = {
+    "Day": "D",
+    "Week": "W",
+    "Month": "M",
+    "Year": "Y",
+}
+
+
+class RollupCube:
+    """
+    One KPIAccumulator per granularity, all fed by the same appends.
+
+    Queries never touch raw rows: they filter and sum the (facility, period)
+    cells of the requested level, which stays small at any data size.
+    """
+
+    def __init__(self):
+        self.levels = {name: KPIAccumulator(freq) for name, freq in GRANULARITIES.items()}
+        self._frames = {}
+        # Set by compact(): grand total per level, kept instead of the accumulators
+        self._compact_totals = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "RollupCube":
+        """
+        Builds the cube from raw rows, or from an emissions frame as returned
+        by calculate_emissions.
+        """
+        if "total_co2_kg" in df.columns:
+            return cls().append_emissions(df)
+        return cls().append(df)
+
+    def append(self, new_rows: pd.DataFrame) -> "RollupCube":
+        return self.append_emissions(calculate_emissions(new_rows))
+
+    def append_emissions(self, emissions: pd.DataFrame) -> "RollupCube":
+        self._expand()
+        # Rows are summed to daily cells once; coarser levels roll up the cells
+        daily = emissions_to_cells(emissions, GRANULARITIES["Day"])
+        for acc in self.levels.values():
+            acc.append_cells(daily)
+        self._frames.clear()
+        return self
+
+    def merge(self, other: "RollupCube") -> "RollupCube":
+        self._expand()
+        other._expand()
+        merged = RollupCube()
+        merged.levels = {
+            name: acc.merge(other.levels[name]) for name, acc in self.levels.items()
+        }
+        return merged
+
+    # -----------------------------
+    # Compact mode
+    # -----------------------------
+    def compact(self) -> "RollupCube":
+        """
+        Keeps every level only as its sorted cell frame (facility codes,
+        periods and float64 sums) and releases the accumulators, whose
+        per-cell key dictionaries take most of the cube's memory. Queries
+        are unchanged; an append or merge rebuilds the accumulators first.
+        """
+        if self._compact_totals is None:
+            for name in self.levels:
+                self.frame(name)
+            self._compact_totals = {name: acc.grand_total.copy() for name, acc in self.levels.items()}
+            self.levels = {}
+        return self
+
+    @property
+    def is_compact(self) -> bool:
+        return self._compact_totals is not None
+
+    def _expand(self):
+        if self._compact_totals is None:
+            return
+        self.levels = {
+            name: KPIAccumulator.from_cells(self._frames[name], freq, self._compact_totals[name])
+            for name, freq in GRANULARITIES.items()
+        }
+        self._compact_totals = None
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def frame(self, granularity: str = "Day") -> pd.DataFrame:
+        if granularity not in self._frames:
+            self._frames[granularity] = self.levels[granularity].to_frame()
+        return self._frames[granularity]
+
+    def facilities(self) -> list:
+        facilities = self.frame("Year").index.get_level_values("facility").unique()
+        return sorted(f for f in facilities if pd.notna(f))
+
+    def _select(self, granularity, facilities):
+        cells = self.frame(granularity)
+        if facilities:
+            cells = cells[cells.index.get_level_values("facility").isin(facilities)]
+        return cells
+
+    def trend(self, granularity: str = "Day", facilities: list = None) -> pd.DataFrame:
+        """
+        Per-period sums (energy, renewable, Scope 1/2/total CO₂) across the
+        selected facilities, one row per period.
+        """
+        cells = self._select(granularity, facilities)
+        trend = cells.groupby(level="period")[STATE_COLUMNS].sum().reset_index()
+        return trend.rename(columns={"period": "date"})
+
+    def by_facility(self, granularity: str = "Day", facilities: list = None) -> pd.DataFrame:
+        cells = self._select(granularity, facilities)
+        return cells.reset_index().rename(columns={"period": "date"})
+
+    def kpis(self, facilities: list = None) -> dict:
+        if not facilities:
+            if self.is_compact:
+                return kpis_from_totals(dict(zip(STATE_COLUMNS, self._compact_totals["Year"])))
+            return self.levels["Year"].kpis()
+        return kpis_from_totals(self._select("Year", facilities)[STATE_COLUMNS].sum())
@@ -1,27 +1,44 @@
+import numpy as np
 import pandas as pd
 
-# Simplified spend-based emission factors (kg CO2 / €)
-EMISSION_FACTORS = {
-    "raw_materials": 0.45,
-    "logistics": 0.18,
-    "it_services": 0.05,
-    "manufacturing_services": 0.32,
-}
+from esg.emissions import column_total
+from esg.scope3_factors import EMISSION_FACTORS, RESOLUTION_UNRESOLVED, load_scope3_catalogue
 
 
-def estimate_scope3_emissions(spend_data: pd.DataFrame) -> pd.DataFrame:
+def estimate_scope3_emissions(spend_data: pd.DataFrame, catalogue=None) -> pd.DataFrame:
     """
     Expected columns:
     - category
     - annual_spend_eur
+
+    Categories are resolved against the Scope 3 factor catalogue (exact code,
+    parent code or normalized name); `factor_resolution` records which path
+    each row used, and unresolved rows keep a NaN factor.
     """
-    df = spend_data.copy()
+    catalogue = catalogue or load_scope3_catalogue()
+    df = spend_data.copy(deep=False)
 
-    df["emission_factor"] = df["category"].map(EMISSION_FACTORS)
+    resolved = catalogue.resolve(df["category"])
+    df["emission_factor"] = resolved["emission_factor"]
+    df["factor_code"] = resolved["factor_code"]
+    df["factor_resolution"] = resolved["factor_resolution"]
     df["scope3_co2_kg"] = df["annual_spend_eur"] * df["emission_factor"]
 
     return df
 
 
 def aggregate_scope3_kpi(df: pd.DataFrame) -> float:
-    return round(df["scope3_co2_kg"].sum(), 2)
+    # Summed like the Scope 1/2 KPIs, so compacting can check it exactly
+    return round(column_total(df["scope3_co2_kg"].to_numpy(dtype="float64", na_value=np.nan)), 2)
+
+
+def unresolved_spend_lines(result: pd.DataFrame) -> int:
+    """
+    Input spend lines whose category has no emission factor. A ledger
+    result (see esg.scope3_ledger) has one row per supplier × category, with
+    the number of invoice lines behind it in "lines".
+    """
+    unresolved = result["factor_resolution"] == RESOLUTION_UNRESOLVED
+    if "lines" in result.columns:
+        return int(result.loc[unresolved, "lines"].sum())
+    return int(unresolved.sum())
@@ -0,0 +1,192 @@
+"""
+Scope 3 Spend Factor Catalogue
+Hierarchical category codes (EEIO / NACE / UNSPSC / internal) resolved through a precomputed index
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Simplified spend-based emission factors (kg CO2 / €)
+EMISSION_FACTORS = {
+    "raw_materials": 0.45,
+    "logistics": 0.18,
+    "it_services": 0.05,
+    "manufacturing_services": 0.32,
+}
+
+# How a spend line's category was matched to a factor
+RESOLUTION_EXACT = "exact"
+RESOLUTION_PARENT = "parent"
+RESOLUTION_NAME = "name"
+RESOLUTION_UNRESOLVED = "unresolved"
+RESOLUTIONS = [RESOLUTION_EXACT, RESOLUTION_PARENT, RESOLUTION_NAME, RESOLUTION_UNRESOLVED]
+
+_SEPARATORS = ".-_/ "
+
+# Only code-like values (optional letter prefix, then digits) get implied parents,
+# so free text such as "Cars" is never truncated onto a section code like "C"
+_CODE_PATTERN = re.compile(r"[A-Za-z]{0,3}\d[0-9A-Za-z.\-/]*")
+
+
+def normalize_category(text) -> str:
+    return re.sub(r"[^0-9a-z]+", "_", str(text).lower()).strip("_")
+
+
+def _ancestor_candidates(code: str):
+    """
+    Implied parent codes when no explicit parent is recorded: UNSPSC codes
+    zero out trailing digit pairs (43211503 -> 43211500 -> 43210000 -> 43000000),
+    other codes (e.g. NACE C24.10 -> C24.1 -> C24 -> C) drop trailing characters.
+    """
+    if not _CODE_PATTERN.fullmatch(code):
+        return
+
+    if code.isdigit() and len(code) == 8:
+        for keep in (6, 4, 2):
+            yield code[:keep] + "0" * (8 - keep)
+        return
+
+    code = code.rstrip(_SEPARATORS)
+    while len(code) > 1:
+        code = code[:-1].rstrip(_SEPARATORS)
+        if code:
+            yield code
+
+
+class Scope3FactorCatalogue:
+    """
+    Compact index over a spend factor catalogue.
+
+    Expected columns: code, factor; optional: parent_code, name. A code with
+    an empty factor inherits its nearest ancestor's factor.
+    """
+
+    def __init__(self, records: pd.DataFrame):
+        records = records.copy()
+        records["code"] = records["code"].astype(str).str.strip()
+        if "parent_code" not in records.columns:
+            records["parent_code"] = None
+        if "name" not in records.columns:
+            records["name"] = records["code"]
+
+        self.records = records
+        self.version = hashlib.sha256(
+            records.to_csv(index=False).encode("utf-8")
+        ).hexdigest()[:12]
+        self._factor = dict(zip(records["code"], records["factor"].astype("float64")))
+        self._parent = {
+            code: str(parent).strip()
+            for code, parent in zip(records["code"], records["parent_code"])
+            if pd.notna(parent) and str(parent).strip()
+        }
+
+        self._by_name = {}
+        for code, name in zip(records["code"], records["name"]):
+            self._by_name.setdefault(normalize_category(code), code)
+            if pd.notna(name):
+                self._by_name.setdefault(normalize_category(name), code)
+
+    # -----------------------------
+    # Resolution of a single distinct category
+    # -----------------------------
+    def _own_factor(self, code):
+        factor = self._factor.get(code)
+        return None if factor is None or np.isnan(factor) else factor
+
+    def _from_ancestors(self, code):
+        seen = set()
+        parent = self._parent.get(code)
+        while parent is not None and parent not in seen:
+            seen.add(parent)
+            factor = self._own_factor(parent)
+            if factor is not None:
+                return parent, factor
+            parent = self._parent.get(parent)
+
+        for candidate in _ancestor_candidates(code):
+            factor = self._own_factor(candidate)
+            if factor is not None:
+                return candidate, factor
+        return None, None
+
+    def resolve_one(self, category) -> tuple:
+        """
+        Returns (matched code, factor, resolution) for one category value.
+        """
+        if pd.isna(category):
+            return None, np.nan, RESOLUTION_UNRESOLVED
+        category = str(category).strip()
+
+        factor = self._own_factor(category)
+        if factor is not None:
+            return category, factor, RESOLUTION_EXACT
+
+        code, factor = self._from_ancestors(category)
+        if code is not None:
+            return code, factor, RESOLUTION_PARENT
+
+        named = self._by_name.get(normalize_category(category))
+        if named is not None:
+            factor = self._own_factor(named)
+            if factor is None:
+                named, factor = self._from_ancestors(named)
+            if named is not None:
+                return named, factor, RESOLUTION_NAME
+
+        return None, np.nan, RESOLUTION_UNRESOLVED
+
+    # -----------------------------
+    # Vectorized resolution
+    # -----------------------------
+    def resolve(self, categories: pd.Series) -> pd.DataFrame:
+        """
+        Resolves every row through its distinct category only: the column is
+        factorized once, each distinct value is looked up in the index, and
+        the answers are broadcast back with a single take per output column.
+
+        Returns:
+            DataFrame: emission_factor, factor_code, factor_resolution
+        """
+        codes, uniques = pd.factorize(categories, use_na_sentinel=True)
+        resolved = [self.resolve_one(value) for value in uniques]
+
+        matched = np.array([r[0] for r in resolved] + [None], dtype=object)
+        factors = np.array([r[1] for r in resolved] + [np.nan], dtype="float64")
+        paths = np.array(
+            [RESOLUTIONS.index(r[2]) for r in resolved] + [RESOLUTIONS.index(RESOLUTION_UNRESOLVED)]
+        )
+
+        index = np.where(codes < 0, len(uniques), codes)
+        return pd.DataFrame(
+            {
+                "emission_factor": factors[index],
+                "factor_code": matched[index],
+                "factor_resolution": pd.Categorical.from_codes(paths[index], categories=RESOLUTIONS),
+            },
+            index=categories.index,
+        )
+
+
+def default_catalogue_records() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "code": list(EMISSION_FACTORS),
+            "factor": list(EMISSION_FACTORS.values()),
+            "name": [code.replace("_", " ").title() for code in EMISSION_FACTORS],
+        }
+    )
+
+
+@lru_cache(maxsize=8)
+def load_scope3_catalogue(path: str = None) -> Scope3FactorCatalogue:
+    """
+    Builds the catalogue index once per path; without a path the built-in
+    EMISSION_FACTORS are used.
+    """
+    if path is None:
+        return Scope3FactorCatalogue(default_catalogue_records())
+    return Scope3FactorCatalogue(pd.read_csv(path, dtype={"code": str, "parent_code": str}))
@@ -0,0 +1,168 @@
+"""
+Streaming Scope 3 Ledger Estimation
+Bounded-memory, supplier-level spend emissions from raw accounts-payable lines
+"""
+
+import hashlib
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from esg.ingestion import iter_ledger_batches
+from esg.scope3_factors import load_scope3_catalogue
+
+FX_TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "fx_rates.csv",
+)
+
+LEDGER_CHUNK_SIZE = 500_000
+
+GROUP_KEYS = ["supplier", "category"]
+SUM_COLUMNS = ["annual_spend_eur", "scope3_co2_kg", "lines", "unconverted_lines"]
+
+
+class FXTable:
+    """
+    EUR conversion rates per currency, versioned by valid_from (each rate
+    applies until the next one, the last one indefinitely).
+    Expected columns: currency, valid_from, rate_to_eur
+    """
+
+    def __init__(self, records: pd.DataFrame):
+        records = records.copy()
+        records["currency"] = records["currency"].str.upper().str.strip()
+        records["valid_from"] = pd.to_datetime(records["valid_from"])
+        records = records.sort_values(["currency", "valid_from"])
+        self.version = hashlib.sha256(
+            records.to_csv(index=False).encode("utf-8")
+        ).hexdigest()[:12]
+
+        self._rates = {
+            currency: (
+                group["valid_from"].to_numpy(dtype="datetime64[ns]"),
+                group["rate_to_eur"].to_numpy(dtype="float64"),
+            )
+            for currency, group in records.groupby("currency")
+        }
+
+    def rates(self, currencies: pd.Series, dates: pd.Series) -> np.ndarray:
+        """
+        EUR rate valid on each line's date (the latest rate when the date is
+        missing). Unknown currencies and dates before a currency's first rate
+        give NaN.
+        """
+        rates = np.full(len(currencies), np.nan)
+        codes, uniques = pd.factorize(currencies.str.upper().str.strip())
+        days = pd.to_datetime(dates).to_numpy(dtype="datetime64[ns]")
+        missing_date = np.isnat(days)
+
+        for code, currency in enumerate(uniques):
+            if currency not in self._rates:
+                continue
+            valid_from, values = self._rates[currency]
+            rows = np.flatnonzero(codes == code)
+
+            idx = np.searchsorted(valid_from, days[rows], side="right") - 1
+            idx[missing_date[rows]] = len(values) - 1
+            hit = idx >= 0
+            rates[rows[hit]] = values[idx[hit]]
+
+        return rates
+
+    def to_eur(self, amounts: pd.Series, currencies: pd.Series, dates: pd.Series) -> np.ndarray:
+        return amounts.to_numpy(dtype="float64") * self.rates(currencies, dates)
+
+
+@lru_cache(maxsize=8)
+def load_fx_table(path: str = FX_TABLE_PATH) -> FXTable:
+    return FXTable(pd.read_csv(path))
+
+
+def _empty_aggregate() -> pd.DataFrame:
+    return pd.DataFrame(
+        {col: pd.Series(dtype="int64" if col.endswith("lines") else "float64") for col in SUM_COLUMNS},
+        index=pd.MultiIndex.from_arrays([[], []], names=GROUP_KEYS),
+    )
+
+
+def ledger_chunk_aggregate(chunk: pd.DataFrame, fx: FXTable, catalogue, unconverted: set = None) -> pd.DataFrame:
+    """
+    Converts one chunk of invoice lines to EUR, applies spend factors and
+    sums it per (supplier, category). Currencies of lines without an EUR
+    rate are added to `unconverted`, if given.
+    """
+    rates = fx.rates(chunk["currency"], chunk["date"])
+    spend_eur = chunk["amount"].to_numpy(dtype="float64") * rates
+    factors = catalogue.resolve(chunk["category"])["emission_factor"].to_numpy()
+    missing_rate = np.isnan(rates)
+
+    if unconverted is not None and missing_rate.any():
+        currencies = chunk["currency"][missing_rate].fillna("").astype(str).str.upper().str.strip()
+        unconverted.update(currencies.replace("", "<blank>"))
+
+    lines = pd.DataFrame({
+        "supplier": chunk["supplier"],
+        "category": chunk["category"],
+        "annual_spend_eur": spend_eur,
+        "scope3_co2_kg": spend_eur * factors,
+        "lines": 1,
+        "unconverted_lines": missing_rate.astype("int64"),
+    })
+    return lines.groupby(GROUP_KEYS, dropna=False, sort=False)[SUM_COLUMNS].sum()
+
+
+def merge_ledger_aggregates(left: pd.DataFrame, right: pd.DataFrame) -> pd.DataFrame:
+    if left is None:
+        return right
+    return pd.concat([left, right]).groupby(level=GROUP_KEYS, dropna=False, sort=False).sum()
+
+
+def stream_ledger_emissions(
+    source,
+    fx=None,
+    catalogue=None,
+    chunksize: int = LEDGER_CHUNK_SIZE,
+    allow_unconverted: bool = False,
+) -> pd.DataFrame:
+    """
+    Supplier × category Scope 3 estimate for a raw AP ledger
+    (supplier, category, amount, currency, date).
+
+    The ledger is read `chunksize` lines at a time and folded into running
+    group sums, so memory is bounded by the number of supplier/category pairs
+    rather than by the number of invoice lines. The result carries the same
+    columns as estimate_scope3_emissions (also when the ledger is empty) and
+    works with aggregate_scope3_kpi.
+
+    Raises ValueError when any line has no EUR rate (unknown currency, or a
+    date before the currency's first rate) unless `allow_unconverted`: the
+    estimate would silently leave that spend out. Such lines are counted in
+    unconverted_lines.
+    """
+    fx = fx or load_fx_table()
+    catalogue = catalogue or load_scope3_catalogue()
+
+    aggregate = None
+    unconverted = set()
+    for chunk in iter_ledger_batches(source, batch_rows=chunksize):
+        aggregate = merge_ledger_aggregates(aggregate, ledger_chunk_aggregate(chunk, fx, catalogue, unconverted))
+
+    if aggregate is None:
+        aggregate = _empty_aggregate()
+    if unconverted and not allow_unconverted:
+        raise ValueError(
+            f"{int(aggregate['unconverted_lines'].sum())} ledger lines have no EUR rate for their "
+            f"currency and date ({', '.join(sorted(unconverted))}); add the rates to the FX table (data/fx_rates.csv)"
+        )
+
+    result = aggregate.sort_index().reset_index()
+    resolved = catalogue.resolve(result["category"])
+    result["emission_factor"] = resolved["emission_factor"]
+    result["factor_code"] = resolved["factor_code"]
+    result["factor_resolution"] = resolved["factor_resolution"]
+
+    return result
@@ -1,23 +1,71 @@
-def generate_audit_trace(df, kpis):
-    return {
-        "Data Completeness": {
-            "score": 30,
-            "reason": "All required ESG data columns are present",
-            "improvement": "No action required",
-        },
-        "Emissions Coverage": {
-            "score": 30,
-            "reason": "Scope 1 and Scope 2 emissions are calculated",
-            "improvement": "Include Scope 3 supplier emissions",
-        },
-        "Renewable Transparency": {
-            "score": 6 if kpis["Renewable Energy (%)"] < 20 else 12,
-            "reason": f"Renewable energy share is {kpis['Renewable Energy (%)']}%",
-            "improvement": "Increase renewable sourcing to improve score",
-        },
-        "Framework Alignment": {
-            "score": 20,
-            "reason": "CSRD, GRI, SASB, and TCFD mappings available",
-            "improvement": "Expand framework coverage depth",
-        },
-    }
+from audit.audit_score import MAX_SCORES, RENEWABLE_TIERS, REQUIRED_COLUMNS, calculate_audit_readiness_score
+from explainability.lineage import describe_lineage
+
+
+def _completeness(df, kpis):
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if not missing:
+        return "All required ESG data columns are present", "No action required"
+    return (
+        f"Missing required columns: {', '.join(missing)}",
+        f"Provide {', '.join(missing)} in the ESG data upload",
+    )
+
+
+def _emissions(df, kpis):
+    scope1 = kpis["Scope 1 CO₂ (kg)"] > 0
+    scope2 = kpis["Scope 2 CO₂ (kg)"] > 0
+    if scope1 and scope2:
+        return "Scope 1 and Scope 2 emissions are calculated", "Include Scope 3 supplier emissions"
+    if scope1 or scope2:
+        present, absent = ("Scope 1", "Scope 2") if scope1 else ("Scope 2", "Scope 1")
+        return f"Only {present} emissions are non-zero", f"Report {absent} activity data"
+    return "No Scope 1 or Scope 2 emissions could be calculated", "Report fuel and electricity consumption"
+
+
+def _renewable(df, kpis):
+    share = kpis["Renewable Energy (%)"]
+    reason = f"Renewable energy share is {share}%"
+    full = RENEWABLE_TIERS[0][0]
+    if share >= full:
+        return reason, "No action required"
+    if not share > 0:
+        return reason, "Report renewable energy sourcing"
+    target = min(minimum for minimum, _ in RENEWABLE_TIERS if minimum > share)
+    goal = "for the full score" if target == full else "to improve the score"
+    return reason, f"Reach a {target}% renewable share {goal}"
+
+
+def _frameworks(df, kpis):
+    return "CSRD, GRI, SASB, and TCFD mappings available", "Expand framework coverage depth"
+
+
+EXPLANATIONS = {
+    "Data Completeness": _completeness,
+    "Emissions Coverage": _emissions,
+    "Renewable Transparency": _renewable,
+    "CSRD / GRI Alignment": _frameworks,
+}
+
+
+def generate_audit_trace(df, kpis, audit=None, lineage=None):
+    """
+    Explains each audit breakdown item from the data behind it: the score
+    actually awarded, why, how to improve it and, when lineage is given
+    (see explainability.lineage), the rows, factors and rules it rests on.
+    """
+    audit = audit or calculate_audit_readiness_score(df, kpis)
+
+    trace = {}
+    for item, score in audit["breakdown"].items():
+        reason, improvement = EXPLANATIONS[item](df, kpis)
+        trace[item] = {
+            "score": score,
+            "max_score": MAX_SCORES[item],
+            "reason": reason,
+            "improvement": improvement,
+        }
+        if lineage is not None:
+            trace[item]["lineage"] = describe_lineage(lineage["audit"][item])
+
+    return trace
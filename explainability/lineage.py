@@ -0,0 +1,259 @@
+"""
+KPI Lineage
+Which input rows, emission factors and validation rules each KPI and audit item rests on
+"""
+
+import numpy as np
+import pandas as pd
+
+from audit.audit_score import REQUIRED_COLUMNS
+from esg.emission_factors import DEFAULT_FUEL, GRID_SOURCE, load_factor_table
+
+PAGE_SIZE = 50
+
+
+# -----------------------------
+# Compact row sets
+# -----------------------------
+class RowSet:
+    """
+    A set of row positions of one frame, stored as a [start, stop) range when
+    the rows are contiguous and as a packed bitset (n_rows / 8 bytes)
+    otherwise. Positions are only materialized when drilled into.
+    """
+
+    __slots__ = ("n_rows", "start", "stop", "bits", "count")
+
+    def __init__(self, n_rows: int, start: int = 0, stop: int = 0, bits: np.ndarray = None, count: int = None):
+        self.n_rows = n_rows
+        self.start = start
+        self.stop = stop
+        self.bits = bits
+        self.count = stop - start if bits is None else count
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> "RowSet":
+        mask = np.asarray(mask, dtype=bool)
+        n_rows, count = len(mask), int(mask.sum())
+        if count == 0:
+            return cls(n_rows)
+        if count == n_rows:
+            return cls(n_rows, 0, n_rows)
+
+        start = int(mask.argmax())
+        if mask[start:start + count].all():
+            return cls(n_rows, start, start + count)
+        return cls(n_rows, bits=np.packbits(mask), count=count)
+
+    @classmethod
+    def all(cls, n_rows: int) -> "RowSet":
+        return cls(n_rows, 0, n_rows)
+
+    @property
+    def representation(self) -> str:
+        return "range" if self.bits is None else "bitset"
+
+    @property
+    def nbytes(self) -> int:
+        return 16 if self.bits is None else self.bits.nbytes
+
+    def __len__(self):
+        return self.count
+
+    def mask(self) -> np.ndarray:
+        if self.bits is None:
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[self.start:self.stop] = True
+            return mask
+        return np.unpackbits(self.bits, count=self.n_rows).astype(bool)
+
+    def positions(self) -> np.ndarray:
+        if self.bits is None:
+            return np.arange(self.start, self.stop)
+        return np.flatnonzero(self.mask())
+
+    def n_pages(self, page_size: int = PAGE_SIZE) -> int:
+        return max(1, -(-self.count // page_size))
+
+    def page(self, page: int, page_size: int = PAGE_SIZE) -> np.ndarray:
+        first = page * page_size
+        if self.bits is None:
+            return np.arange(self.start + first, min(self.start + first + page_size, self.stop))
+        return self.positions()[first:first + page_size]
+
+    def __and__(self, other: "RowSet") -> "RowSet":
+        return RowSet.from_mask(self.mask() & other.mask())
+
+    def __or__(self, other: "RowSet") -> "RowSet":
+        return RowSet.from_mask(self.mask() | other.mask())
+
+    def describe(self) -> dict:
+        return {
+            "rows": self.count,
+            "of": self.n_rows,
+            "representation": self.representation,
+            "bytes": self.nbytes,
+        }
+
+
+def _present(df: pd.DataFrame, *columns) -> RowSet:
+    """
+    Rows where any of `columns` has a value, i.e. the rows a sum over them draws on.
+    """
+    columns = [col for col in columns if col in df.columns]
+    if not columns:
+        return RowSet(len(df))
+
+    mask = df[columns[0]].notna().to_numpy()
+    for col in columns[1:]:
+        mask = mask | df[col].notna().to_numpy()
+    return RowSet.from_mask(mask)
+
+
+# -----------------------------
+# Factor lineage
+# -----------------------------
+def _factor_usage(factors, source, df: pd.DataFrame, rows: RowSet, keys) -> dict:
+    """
+    Factor records applied to `rows`, keyed "region/source@valid_from".
+    """
+    regions = df["region"] if "region" in df.columns else None
+    dates = df["date"] if "date" in df.columns else None
+    positions = factors.lookup_records(source, regions, dates, keys)
+
+    if np.ndim(positions) == 0:
+        used = {int(positions): rows}
+    else:
+        applied = rows.mask()
+        used = {
+            int(record): RowSet.from_mask((positions == record) & applied)
+            for record in np.flatnonzero(np.bincount(positions[positions >= 0], minlength=len(factors.records)))
+        }
+
+    usage = {}
+    for record, record_rows in used.items():
+        if not len(record_rows):
+            continue
+        entry = factors.records.iloc[record]
+        valid_from = entry["valid_from"].date().isoformat()
+        usage[f"{entry['region']}/{entry['source']}@{valid_from}"] = {
+            "region": entry["region"],
+            "source": entry["source"],
+            "valid_from": valid_from,
+            "factor": float(entry["factor"]),
+            "rows": record_rows,
+        }
+    return usage
+
+
+# -----------------------------
+# Lineage capture
+# -----------------------------
+def _rules_for(findings, columns) -> list:
+    """
+    Validation rules reading any of `columns`, with their violation counts.
+    """
+    if findings is None:
+        return []
+
+    columns = set(columns)
+    related = []
+    for rule in findings.rules:
+        rule_columns = {
+            rule.get(field) for field in ("column", "left", "right", "date", "by") if rule.get(field)
+        } | set(rule.get("keys", []))
+        if rule["id"] in findings.rows and rule_columns & columns:
+            related.append({"rule": rule["id"], "violations": len(findings.rows[rule["id"]])})
+    return related
+
+
+def capture_lineage(df: pd.DataFrame, kpis: dict, audit: dict, findings=None, factors=None) -> dict:
+    """
+    Lineage of every KPI and audit breakdown item for an emissions frame
+    (the output of calculate_emissions).
+
+    Returns:
+        dict: {
+            "rows": int,
+            "kpis": {kpi: {"value", "columns", "rows": RowSet, "factors": [ids]}},
+            "audit": {item: {"score", "columns", "kpis", "rows": RowSet, "factors", "rules"}},
+            "factors": {id: {"region", "source", "valid_from", "factor", "rows": RowSet}},
+        }
+    """
+    factors = factors or load_factor_table()
+    n_rows = len(df)
+
+    scope_1_rows = _present(df, "scope_1_co2_kg")
+    scope_2_rows = _present(df, "scope_2_co2_kg")
+
+    fuel_source = df["fuel_type"] if "fuel_type" in df.columns else DEFAULT_FUEL
+    keys = factors.row_keys(
+        df["region"] if "region" in df.columns else None,
+        df["date"] if "date" in df.columns else None,
+    )
+    grid_usage = _factor_usage(factors, GRID_SOURCE, df, scope_2_rows, keys)
+    fuel_usage = _factor_usage(factors, fuel_source, df, scope_1_rows, keys)
+    grid_ids, fuel_ids = list(grid_usage), list(fuel_usage)
+
+    kpi_sources = {
+        "Total Energy (kWh)": (["energy_kwh"], _present(df, "energy_kwh"), []),
+        "Renewable Energy (%)": (
+            ["renewable_kwh", "energy_kwh"], _present(df, "renewable_kwh", "energy_kwh"), []
+        ),
+        "Scope 1 CO₂ (kg)": (["fuel_liters"], scope_1_rows, fuel_ids),
+        "Scope 2 CO₂ (kg)": (["energy_kwh", "renewable_kwh"], scope_2_rows, grid_ids),
+        "Total CO₂ (kg)": (
+            ["fuel_liters", "energy_kwh", "renewable_kwh"], _present(df, "total_co2_kg"), fuel_ids + grid_ids
+        ),
+    }
+    kpi_lineage = {
+        kpi: {"value": kpis.get(kpi), "columns": columns, "rows": rows, "factors": used}
+        for kpi, (columns, rows, used) in kpi_sources.items()
+    }
+
+    item_sources = {
+        "Data Completeness": (REQUIRED_COLUMNS, [], RowSet.all(n_rows), []),
+        "Emissions Coverage": (
+            ["fuel_liters", "energy_kwh", "renewable_kwh", "scope_1_co2_kg", "scope_2_co2_kg", "total_co2_kg"],
+            ["Scope 1 CO₂ (kg)", "Scope 2 CO₂ (kg)"],
+            scope_1_rows | scope_2_rows,
+            fuel_ids + grid_ids,
+        ),
+        "Renewable Transparency": (
+            ["renewable_kwh", "energy_kwh"],
+            ["Renewable Energy (%)"],
+            kpi_lineage["Renewable Energy (%)"]["rows"],
+            [],
+        ),
+        "CSRD / GRI Alignment": ([], [], RowSet(n_rows), []),
+    }
+    audit_lineage = {
+        item: {
+            "score": audit["breakdown"].get(item),
+            "columns": columns,
+            "kpis": kpi_names,
+            "rows": rows,
+            "factors": used,
+            "rules": _rules_for(findings, columns),
+        }
+        for item, (columns, kpi_names, rows, used) in item_sources.items()
+    }
+
+    return {
+        "rows": n_rows,
+        "kpis": kpi_lineage,
+        "audit": audit_lineage,
+        "factors": {**grid_usage, **fuel_usage},
+    }
+
+
+def lineage_nbytes(lineage: dict) -> int:
+    row_sets = [entry["rows"] for section in ("kpis", "audit", "factors") for entry in lineage[section].values()]
+    return sum(rows.nbytes for rows in row_sets)
+
+
+def describe_lineage(entry: dict) -> dict:
+    """
+    JSON-friendly copy of a lineage entry (row sets summarized, not expanded).
+    """
+    return {key: value.describe() if isinstance(value, RowSet) else value for key, value in entry.items()}
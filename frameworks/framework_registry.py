@@ -1,11 +1,22 @@
-from frameworks.csrd_gri_mapping import get_csrd_gri_mapping
-from frameworks.sasb_mapping import get_sasb_mapping
-from frameworks.tcfd_mapping import get_tcfd_mapping
+import importlib
+
+# Framework name -> (module, mapping function); a module is only imported
+# when its mapping is first requested
+FRAMEWORK_MAPPINGS = {
+    "CSRD / GRI": ("frameworks.csrd_gri_mapping", "get_csrd_gri_mapping"),
+    "SASB": ("frameworks.sasb_mapping", "get_sasb_mapping"),
+    "TCFD": ("frameworks.tcfd_mapping", "get_tcfd_mapping"),
+}
+
+
+def get_framework_names():
+    return list(FRAMEWORK_MAPPINGS)
+
+
+def get_framework_mapping(name):
+    module, function = FRAMEWORK_MAPPINGS[name]
+    return getattr(importlib.import_module(module), function)()
 
 
 def get_all_framework_mappings():
-    return {
-        "CSRD / GRI": get_csrd_gri_mapping(),
-        "SASB": get_sasb_mapping(),
-        "TCFD": get_tcfd_mapping(),
-    }
+    return {name: get_framework_mapping(name) for name in FRAMEWORK_MAPPINGS}
@@ -1,13 +1,19 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from esg.emissions import calculate_emissions, aggregate_kpis
+from esg.rollup_cube import GRANULARITIES
+from pipeline.runner import cached_core_pipeline, read_bytes
 
 st.title("📊 ESG Overview")
 
-df = pd.read_csv("data/sample_company_data.csv")
-df = calculate_emissions(df)
-kpis = aggregate_kpis(df)
+if "cube" in st.session_state:
+    cube = st.session_state["cube"]
+else:
+    sample = "data/sample_company_data.csv"
+    cube = cached_core_pipeline(read_bytes(sample), sample)["cube"]
+
+selected_facilities = st.multiselect("Facilities", cube.facilities())
+granularity = st.selectbox("Granularity", list(GRANULARITIES))
+
+kpis = cube.kpis(selected_facilities)
 
 col1, col2, col3, col4, col5 = st.columns(5)
 col1.metric("Total Energy (kWh)", kpis["Total Energy (kWh)"])
@@ -16,8 +22,9 @@ col3.metric("Scope 1 CO₂ (kg)", kpis["Scope 1 CO₂ (kg)"])
 col4.metric("Scope 2 CO₂ (kg)", kpis["Scope 2 CO₂ (kg)"])
 col5.metric("Total CO₂ (kg)", kpis["Total CO₂ (kg)"])
 
-df["date"] = pd.to_datetime(df["date"])
-trend_df = df.groupby("date", as_index=False)["total_co2_kg"].sum()
+trend_df = cube.trend(granularity, selected_facilities)
+
+import plotly.express as px
 
 fig = px.line(trend_df, x="date", y="total_co2_kg")
 st.plotly_chart(fig, use_container_width=True)
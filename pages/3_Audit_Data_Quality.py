@@ -1,9 +1,8 @@
 import streamlit as st
 import pandas as pd
 
-from audit.audit_score import calculate_audit_readiness_score
 from explainability.audit_trace import generate_audit_trace
-from quality.data_quality import assess_data_quality
+from explainability.lineage import describe_lineage
 
 # -----------------------------
 # Page Title
@@ -21,9 +20,9 @@ df = st.session_state["df"]
 kpis = st.session_state["kpis"]
 
 # -----------------------------
-# Audit Readiness
+# Audit Readiness (computed once by the cached core pipeline)
 # -----------------------------
-audit = calculate_audit_readiness_score(df, kpis)
+audit = st.session_state["audit"]
 
 st.metric(
     label="Audit Readiness Score (0–100)",
@@ -42,17 +41,58 @@ st.dataframe(breakdown_df, use_container_width=True)
 # -----------------------------
 # Audit Explainability
 # -----------------------------
-trace = generate_audit_trace(df, kpis)
+lineage = st.session_state["lineage"]
+trace = generate_audit_trace(df, kpis, audit, lineage)
 
 with st.expander("🔍 Explain this audit score"):
     st.json(trace)
 
+# -----------------------------
+# KPI Lineage (drill down on demand)
+# -----------------------------
+with st.expander("🧬 Trace a KPI to its source rows"):
+    target = st.selectbox(
+        "KPI or audit area",
+        list(lineage["kpis"]) + list(lineage["audit"]),
+        key="audit_page_lineage"
+    )
+    entry = lineage["kpis"].get(target) or lineage["audit"][target]
+    st.json(describe_lineage(entry))
+
+    if entry["factors"]:
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "Factor": factor_id,
+                    "Value": lineage["factors"][factor_id]["factor"],
+                    "Rows": len(lineage["factors"][factor_id]["rows"]),
+                }
+                for factor_id in entry["factors"]
+            ]),
+            use_container_width=True
+        )
+
+    source_rows = entry["rows"]
+    if len(source_rows):
+        lineage_page = st.number_input(
+            f"Source rows page (of {source_rows.n_pages()})",
+            min_value=1,
+            max_value=source_rows.n_pages(),
+            value=1,
+            key="audit_page_lineage_page"
+        )
+        st.dataframe(
+            df.iloc[source_rows.page(lineage_page - 1)],
+            use_container_width=True
+        )
+
 # -----------------------------
 # Data Quality & Validation
 # -----------------------------
 st.subheader("🧪 Data Quality & Validation")
 
-quality = assess_data_quality(df)
+quality = st.session_state["quality"]
+findings = st.session_state["findings"]
 
 if quality["issues"]:
     st.warning("⚠️ Data quality issues detected")
@@ -76,6 +116,51 @@ flags_df = pd.DataFrame(
 st.dataframe(flags_df, use_container_width=True)
 
 st.caption(
-    "Measured = Directly captured | Estimated = Model-based | "
+    "Measured = Directly captured | Flagged = Measured, with outlier readings | "
+    "Estimated = Model-based | "
     "Assumed = Incomplete or inferred data"
 )
+
+# -----------------------------
+# Outlier Readings (row level)
+# -----------------------------
+st.subheader("📍 Outlier Readings")
+
+outliers = quality["outliers"]
+if len(outliers):
+    st.dataframe(outliers, use_container_width=True)
+    st.caption(
+        "Row = source row | Expected = the facility's median in this upload (mad) "
+        "or its running average from earlier data (ewma) | Score = distance from "
+        "Expected in robust z units; readings above 3.5 are flagged"
+    )
+else:
+    st.success("✅ No outlier readings against facility history")
+
+# -----------------------------
+# Rule Violations (row level, paged)
+# -----------------------------
+st.subheader("🔎 Rule Violations")
+
+summary = findings.summary()
+st.dataframe(summary, use_container_width=True)
+
+violated = findings.violated()
+if violated:
+    rule_id = st.selectbox("Inspect rule", violated, key="audit_page_rule")
+    page = st.number_input(
+        f"Page (of {findings.n_pages(rule_id)})",
+        min_value=1,
+        max_value=findings.n_pages(rule_id),
+        value=1,
+        key="audit_page_page"
+    )
+    st.dataframe(
+        df.iloc[findings.page(rule_id, page - 1)],
+        use_container_width=True
+    )
+else:
+    st.success("✅ All configured validation rules pass")
+
+if findings.skipped:
+    st.caption(f"Not evaluated (columns not present): {', '.join(findings.skipped)}")
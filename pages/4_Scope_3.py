@@ -1,10 +1,10 @@
 import streamlit as st
-import pandas as pd
-from esg.scope3 import estimate_scope3_emissions, aggregate_scope3_kpi
+from pipeline.runner import cached_scope3_pipeline, read_bytes
 
 st.title("🌍 Scope 3 Emissions")
 
-df = pd.read_csv("data/sample_scope3_spend.csv")
-result = estimate_scope3_emissions(df)
-st.metric("Estimated Scope 3 CO₂ (kg)", aggregate_scope3_kpi(result))
-st.dataframe(result)
+sample = "data/sample_scope3_spend.csv"
+scope3 = cached_scope3_pipeline(read_bytes(sample), sample)
+
+st.metric("Estimated Scope 3 CO₂ (kg)", scope3["total"])
+st.dataframe(scope3["result"])
@@ -1,8 +1,7 @@
 import streamlit as st
 import pandas as pd
 
-from reports.pdf_report import generate_esg_pdf
-from reports.csrd_gap_analysis import generate_csrd_gap_pdf
+from reports.downloads import report_download
 from versioning.period_comparison import compare_periods
 
 st.title("📄 Reports & Versioning")
@@ -12,17 +11,8 @@ audit_score = st.session_state["audit_score"]
 
 st.subheader("📥 Report Downloads")
 
-st.download_button(
-    "⬇️ ESG Environmental Report",
-    generate_esg_pdf(kpis),
-    file_name="esg_environmental_report.pdf",
-)
-
-st.download_button(
-    "⬇️ CSRD Gap Analysis Report",
-    generate_csrd_gap_pdf(kpis, audit_score),
-    file_name="csrd_gap_analysis_report.pdf",
-)
+report_download("esg_environmental", "ESG Environmental Report", "esg_environmental_report.pdf", kpis)
+report_download("csrd_gap", "CSRD Gap Analysis Report", "csrd_gap_analysis_report.pdf", kpis, audit_score)
 
 st.subheader("📅 Year-over-Year Comparison")
 
@@ -0,0 +1,422 @@
+"""
+Headless Batch Reporting
+The full reporting pipeline over many entities on a process pool, without Streamlit
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from audit.csrd_maturity import calculate_csrd_maturity
+from esg.ingestion import ARROW_EXTENSIONS, PARQUET_EXTENSIONS, load_esg_data
+from finance.esg_finance_mapping import get_esg_financial_linkage
+from pipeline.cache import content_hash
+from pipeline.runner import config_version, read_bytes, run_core_pipeline, run_scope3_pipeline, scope3_config_version
+from reports.csrd_gap_analysis import generate_csrd_gap_pdf
+from reports.narrative_builder import generate_esg_narrative
+from reports.pdf_report import generate_esg_pdf
+
+INPUT_EXTENSIONS = (".csv",) + PARQUET_EXTENSIONS + ARROW_EXTENSIONS
+
+# In a directory, "<entity>.scope3.<ext>" is the Scope 3 input of "<entity>.<ext>"
+SCOPE3_SUFFIX = ".scope3"
+
+STATE_FILE = "batch_state.json"
+SUMMARY_FILE = "run_summary.json"
+REPORT_FILE = "report.json"
+
+PDF_FILES = {
+    "esg_environmental": "esg_environmental_report.pdf",
+    "csrd_gap": "csrd_gap_analysis_report.pdf",
+}
+
+# Imported once by the forkserver instead of by every worker
+PRELOAD_MODULES = [
+    "pipeline.runner",
+    "finance.esg_finance_mapping",
+    "reports.csrd_gap_analysis",
+    "reports.narrative_builder",
+    "reports.pdf_report",
+]
+
+STATUS_OK = "ok"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+
+
+# -----------------------------
+# Inputs
+# -----------------------------
+def _split_name(path: str):
+    name = os.path.basename(path)
+    for ext in INPUT_EXTENSIONS:
+        if name.lower().endswith(ext):
+            return name[:-len(ext)], ext
+    return None, None
+
+
+def _check_entity_name(name: str) -> str:
+    """
+    Entity names become directory names under the output directory, so a
+    name must be a single path component: no separators, not "." or "..",
+    and not one of the batch's own files.
+    """
+    separators = {"/", "\\", os.sep, os.altsep} - {None}
+    if (
+        not name
+        or not name.strip()
+        or name in (".", "..", STATE_FILE, SUMMARY_FILE)
+        or any(sep in name for sep in separators)
+    ):
+        raise ValueError(f"Invalid entity name {name!r}: it becomes a directory under the output, so it must be a single plain name")
+    return name
+
+
+def entity_dir(output_dir: str, entity: str) -> str:
+    """
+    The directory of `entity`'s outputs, always directly inside `output_dir`.
+    """
+    target = os.path.join(output_dir, _check_entity_name(entity))
+    root = os.path.abspath(output_dir)
+    if os.path.dirname(os.path.abspath(target)) != root:
+        raise ValueError(f"Entity {entity!r} would be written outside {output_dir}")
+    return target
+
+
+def jobs_from_directory(directory: str) -> list:
+    """
+    One job per ESG input file in `directory`, named after the file stem.
+    """
+    files = sorted(os.listdir(directory))
+    stems = {}
+    for name in files:
+        stem, _ = _split_name(name)
+        if stem is not None:
+            stems.setdefault(stem, os.path.join(directory, name))
+
+    jobs = []
+    for stem, path in stems.items():
+        if stem.endswith(SCOPE3_SUFFIX):
+            continue
+        jobs.append({"entity": _check_entity_name(stem), "esg": path, "scope3": stems.get(stem + SCOPE3_SUFFIX)})
+    return jobs
+
+
+def jobs_from_manifest(path: str) -> list:
+    """
+    Manifest CSV with columns entity, esg and optionally scope3 and year.
+    Relative paths are taken relative to the manifest. Raises ValueError
+    for an entity name that is not a plain name (see _check_entity_name).
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    jobs = []
+    for row in rows:
+        if not row.get("entity") or not row.get("esg"):
+            raise ValueError(f"Manifest row without entity / esg: {row}")
+        jobs.append({
+            "entity": _check_entity_name(row["entity"]),
+            "esg": os.path.join(base, row["esg"]),
+            "scope3": os.path.join(base, row["scope3"]) if row.get("scope3") else None,
+            "year": int(row["year"]) if row.get("year") else None,
+        })
+
+    names = [job["entity"] for job in jobs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate entities in manifest: {', '.join(duplicates)}")
+    return jobs
+
+
+def input_hash(job: dict, year: int) -> str:
+    """
+    Fingerprint of everything an entity's outputs depend on: its input bytes,
+    the reporting year and the factor / pipeline version (plus the Scope 3
+    catalogue and FX table versions when it has a Scope 3 input).
+    """
+    parts = [read_bytes(job["esg"]), os.path.basename(job["esg"]), config_version()]
+    if job.get("scope3"):
+        parts += [read_bytes(job["scope3"]), os.path.basename(job["scope3"]), scope3_config_version()]
+    return content_hash(*parts, str(year))
+
+
+# -----------------------------
+# One entity
+# -----------------------------
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.DataFrame):
+        return value.to_dict(orient="records")
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _write(path: str, data: bytes):
+    # Written next to the target and renamed, so an interrupted run never
+    # leaves a truncated output behind
+    partial = path + ".partial"
+    with open(partial, "wb") as f:
+        f.write(data)
+    os.replace(partial, path)
+
+
+def build_entity_report(job: dict, year: int, workers: int = 1) -> tuple:
+    """
+    Runs the pipeline for one entity, on `workers` processes for a large
+    input (see run_core_pipeline).
+
+    Returns:
+        (report dict, {pdf kind: bytes})
+    """
+    core = run_core_pipeline(load_esg_data(job["esg"]), year, workers=workers)
+    kpis, audit = core["kpis"], core["audit"]
+    score = audit["total_score"]
+
+    scope3_total = None
+    if job.get("scope3"):
+        scope3_total = run_scope3_pipeline(job["scope3"])["total"]
+
+    maturity = calculate_csrd_maturity(
+        year=year,
+        audit_score=score,
+        scope3_present=bool(scope3_total and scope3_total > 0),
+    )
+
+    report = {
+        "entity": job["entity"],
+        "year": year,
+        "rows": len(core["df"]),
+        "kpis": kpis,
+        "scope3_co2_kg": scope3_total,
+        "audit": audit,
+        "quality": core["quality"],
+        "rule_violations": core["findings"].summary().to_dict(orient="records"),
+        "maturity": maturity,
+        "finance": get_esg_financial_linkage(kpis, score, maturity["maturity_level"]),
+        "narrative": generate_esg_narrative(kpis, score, maturity),
+    }
+    pdfs = {
+        "esg_environmental": generate_esg_pdf(kpis),
+        "csrd_gap": generate_csrd_gap_pdf(kpis, score),
+    }
+    return report, pdfs
+
+
+def run_entity(job: dict, output_dir: str, year: int, fingerprint: str, workers: int = 1) -> dict:
+    """
+    Worker entry point: builds and writes one entity's outputs. Failures are
+    returned, not raised, so one bad input never stops the batch.
+    """
+    start = time.perf_counter()
+    year = job.get("year") or year
+    try:
+        target = entity_dir(output_dir, job["entity"])
+        report, pdfs = build_entity_report(job, year, workers)
+        os.makedirs(target, exist_ok=True)
+        for kind, pdf in pdfs.items():
+            _write(os.path.join(target, PDF_FILES[kind]), pdf)
+        # The report goes last: its presence marks the entity as complete
+        payload = json.dumps(report, indent=2, ensure_ascii=False, default=_json_default)
+        _write(os.path.join(target, REPORT_FILE), payload.encode("utf-8"))
+
+        return {
+            "entity": job["entity"],
+            "status": STATUS_OK,
+            "hash": fingerprint,
+            "seconds": round(time.perf_counter() - start, 3),
+            "rows": report["rows"],
+            "audit_score": report["audit"]["total_score"],
+            "maturity_level": report["maturity"]["maturity_level"],
+        }
+    except Exception as exc:
+        return {
+            "entity": job["entity"],
+            "status": STATUS_FAILED,
+            "hash": fingerprint,
+            "seconds": round(time.perf_counter() - start, 3),
+            "error": f"{type(exc).__name__}: {exc}",
+            "traceback": traceback.format_exc(),
+        }
+
+
+# -----------------------------
+# Batch
+# -----------------------------
+def _isolated_context():
+    """
+    A start method that allows one process per task. Fork cannot be used
+    for that, so workers come from a forkserver with the pipeline modules
+    preloaded (cheap per task), or are spawned where no forkserver exists.
+    """
+    if "forkserver" not in mp.get_all_start_methods():
+        return mp.get_context("spawn")
+    context = mp.get_context("forkserver")
+    context.set_forkserver_preload(PRELOAD_MODULES)
+    return context
+
+
+def load_state(output_dir: str) -> dict:
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _is_current(job: dict, fingerprint: str, state: dict, output_dir: str) -> bool:
+    previous = state.get(job["entity"], {})
+    return (
+        previous.get("hash") == fingerprint
+        and previous.get("status") == STATUS_OK
+        and os.path.exists(os.path.join(entity_dir(output_dir, job["entity"]), REPORT_FILE))
+    )
+
+
+def _pending(jobs, output_dir, year, force):
+    """
+    Splits jobs into (jobs to run with their fingerprints, results of the
+    jobs that are up to date, whose inputs cannot be read or whose entity
+    name is not a plain name).
+    """
+    state = load_state(output_dir)
+    pending, done = [], []
+
+    for job in jobs:
+        try:
+            entity_dir(output_dir, job["entity"])
+            fingerprint = input_hash(job, job.get("year") or year)
+        except (OSError, ValueError) as exc:
+            done.append({"entity": job["entity"], "status": STATUS_FAILED, "error": str(exc)})
+            continue
+
+        if not force and _is_current(job, fingerprint, state, output_dir):
+            done.append({**state[job["entity"]], "status": STATUS_SKIPPED})
+        else:
+            pending.append((job, fingerprint))
+
+    return pending, done
+
+
+def run_batch(
+    jobs: list,
+    output_dir: str,
+    workers: int = None,
+    year: int = None,
+    force: bool = False,
+    log=print,
+) -> dict:
+    """
+    Runs every job whose inputs changed since the last successful run, one
+    entity per worker task, then writes the state file and a run summary.
+
+    Returns:
+        dict: the run summary
+    """
+    year = year or datetime.now().year
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    started = time.perf_counter()
+
+    pending, results = _pending(jobs, output_dir, year, force)
+    for result in results:
+        log(f"{result['status']:>8}  {result['entity']}")
+
+    def record(result):
+        results.append(result)
+        detail = result.get("error") or f"{result['seconds']:.2f}s"
+        log(f"{result['status']:>8}  {result['entity']}  ({detail})")
+
+    if workers == 1 or len(pending) <= 1:
+        # A single entity gets the workers for its own facilities instead
+        for job, fingerprint in pending:
+            record(run_entity(job, output_dir, year, fingerprint, workers))
+    else:
+        # One short-lived process per task keeps a crash or leak in one
+        # entity's run from affecting the next
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(pending)),
+            mp_context=_isolated_context(),
+            max_tasks_per_child=1,
+        ) as pool:
+            futures = {
+                pool.submit(run_entity, job, output_dir, year, fingerprint): (job, fingerprint)
+                for job, fingerprint in pending
+            }
+            for future in as_completed(futures):
+                job, fingerprint = futures[future]
+                try:
+                    record(future.result())
+                except BrokenProcessPool as exc:
+                    record({
+                        "entity": job["entity"],
+                        "status": STATUS_FAILED,
+                        "hash": fingerprint,
+                        "seconds": 0.0,
+                        "error": f"Worker process died: {exc}",
+                    })
+
+    results.sort(key=lambda result: result["entity"])
+    state = load_state(output_dir)
+    for result in results:
+        if result["status"] == STATUS_OK:
+            state[result["entity"]] = result
+
+    summary = {
+        "finished": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "year": year,
+        "config_version": config_version(),
+        "seconds": round(time.perf_counter() - started, 3),
+        "counts": {
+            status: sum(result["status"] == status for result in results)
+            for status in (STATUS_OK, STATUS_SKIPPED, STATUS_FAILED)
+        },
+        "entities": results,
+    }
+
+    for name, payload in ((STATE_FILE, state), (SUMMARY_FILE, summary)):
+        _write(os.path.join(output_dir, name), json.dumps(payload, indent=2, default=_json_default).encode("utf-8"))
+    return summary
+
+
+# -----------------------------
+# Command line
+# -----------------------------
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the ESG reporting pipeline for many entities.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input-dir", help="Directory of ESG inputs, one file per entity")
+    source.add_argument("--manifest", help="CSV with columns entity, esg[, scope3, year]")
+    parser.add_argument("--output", required=True, help="Output directory")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--year", type=int, help="Reporting year (default: current year)")
+    parser.add_argument("--force", action="store_true", help="Rebuild entities whose inputs are unchanged")
+    args = parser.parse_args(argv)
+
+    jobs = jobs_from_directory(args.input_dir) if args.input_dir else jobs_from_manifest(args.manifest)
+    summary = run_batch(jobs, args.output, args.workers, args.year, args.force)
+
+    counts = summary["counts"]
+    print(
+        f"{counts[STATUS_OK]} built, {counts[STATUS_SKIPPED]} unchanged, "
+        f"{counts[STATUS_FAILED]} failed in {summary['seconds']:.1f}s"
+    )
+    return 1 if counts[STATUS_FAILED] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""
+Pipeline Instrumentation
+Named spans with wall time, CPU time, peak memory and row counts, exportable as JSON or Chrome trace
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import pandas as pd
+
+# Set to 1 to record spans from process start (e.g. for batch runs)
+TRACE_ENV_VAR = "ESG_TRACE"
+
+# Oldest spans are dropped beyond this, so a long-lived app cannot grow unbounded
+MAX_SPANS = 10_000
+
+
+class _NullSpan:
+    """
+    What span() returns while tracing is off: no clock reads, no allocation.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "attrs", "start_ns", "cpu_start", "mem_start", "peak_seen", "depth")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.depth = len(stack)
+
+        # tracemalloc keeps one process-wide peak: remember the enclosing
+        # span's peak so far, then measure this span's own peak from here
+        if stack:
+            stack[-1].peak_seen = max(stack[-1].peak_seen, tracemalloc.get_traced_memory()[1])
+        self.mem_start = tracemalloc.get_traced_memory()[0]
+        self.peak_seen = self.mem_start
+        tracemalloc.reset_peak()
+        stack.append(self)
+
+        self.cpu_start = time.thread_time()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        cpu = time.thread_time() - self.cpu_start
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, self.peak_seen)
+
+        stack = self.tracer._stack()
+        stack.pop()
+        if stack:
+            stack[-1].peak_seen = max(stack[-1].peak_seen, peak)
+
+        self.tracer._record({
+            "name": self.name,
+            "start_ms": (self.start_ns - self.tracer.epoch_ns) / 1e6,
+            "wall_ms": (end_ns - self.start_ns) / 1e6,
+            "cpu_ms": cpu * 1e3,
+            "peak_mem_delta_kb": (peak - self.mem_start) / 1024,
+            "mem_delta_kb": (current - self.mem_start) / 1024,
+            "rows": self.attrs.pop("rows", None),
+            "depth": self.depth,
+            "thread": threading.current_thread().name,
+            "thread_id": threading.get_ident(),
+            "error": exc_type.__name__ if exc_type else None,
+            "attrs": self.attrs,
+        })
+        return False
+
+
+# tracemalloc is process-wide while tracers come and go (one per app
+# session): it runs while any tracer is enabled, and is stopped with the
+# last one unless something else had started it
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_started_tracemalloc = False
+
+
+def _acquire_tracemalloc():
+    global _tracemalloc_users, _started_tracemalloc
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracemalloc = True
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc():
+    global _tracemalloc_users, _started_tracemalloc
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _started_tracemalloc:
+            tracemalloc.stop()
+            _started_tracemalloc = False
+
+
+class Tracer:
+    """
+    Collects spans while enabled. Memory is measured with tracemalloc, which
+    is started on enable() (and slows allocation-heavy code while on), so
+    tracing is meant to be switched on for diagnostics, not left on.
+    """
+
+    def __init__(self, max_spans: int = MAX_SPANS):
+        self.enabled = False
+        self.epoch_ns = time.perf_counter_ns()
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self):
+        with self._lock:
+            if self.enabled:
+                return
+            self.enabled = True
+        _acquire_tracemalloc()
+
+    def disable(self):
+        with self._lock:
+            if not self.enabled:
+                return
+            self.enabled = False
+        _release_tracemalloc()
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self.epoch_ns = time.perf_counter_ns()
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _record(self, span: dict):
+        with self._lock:
+            self._spans.append(span)
+
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, attrs)
+
+    # -----------------------------
+    # Views and export
+    # -----------------------------
+    def spans(self) -> list:
+        with self._lock:
+            return list(self._spans)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        One row per span name: calls, total / max wall time, CPU time,
+        largest peak memory delta and rows processed.
+        """
+        spans = pd.DataFrame(self.spans())
+        if spans.empty:
+            return pd.DataFrame(columns=["calls", "wall_ms", "max_wall_ms", "cpu_ms", "peak_mem_delta_kb", "rows"])
+
+        return spans.groupby("name", sort=False).agg(
+            calls=("name", "size"),
+            wall_ms=("wall_ms", "sum"),
+            max_wall_ms=("wall_ms", "max"),
+            cpu_ms=("cpu_ms", "sum"),
+            peak_mem_delta_kb=("peak_mem_delta_kb", "max"),
+            rows=("rows", "sum"),
+        ).sort_values("wall_ms", ascending=False)
+
+    def to_json(self) -> str:
+        return json.dumps({"spans": self.spans()}, default=str, indent=2)
+
+    def to_chrome_trace(self) -> str:
+        """
+        Trace Event Format, loadable in chrome://tracing or Perfetto.
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": span["name"],
+                "ph": "X",
+                "ts": span["start_ms"] * 1e3,
+                "dur": span["wall_ms"] * 1e3,
+                "pid": pid,
+                "tid": span["thread_id"],
+                "args": {
+                    "cpu_ms": round(span["cpu_ms"], 3),
+                    "peak_mem_delta_kb": round(span["peak_mem_delta_kb"], 1),
+                    "rows": span["rows"],
+                    "error": span["error"],
+                    **{key: str(value) for key, value in span["attrs"].items()},
+                },
+            }
+            for span in self.spans()
+        ]
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+    def save(self, path: str):
+        """
+        Writes the Chrome trace for *.trace.json / *.chrome.json paths and
+        the span list otherwise.
+        """
+        chrome = path.endswith((".trace.json", ".chrome.json"))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_chrome_trace() if chrome else self.to_json())
+
+
+_TRACER = Tracer()
+if os.getenv(TRACE_ENV_VAR, "").lower() in ("1", "true", "yes"):
+    _TRACER.enable()
+
+# Tracer that span() records to in the current context (thread / task);
+# the process-wide one unless start_tracing() routed it elsewhere
+_ACTIVE_TRACER = contextvars.ContextVar("esg_tracer", default=_TRACER)
+
+
+def get_tracer() -> Tracer:
+    return _ACTIVE_TRACER.get()
+
+
+def start_tracing(tracer: Tracer = None):
+    """
+    Enables `tracer` (a new one by default) and records this context's
+    spans to it instead of the process-wide tracer, so one app session's
+    spans are not mixed with another's. Returns the token for
+    stop_tracing().
+    """
+    tracer = tracer or Tracer()
+    tracer.enable()
+    return _ACTIVE_TRACER.set(tracer)
+
+
+def stop_tracing(token):
+    """
+    Disables the tracer start_tracing() returned `token` for (stopping
+    tracemalloc if nothing else is tracing) and restores the previous one.
+    Its spans stay readable.
+    """
+    token.var.get().disable()
+    token.var.reset(token)
+
+
+@contextlib.contextmanager
+def tracing(tracer: Tracer = None):
+    """
+    `with tracing() as tracer:` records the block's spans to `tracer`.
+    """
+    token = start_tracing(tracer)
+    try:
+        yield _ACTIVE_TRACER.get()
+    finally:
+        stop_tracing(token)
+
+
+def span(name: str, **attrs):
+    """
+    `with span("calculate_emissions", rows=len(df)):` times a block; use
+    `.set(rows=...)` on the returned span to attach values known only later.
+    """
+    return _ACTIVE_TRACER.get().span(name, **attrs)
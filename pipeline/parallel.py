@@ -0,0 +1,163 @@
+"""
+Parallel ESG Pipeline
+Facility-sharded emissions and data quality stages on a process pool
+"""
+
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from esg.emissions import aggregate_kpis, calculate_emissions
+from esg.emission_factors import load_factor_table
+from quality.anomaly import FacilityAnomalyDetector
+from quality.data_quality import quality_from_profile
+from quality.profile import merge_profiles, profile_frame
+
+EMISSION_COLUMNS = ["scope_2_co2_kg", "scope_1_co2_kg", "total_co2_kg"]
+
+# Below this many rows the pool start-up costs more than it saves
+MIN_PARALLEL_ROWS = 200_000
+
+# Imported once by the forkserver, so a new worker starts with the stage
+# modules loaded instead of importing pandas and the pipeline itself
+PRELOAD_MODULES = ["pipeline.parallel"]
+
+# Worker pool shared by every run in this process (see _shared_pool)
+_POOL = {"pool": None, "workers": 0}
+_POOL_LOCK = threading.Lock()
+
+
+def _run_shard(shard, factors):
+    emissions = calculate_emissions(shard, factors)
+    detector = FacilityAnomalyDetector()
+    outliers = detector.update(emissions)
+
+    return (
+        emissions[EMISSION_COLUMNS].to_numpy(dtype="float64"),
+        profile_frame(emissions),
+        detector,
+        outliers,
+    )
+
+
+def partition_by_facility(df: pd.DataFrame, n_shards: int) -> list:
+    """
+    Splits row positions into at most `n_shards` facility-disjoint shards.
+
+    Facilities are assigned largest-first to the least loaded shard, so the
+    partitioning is balanced by row count and deterministic for a given input.
+    """
+    codes, _ = pd.factorize(df["facility"], sort=True, use_na_sentinel=True)
+    codes = np.where(codes < 0, codes.max() + 1, codes)
+    counts = np.bincount(codes)
+
+    n_shards = max(1, min(n_shards, len(counts)))
+    load = np.zeros(n_shards, dtype="int64")
+    shard_of_facility = np.empty(len(counts), dtype="int64")
+
+    for facility in np.argsort(-counts, kind="stable"):
+        target = int(np.argmin(load))
+        shard_of_facility[facility] = target
+        load[target] += counts[facility]
+
+    shard_of_row = shard_of_facility[codes]
+    order = np.argsort(shard_of_row, kind="stable")
+    bounds = np.cumsum(np.bincount(shard_of_row, minlength=n_shards))[:-1]
+
+    return [positions for positions in np.split(order, bounds) if len(positions)]
+
+
+def _pool_context():
+    """
+    Workers come from a forkserver with the stage modules preloaded, or are
+    spawned where no forkserver exists. Forking the caller directly is not
+    safe: the Streamlit server is multi-threaded, and a child forked while
+    another thread holds a lock inherits it locked.
+    """
+    if "forkserver" not in mp.get_all_start_methods():
+        return mp.get_context("spawn")
+    context = mp.get_context("forkserver")
+    context.set_forkserver_preload(PRELOAD_MODULES)
+    return context
+
+
+def _shared_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    The process pool for `workers` workers, started on first use and kept
+    for later runs, so a run does not pay for starting its workers. A pool
+    of another size is replaced.
+    """
+    with _POOL_LOCK:
+        pool = _POOL["pool"]
+        if pool is None or _POOL["workers"] != workers:
+            if pool is not None:
+                pool.shutdown(wait=False)
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+            _POOL["pool"], _POOL["workers"] = pool, workers
+        return pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    # A pool that lost a worker rejects all further work; the next run starts a new one
+    with _POOL_LOCK:
+        if _POOL["pool"] is pool:
+            _POOL["pool"], _POOL["workers"] = None, 0
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_parallel_pipeline(df: pd.DataFrame, workers: int = None, factors=None) -> dict:
+    """
+    Emissions, KPIs and data quality for `df`, computed facility by facility
+    on a process pool.
+
+    Workers return per-row emission values, column profiles and anomaly
+    detectors for their facilities; the parent scatters the values back into
+    input order before aggregating, so the result matches calculate_emissions
+    / aggregate_kpis / assess_data_quality exactly.
+
+    Returns:
+        dict: { "df": DataFrame, "kpis": dict, "quality": dict }
+    """
+    factors = factors or load_factor_table()
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(df) < MIN_PARALLEL_ROWS or "facility" not in df.columns:
+        emissions = calculate_emissions(df, factors)
+        profile = profile_frame(emissions)
+        detector = FacilityAnomalyDetector()
+        outliers = [detector.update(emissions)]
+        values = emissions[EMISSION_COLUMNS].to_numpy(dtype="float64")
+    else:
+        shards = partition_by_facility(df, workers)
+        values = np.empty((len(df), len(EMISSION_COLUMNS)), dtype="float64")
+        profile, detector, outliers = None, None, []
+
+        # Each worker is sent only its own shard's rows
+        pool = _shared_pool(workers)
+        try:
+            results = list(pool.map(_run_shard, (df.iloc[positions] for positions in shards), repeat(factors)))
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            raise
+
+        for positions, (shard_values, shard_profile, shard_detector, shard_outliers) in zip(shards, results):
+            values[positions] = shard_values
+            outliers.append(shard_outliers)
+            profile = shard_profile if profile is None else merge_profiles(profile, shard_profile)
+            detector = shard_detector if detector is None else detector.merge(shard_detector)
+
+    result = df.copy(deep=False)
+    for i, col in enumerate(EMISSION_COLUMNS):
+        result[col] = values[:, i]
+
+    return {
+        "df": result,
+        "kpis": aggregate_kpis(result),
+        "quality": quality_from_profile(profile, detector.summary(), outliers),
+    }
@@ -0,0 +1,181 @@
+"""
+Core Reporting Pipeline
+Emissions, KPIs, audit score, data quality and maturity for one ESG input
+"""
+
+import io
+import os
+from datetime import datetime
+
+from audit.audit_score import calculate_audit_readiness_score
+from audit.csrd_maturity import calculate_csrd_maturity
+from esg.compact import check_kpi_rounding, compact_frame
+from esg.emissions import aggregate_kpis, calculate_emissions
+from esg.emission_factors import load_factor_table
+from esg.ingestion import load_esg_data, load_scope3_spend, peek_columns
+from esg.rollup_cube import RollupCube
+from esg.scope3 import aggregate_scope3_kpi, estimate_scope3_emissions
+from esg.scope3_factors import load_scope3_catalogue
+from esg.scope3_ledger import load_fx_table, stream_ledger_emissions
+from explainability.lineage import capture_lineage
+from pipeline.cache import content_hash, get_cache
+from pipeline.instrumentation import span
+from pipeline.parallel import MIN_PARALLEL_ROWS, run_parallel_pipeline
+from quality.data_quality import assess_data_quality
+from quality.rules import evaluate_rules
+
+# Bump when a pipeline stage changes its output for the same input
+PIPELINE_VERSION = "2"
+
+# Set to 0 to keep full-precision frames and appendable cubes in the cache
+COMPACT_ENV_VAR = "ESG_COMPACT"
+
+
+def compact_mode() -> bool:
+    return os.getenv(COMPACT_ENV_VAR, "1").lower() not in ("0", "false", "no")
+
+
+def config_version() -> str:
+    return f"{PIPELINE_VERSION}:{load_factor_table().version}"
+
+
+def scope3_config_version() -> str:
+    return f"{PIPELINE_VERSION}:{load_scope3_catalogue().version}:{load_fx_table().version}"
+
+
+def _as_source(data: bytes, name: str):
+    source = io.BytesIO(data)
+    source.name = name
+    return source
+
+
+def compact_checked(df, kpis: dict):
+    """
+    compact_frame, then check_kpi_rounding on the result: raises ValueError
+    if re-aggregating the compact frame would not reproduce a reported KPI.
+    """
+    compacted = compact_frame(df, kpis)
+    drift = check_kpi_rounding(compacted, kpis)
+    if drift:
+        changes = ", ".join(f"{kpi} {reported} -> {value}" for kpi, (reported, value) in drift.items())
+        raise ValueError(f"Compacting the results would change reported KPIs: {changes}")
+    return compacted
+
+
+def run_core_pipeline(df, year: int = None, compact: bool = False, workers: int = None) -> dict:
+    """
+    With `compact`, every stage still runs on the full-precision frame, and
+    the frame and cube are compacted afterwards for keeping (see
+    esg.compact.compact_frame and RollupCube.compact).
+
+    Inputs of at least MIN_PARALLEL_ROWS rows with a facility column get
+    their emissions, KPIs and data quality from run_parallel_pipeline on
+    `workers` processes (default: one per CPU; 1 keeps everything in this
+    process, e.g. when the caller already runs one pipeline per process).
+
+    Returns:
+        dict: { "df", "kpis", "cube", "audit", "quality", "findings", "lineage", "maturity" }
+    """
+    rows = len(df)
+    workers = workers or os.cpu_count() or 1
+    quality = None
+    if workers > 1 and rows >= MIN_PARALLEL_ROWS and "facility" in df.columns:
+        with span("parallel_pipeline", rows=rows, workers=workers):
+            parallel = run_parallel_pipeline(df, workers)
+        df, kpis, quality = parallel["df"], parallel["kpis"], parallel["quality"]
+    else:
+        with span("calculate_emissions", rows=rows):
+            df = calculate_emissions(df)
+        with span("aggregate_kpis", rows=rows):
+            kpis = aggregate_kpis(df)
+    with span("audit_readiness_score", rows=rows):
+        audit = calculate_audit_readiness_score(df, kpis)
+    with span("rollup_cube", rows=rows):
+        cube = RollupCube.from_frame(df)
+    if quality is None:
+        with span("assess_data_quality", rows=rows):
+            quality = assess_data_quality(df)
+    with span("evaluate_rules", rows=rows):
+        findings = evaluate_rules(df)
+    with span("capture_lineage", rows=rows):
+        lineage = capture_lineage(df, kpis, audit, findings)
+    if compact:
+        with span("compact", rows=rows):
+            df = compact_checked(df, kpis)
+            cube.compact()
+
+    return {
+        "df": df,
+        "kpis": kpis,
+        "cube": cube,
+        "audit": audit,
+        "quality": quality,
+        "findings": findings,
+        "lineage": lineage,
+        "maturity": calculate_csrd_maturity(
+            year=year or datetime.now().year,
+            audit_score=audit["total_score"],
+            scope3_present=False,
+        ),
+    }
+
+
+def _load_and_run(data: bytes, name: str, year: int, compact: bool) -> dict:
+    with span("load_esg_data", bytes=len(data)) as load:
+        df = load_esg_data(_as_source(data, name))
+        load.set(rows=len(df))
+    with span("core_pipeline", rows=len(df)):
+        return run_core_pipeline(df, year, compact)
+
+
+def cached_core_pipeline(data: bytes, name: str) -> dict:
+    """
+    run_core_pipeline over the uploaded bytes, memoized on their content hash
+    and the factor / pipeline version. Results are compacted unless
+    ESG_COMPACT=0.
+    """
+    year = datetime.now().year
+    compact = compact_mode()
+    key = ("core", content_hash(data, name, config_version(), str(year), str(compact)))
+    return get_cache().get_or_compute(key, lambda: _load_and_run(data, name, year, compact))
+
+
+def run_scope3_pipeline(source, compact: bool = False) -> dict:
+    """
+    Pre-summarized spend (category, annual_spend_eur) or a raw AP ledger
+    (supplier, category, amount, currency, date), detected from the columns.
+    The total is taken before the result frame is compacted, and compacting
+    keeps scope3_co2_kg float64 if float32 would change the rounded total.
+    """
+    if "amount" in peek_columns(source):
+        with span("stream_ledger_emissions") as stage:
+            result = stream_ledger_emissions(source)
+            stage.set(rows=len(result))
+    else:
+        with span("load_scope3_spend") as stage:
+            spend = load_scope3_spend(source)
+            stage.set(rows=len(spend))
+        with span("estimate_scope3_emissions", rows=len(spend)):
+            result = estimate_scope3_emissions(spend)
+
+    total = aggregate_scope3_kpi(result)
+    if compact:
+        result = compact_checked(result, {"Scope 3 CO₂ (kg)": total})
+
+    return {
+        "result": result,
+        "total": total,
+    }
+
+
+def cached_scope3_pipeline(data: bytes, name: str) -> dict:
+    compact = compact_mode()
+    key = ("scope3", content_hash(data, name, scope3_config_version(), str(compact)))
+    return get_cache().get_or_compute(
+        key, lambda: run_scope3_pipeline(_as_source(data, name), compact)
+    )
+
+
+def read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,254 @@
+"""
+Streaming Facility Anomaly Detection
+Per-facility, per-metric EWMA statistics that score individual readings batch by batch
+"""
+
+import numpy as np
+import pandas as pd
+
+ANOMALY_METRICS = ["energy_kwh", "renewable_kwh", "fuel_liters", "total_co2_kg"]
+
+# Readings of a facility seen before it is scored against its own EWMA state;
+# until then it is scored robustly against the batch's median / MAD
+WARMUP_READINGS = 30
+
+# Fewer readings than this in a batch give no usable median / MAD
+MIN_ROBUST_READINGS = 5
+
+# Robust z-score threshold (Iglewicz & Hoaglin) also used for EWMA z-scores
+SCORE_THRESHOLD = 3.5
+
+# Keeps a near-constant series from turning tiny deviations into huge scores
+MIN_RELATIVE_STD = 0.01
+
+ANOMALY_COLUMNS = ["facility", "metric", "value", "expected", "score", "method"]
+
+
+class FacilityAnomalyDetector:
+    """
+    Exponentially weighted mean and variance of every metric per facility,
+    i.e. O(1) state per facility whatever the history length.
+
+    `update(batch)` first scores each reading against the state from before
+    the batch (or, for facilities still warming up, against the facility's
+    median / MAD within the batch), then folds the batch into the state. The
+    batch enters as one weighted block, weight 1 - (1 - alpha)^k for k
+    readings, so the result does not depend on row order within a batch.
+    """
+
+    def __init__(
+        self,
+        metrics: list = None,
+        alpha: float = 0.05,
+        threshold: float = SCORE_THRESHOLD,
+        warmup: int = WARMUP_READINGS,
+    ):
+        self.metrics = list(metrics or ANOMALY_METRICS)
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+
+        # facility -> row of the state arrays
+        self._positions = {}
+        shape = (0, len(self.metrics))
+        self._count = np.zeros(shape, dtype="int64")
+        self._mean = np.zeros(shape)
+        self._var = np.zeros(shape)
+        self._flagged = np.zeros(shape, dtype="int64")
+
+    def __len__(self):
+        return len(self._positions)
+
+    # -----------------------------
+    # State storage
+    # -----------------------------
+    def _reserve(self, size: int):
+        if size <= len(self._count):
+            return
+        size = max(size, 2 * len(self._count))
+        for name in ("_count", "_mean", "_var", "_flagged"):
+            current = getattr(self, name)
+            grown = np.zeros((size, len(self.metrics)), dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+    def _rows(self, facilities) -> np.ndarray:
+        rows = np.fromiter(
+            (self._positions.setdefault(facility, len(self._positions)) for facility in facilities),
+            dtype="int64",
+            count=len(facilities),
+        )
+        self._reserve(len(self._positions))
+        return rows
+
+    # -----------------------------
+    # Scoring and updates
+    # -----------------------------
+    def _robust_scores(self, rows, values):
+        """
+        |x - median| / MAD per facility within the batch, scaled to z units.
+        """
+        grouped = pd.Series(values).groupby(rows)
+        median = grouped.transform("median").to_numpy()
+        deviation = np.abs(values - median)
+        mad = pd.Series(deviation).groupby(rows).transform("median").to_numpy()
+        usable = (mad > 0) & (np.bincount(rows)[rows] >= MIN_ROBUST_READINGS)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(usable, 0.6745 * deviation / mad, 0.0)
+        return scores, median
+
+    def _ewma_scores(self, rows, j, values):
+        mean = self._mean[rows, j]
+        std = np.sqrt(self._var[rows, j])
+        std = np.maximum(std, MIN_RELATIVE_STD * np.abs(mean))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(std > 0, np.abs(values - mean) / std, 0.0)
+        return scores, mean
+
+    def _fold(self, rows, j, values):
+        size = len(self._positions)
+        count = np.bincount(rows, minlength=size)
+        if not len(rows):
+            return
+        seen = np.flatnonzero(count)
+        n = count[seen]
+
+        means = np.bincount(rows, values, minlength=size) / np.maximum(count, 1)
+        batch_mean = means[seen]
+        batch_var = np.bincount(rows, (values - means[rows]) ** 2, minlength=size)[seen] / n
+
+        prior = self._count[seen, j] > 0
+        weight = np.where(prior, 1 - (1 - self.alpha) ** n, 1.0)
+        old_mean, old_var = self._mean[seen, j], self._var[seen, j]
+        shift = batch_mean - old_mean
+
+        self._mean[seen, j] = old_mean + weight * shift
+        self._var[seen, j] = (1 - weight) * old_var + weight * batch_var + weight * (1 - weight) * shift ** 2
+        self._count[seen, j] += n
+
+    def update(self, batch: pd.DataFrame) -> pd.DataFrame:
+        """
+        Scores and absorbs one batch of readings.
+
+        Returns:
+            DataFrame: the batch's outlier readings (indexed by batch row label)
+            with facility, metric, value, expected, score, method
+        """
+        metrics = [(j, m) for j, m in enumerate(self.metrics) if m in batch.columns]
+        if "facility" not in batch.columns or not metrics or batch.empty:
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+
+        codes, uniques = pd.factorize(batch["facility"], use_na_sentinel=True)
+        row_of_code = self._rows(uniques)
+        found = []
+
+        for j, metric in metrics:
+            values = pd.to_numeric(batch[metric], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            valid = np.flatnonzero((codes >= 0) & ~np.isnan(values))
+            if not len(valid):
+                continue
+            rows, x = row_of_code[codes[valid]], values[valid]
+
+            history = self._count[rows, j]
+            warm = history >= self.warmup
+            robust, median = self._robust_scores(rows, x)
+            ewma, mean = self._ewma_scores(rows, j, x)
+
+            # While warming up, a facility with some history must look off both
+            # against its own batch and against what it has seen so far
+            scores = np.where(warm, ewma, np.where(history > 1, np.minimum(robust, ewma), robust))
+            flagged = scores > self.threshold
+
+            if flagged.any():
+                self._flagged[:, j] += np.bincount(rows[flagged], minlength=len(self._flagged))
+                hits = valid[flagged]
+                found.append(pd.DataFrame(
+                    {
+                        "facility": batch["facility"].to_numpy()[hits],
+                        "metric": metric,
+                        "value": x[flagged],
+                        "expected": np.where(warm, mean, median)[flagged],
+                        "score": scores[flagged],
+                        "method": np.where(warm[flagged], "ewma", "mad"),
+                    },
+                    index=batch.index[hits],
+                ))
+
+            # Outliers are reported, not learned, so a spike cannot widen the band it is judged by
+            keep = ~flagged
+            self._fold(rows[keep], j, x[keep])
+
+        if not found:
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+        return pd.concat(found)
+
+    def merge(self, other: "FacilityAnomalyDetector") -> "FacilityAnomalyDetector":
+        """
+        Combines detectors fed with different batches. Disjoint facilities are
+        carried over unchanged; a facility seen by both gets the count-weighted
+        mixture of the two states.
+        """
+        if other.metrics != self.metrics:
+            raise ValueError("Cannot merge anomaly detectors over different metrics")
+
+        merged = FacilityAnomalyDetector(self.metrics, self.alpha, self.threshold, self.warmup)
+        for detector in (self, other):
+            rows = merged._rows(list(detector._positions))
+            size = len(detector)
+            n_a, n_b = merged._count[rows], detector._count[:size]
+            n = np.maximum(n_a + n_b, 1)
+            mean_a, mean_b = merged._mean[rows], detector._mean[:size]
+            mean = (n_a * mean_a + n_b * mean_b) / n
+
+            merged._var[rows] = (
+                n_a * (merged._var[rows] + (mean_a - mean) ** 2)
+                + n_b * (detector._var[:size] + (mean_b - mean) ** 2)
+            ) / n
+            merged._mean[rows] = mean
+            merged._count[rows] = n_a + n_b
+            merged._flagged[rows] += detector._flagged[:size]
+        return merged
+
+    # -----------------------------
+    # Derived views
+    # -----------------------------
+    def summary(self) -> dict:
+        """
+        Returns:
+            dict: per metric { "readings", "anomalies", "facilities" }, where
+            facilities counts the facilities with at least one outlier
+        """
+        size = len(self)
+        return {
+            metric: {
+                "readings": int(self._count[:size, j].sum()),
+                "anomalies": int(self._flagged[:size, j].sum()),
+                "facilities": int((self._flagged[:size, j] > 0).sum()),
+            }
+            for j, metric in enumerate(self.metrics)
+        }
+
+    def state(self) -> pd.DataFrame:
+        size = len(self)
+        columns = pd.MultiIndex.from_product([["count", "mean", "std", "flagged"], self.metrics])
+        values = np.hstack([
+            self._count[:size], self._mean[:size], np.sqrt(self._var[:size]), self._flagged[:size]
+        ])
+        return pd.DataFrame(values, index=pd.Index(list(self._positions), name="facility"), columns=columns)
+
+
+def detect_anomalies(batches, detector: FacilityAnomalyDetector = None):
+    """
+    Feeds `batches` (an iterable of frames, or a single frame) through a
+    detector and returns (detector, outlier readings).
+    """
+    if detector is None:
+        detector = FacilityAnomalyDetector()
+    if isinstance(batches, pd.DataFrame):
+        batches = [batches]
+
+    found = [detector.update(batch) for batch in batches]
+    found = [frame for frame in found if len(frame)]
+    return detector, (pd.concat(found) if found else pd.DataFrame(columns=ANOMALY_COLUMNS))
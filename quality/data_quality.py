@@ -3,14 +3,52 @@ Data Quality & Validation Layer
 Audit-safe, schema-tolerant ESG data quality checks
 """
 
-def assess_data_quality(df):
+import pandas as pd
+
+from quality.anomaly import ANOMALY_COLUMNS, FacilityAnomalyDetector
+from quality.profile import merge_profiles, profile_frame
+
+EXPECTED_METRICS = [
+    "scope1_co2_kg",
+    "scope2_co2_kg",
+    "total_co2_kg",
+    "energy_kwh"
+]
+
+
+def _outlier_rows(outliers) -> pd.DataFrame:
+    """
+    Flagged readings (FacilityAnomalyDetector.update() output, or a list of
+    them), highest score first, with the input row label as "row".
+    """
+    if isinstance(outliers, list):
+        outliers = [frame for frame in outliers if len(frame)]
+        outliers = pd.concat(outliers) if outliers else None
+    if outliers is None or not len(outliers):
+        return pd.DataFrame(columns=["row"] + ANOMALY_COLUMNS)
+    return (
+        outliers.rename_axis("row")
+        .reset_index()
+        .sort_values("score", ascending=False, kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def quality_from_profile(profile, anomalies: dict = None, outliers=None):
+    """
+    Derives every check and flag from a column profile (see quality.profile)
+    and an anomaly summary (FacilityAnomalyDetector.summary()), so one
+    profile, or a merge of per-chunk profiles, is enough. `outliers` are the
+    flagged readings behind the summary, returned as "outliers".
+    """
+    columns = profile["columns"]
     issues = []
     quality_flags = {}
 
     # -----------------------------
     # 1. Missing Data Check
     # -----------------------------
-    missing_cols = [col for col in df.columns if df[col].isnull().any()]
+    missing_cols = [col for col, stats in columns.items() if stats["nulls"]]
     if missing_cols:
         issues.append({
             "Type": "Missing Data",
@@ -20,44 +58,85 @@ def assess_data_quality(df):
     # -----------------------------
     # 2. Range Validation (only if column exists)
     # -----------------------------
-    if "total_co2_kg" in df.columns:
-        if (df["total_co2_kg"] < 0).any():
-            issues.append({
-                "Type": "Range Violation",
-                "Details": "Negative CO₂ emission values detected"
-            })
+    if "total_co2_kg" in columns and columns["total_co2_kg"]["negatives"]:
+        issues.append({
+            "Type": "Range Violation",
+            "Details": "Negative CO₂ emission values detected"
+        })
 
     # -----------------------------
-    # 3. Facility Consistency Check
+    # 3. Facility Consistency Check (per-reading outliers)
     # -----------------------------
-    if "facility" in df.columns and "total_co2_kg" in df.columns:
-        facility_variance = df.groupby("facility")["total_co2_kg"].std()
-        if facility_variance.notna().any():
-            if (facility_variance > facility_variance.mean() * 2).any():
-                issues.append({
-                    "Type": "Consistency Warning",
-                    "Details": "Large emission variance detected across facilities"
-                })
+    flagged = {
+        metric: stats for metric, stats in (anomalies or {}).items()
+        if metric in columns and stats["anomalies"]
+    }
+    if flagged:
+        details = ", ".join(
+            f"{metric} ({stats['anomalies']} at {stats['facilities']} facilities)"
+            for metric, stats in flagged.items()
+        )
+        issues.append({
+            "Type": "Consistency Warning",
+            "Details": f"Outlier readings against facility history detected in: {details}"
+        })
 
     # -----------------------------
     # 4. Data Quality Flags (Schema-safe)
     # -----------------------------
-    expected_metrics = [
-        "scope1_co2_kg",
-        "scope2_co2_kg",
-        "total_co2_kg",
-        "energy_kwh"
-    ]
-
-    for metric in expected_metrics:
-        if metric not in df.columns:
+    for metric in EXPECTED_METRICS:
+        if metric not in columns:
             quality_flags[metric] = "Assumed"
-        elif df[metric].isnull().any():
+        elif columns[metric]["nulls"]:
             quality_flags[metric] = "Estimated"
+        elif metric in flagged:
+            quality_flags[metric] = "Flagged"
         else:
             quality_flags[metric] = "Measured"
 
     return {
         "issues": issues,
-        "quality_flags": quality_flags
+        "quality_flags": quality_flags,
+        "outliers": _outlier_rows(outliers)
     }
+
+
+def assess_data_quality(df, detector: FacilityAnomalyDetector = None):
+    """
+    Data quality checks for one frame.
+
+    Outliers are scored against each facility's EWMA history only once the
+    detector has seen WARMUP_READINGS readings of it in earlier frames. A
+    fresh detector (the default) has none, so every reading in `df` is
+    scored against its facility's median / MAD within `df`. Pass the same
+    detector again to score later frames against the earlier ones.
+
+    Returns:
+        dict: { "issues", "quality_flags", "outliers" }, where outliers
+        holds the flagged readings (row label, facility, metric, value,
+        expected, score, method), highest score first
+    """
+    if detector is None:
+        detector = FacilityAnomalyDetector()
+    outliers = detector.update(df)
+    return quality_from_profile(profile_frame(df), detector.summary(), outliers)
+
+
+def assess_data_quality_batches(batches, detector: FacilityAnomalyDetector = None):
+    """
+    assess_data_quality over a stream of batches, holding only one batch in
+    memory at a time. Readings are scored against each facility's history
+    from earlier batches, so pass the batches in time order.
+    """
+    if detector is None:
+        detector = FacilityAnomalyDetector()
+    profile = None
+    outliers = []
+    for batch in batches:
+        outliers.append(detector.update(batch))
+        batch_profile = profile_frame(batch)
+        profile = batch_profile if profile is None else merge_profiles(profile, batch_profile)
+
+    if profile is None:
+        profile = profile_frame(pd.DataFrame())
+    return quality_from_profile(profile, detector.summary(), outliers)
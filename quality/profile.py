@@ -0,0 +1,74 @@
+"""
+Column Profiler
+Mergeable per-column statistics for the data quality checks
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def _column_profile(series: pd.Series) -> dict:
+    """
+    Row, null and negative counts: what the checks in quality.data_quality
+    read. A numeric column is converted to float64 once, and both counts are
+    reductions over that array (NaN is never negative).
+    """
+    if _is_numeric(series):
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+        nulls = int(np.isnan(values).sum())
+        negatives = int((values < 0).sum())
+    else:
+        nulls = int(series.isna().sum())
+        negatives = 0
+
+    return {
+        "count": len(series),
+        "nulls": nulls,
+        "negatives": negatives,
+    }
+
+
+def profile_frame(df: pd.DataFrame) -> dict:
+    """
+    Per-column row, null and negative counts.
+
+    Returns:
+        dict: { "rows": int, "columns": {col: {"count", "nulls", "negatives"}} }
+    """
+    return {
+        "rows": len(df),
+        "columns": {col: _column_profile(df[col]) for col in df.columns},
+    }
+
+
+# -----------------------------
+# Merging
+# -----------------------------
+def _merge_columns(a: dict, b: dict) -> dict:
+    return {key: a[key] + b[key] for key in ("count", "nulls", "negatives")}
+
+
+def merge_profiles(a: dict, b: dict) -> dict:
+    columns = dict(a["columns"])
+    for col, profile in b["columns"].items():
+        columns[col] = _merge_columns(columns[col], profile) if col in columns else profile
+
+    return {
+        "rows": a["rows"] + b["rows"],
+        "columns": columns,
+    }
+
+
+def profile_batches(batches) -> dict:
+    """
+    Profile of a chunked or partitioned input, one batch in memory at a time.
+    """
+    merged = None
+    for batch in batches:
+        profile = profile_frame(batch)
+        merged = profile if merged is None else merge_profiles(merged, profile)
+    return merged if merged is not None else profile_frame(pd.DataFrame())
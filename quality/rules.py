@@ -0,0 +1,338 @@
+"""
+Declarative Data Quality Rules
+Rule configuration compiled to vectorized masks with row-level findings
+"""
+
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+RULES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "quality_rules.json",
+)
+
+PAGE_SIZE = 50
+
+SEVERITIES = ["error", "warning"]
+
+NO_DATE = np.iinfo("int64").min
+
+_COMPARISONS = {
+    "<=": np.less_equal,
+    "<": np.less,
+    ">=": np.greater_equal,
+    ">": np.greater,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+
+def _sorted_factorize(values: np.ndarray):
+    """
+    (sorted distinct values, each row's position among them): a hash
+    factorize of the rows followed by a sort of the distinct values only.
+    """
+    codes, uniques = pd.factorize(values)
+    order = np.argsort(uniques)
+    rank = np.empty(len(uniques), dtype="int64")
+    rank[order] = np.arange(len(uniques))
+    return uniques[order], rank[codes]
+
+
+# -----------------------------
+# Shared column cache
+# -----------------------------
+class _FrameColumns:
+    """
+    Converts each column a rule needs once per evaluation (float arrays,
+    day numbers, group codes, composite keys, group medians) and shares it across
+    every rule that reads it.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.n_rows = len(df)
+        self._cache = {}
+
+    def has(self, *columns) -> bool:
+        return all(col in self.df.columns for col in columns)
+
+    def _cached(self, key, build):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def values(self, column) -> np.ndarray:
+        return self._cached(
+            ("values", column),
+            lambda: pd.to_numeric(self.df[column], errors="coerce").to_numpy(dtype="float64", na_value=np.nan),
+        )
+
+    def nulls(self, column) -> np.ndarray:
+        return self._cached(("nulls", column), lambda: self.df[column].isna().to_numpy())
+
+    def days(self, column) -> np.ndarray:
+        def build():
+            dates = pd.to_datetime(self.df[column], errors="coerce").to_numpy(dtype="datetime64[ns]")
+            return np.where(np.isnat(dates), NO_DATE, dates.astype("datetime64[D]").astype("int64"))
+
+        return self._cached(("days", column), build)
+
+    def codes(self, column) -> np.ndarray:
+        return self._cached(
+            ("codes", column),
+            lambda: pd.factorize(self.df[column], use_na_sentinel=True)[0],
+        )
+
+    def keys(self, *columns):
+        """
+        Distinct composite keys of `columns` (sorted) and each row's position
+        among them. Only the distinct keys are sorted, never the rows.
+        """
+        def build():
+            composite = np.zeros(self.n_rows, dtype="int64")
+            for column in columns:
+                codes = self.codes(column).astype("int64") + 1
+                width = int(codes.max(initial=0)) + 1
+                if composite.max(initial=0) >= np.iinfo("int64").max // width:
+                    composite = pd.factorize(composite)[0].astype("int64")
+                composite = composite * width + codes
+            return _sorted_factorize(composite)
+
+        return self._cached(("keys",) + columns, build)
+
+    def dated_keys(self, group, date):
+        """
+        Like keys() for (group, day), with the day kept in the low 32 bits so
+        consecutive distinct keys of one group are consecutive readings.
+        Rows without a group or a date get no key (position -1).
+        """
+        def build():
+            codes, days = self.codes(group).astype("int64"), self.days(date)
+            valid = (codes >= 0) & (days != NO_DATE)
+            first_day = days[valid].min(initial=0)
+            composite = (codes << 32) | np.where(valid, days - first_day, 0)
+
+            distinct, positions = _sorted_factorize(np.where(valid, composite, -1))
+            if len(distinct) and distinct[0] == -1:
+                distinct, positions = distinct[1:], positions - 1
+            return distinct, positions
+
+        return self._cached(("dated_keys", group, date), build)
+
+    def group_medians(self, column, group) -> np.ndarray:
+        def build():
+            medians = pd.Series(self.values(column)).groupby(self.codes(group)).median()
+            medians = medians[medians.index >= 0]
+            by_code = np.full(int(self.codes(group).max(initial=-1)) + 2, np.nan)
+            by_code[medians.index.to_numpy()] = medians.to_numpy()
+            return by_code[self.codes(group)]
+
+        return self._cached(("medians", column, group), build)
+
+
+# -----------------------------
+# Rule compilers (rule config -> mask function)
+# -----------------------------
+def _require(rule, *fields):
+    missing = [field for field in fields if field not in rule]
+    if missing:
+        raise ValueError(f"Rule {rule.get('id')!r} is missing {', '.join(missing)}")
+
+
+def _compile_not_null(rule):
+    _require(rule, "column")
+    column = rule["column"]
+    return [column], lambda cols: cols.nulls(column)
+
+
+def _compile_range(rule):
+    _require(rule, "column")
+    column, low, high = rule["column"], rule.get("min"), rule.get("max")
+
+    def mask(cols):
+        values = cols.values(column)
+        violations = np.zeros(cols.n_rows, dtype=bool)
+        if low is not None:
+            violations |= values < low
+        if high is not None:
+            violations |= values > high
+        return violations
+
+    return [column], mask
+
+
+def _compile_compare(rule):
+    _require(rule, "left", "op", "right")
+    if rule["op"] not in _COMPARISONS:
+        raise ValueError(f"Rule {rule['id']!r} has unknown operator {rule['op']!r}")
+    left, right, compare = rule["left"], rule["right"], _COMPARISONS[rule["op"]]
+
+    def mask(cols):
+        a, b = cols.values(left), cols.values(right)
+        known = ~(np.isnan(a) | np.isnan(b))
+        return known & ~compare(a, b)
+
+    return [left, right], mask
+
+
+def _compile_date_gap(rule):
+    _require(rule, "max_days")
+    date, group, max_days = rule.get("date", "date"), rule.get("by", "facility"), rule["max_days"]
+
+    def mask(cols):
+        distinct, positions = cols.dated_keys(group, date)
+
+        # A (group, day) key is late when it follows the group's previous reading day by more than max_days
+        late = np.zeros(len(distinct) + 1, dtype=bool)
+        same_group = (distinct[1:] >> 32) == (distinct[:-1] >> 32)
+        late[1:-1] = same_group & ((distinct[1:] & 0xFFFFFFFF) - (distinct[:-1] & 0xFFFFFFFF) > max_days)
+        return late[positions]
+
+    return [date, group], mask
+
+
+def _compile_duplicate(rule):
+    _require(rule, "keys")
+    keys = list(rule["keys"])
+
+    def mask(cols):
+        distinct, positions = cols.keys(*keys)
+        return np.bincount(positions, minlength=len(distinct))[positions] > 1
+
+    return keys, mask
+
+
+def _compile_unit(rule):
+    _require(rule, "column", "factor")
+    column, group, factor = rule["column"], rule.get("by", "facility"), float(rule["factor"])
+
+    def mask(cols):
+        values = cols.values(column)
+        median = cols.group_medians(column, group)
+
+        # A reading `factor` times off its group's median is likely in the wrong unit
+        # (e.g. MWh or Wh in a kWh column)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = values / median
+        return (values > 0) & (median > 0) & ((ratio >= factor) | (ratio <= 1 / factor))
+
+    return [column, group], mask
+
+
+RULE_TYPES = {
+    "not_null": _compile_not_null,
+    "range": _compile_range,
+    "compare": _compile_compare,
+    "date_gap": _compile_date_gap,
+    "duplicate": _compile_duplicate,
+    "unit": _compile_unit,
+}
+
+
+# -----------------------------
+# Findings
+# -----------------------------
+class RuleFindings:
+    """
+    Violations of every rule as sorted row-position arrays (positions into
+    the evaluated frame, usable with df.iloc).
+    """
+
+    def __init__(self, rules: list, rows: dict, n_rows: int, skipped: list):
+        self.rules = rules
+        self.rows = rows
+        self.n_rows = n_rows
+        self.skipped = skipped
+
+    def summary(self) -> pd.DataFrame:
+        records = []
+        for rule in self.rules:
+            if rule["id"] not in self.rows:
+                continue
+            violations = len(self.rows[rule["id"]])
+            records.append({
+                "Rule": rule["id"],
+                "Type": rule["type"],
+                "Severity": rule.get("severity", "error"),
+                "Description": rule.get("description", ""),
+                "Violations": violations,
+                "Share (%)": round(violations / self.n_rows * 100, 2) if self.n_rows else 0.0,
+            })
+        return pd.DataFrame(
+            records,
+            columns=["Rule", "Type", "Severity", "Description", "Violations", "Share (%)"],
+        )
+
+    def violated(self) -> list:
+        return [rule["id"] for rule in self.rules if len(self.rows.get(rule["id"], ()))]
+
+    def n_pages(self, rule_id: str, page_size: int = PAGE_SIZE) -> int:
+        return max(1, -(-len(self.rows[rule_id]) // page_size))
+
+    def page(self, rule_id: str, page: int, page_size: int = PAGE_SIZE) -> np.ndarray:
+        start = page * page_size
+        return self.rows[rule_id][start:start + page_size]
+
+
+# -----------------------------
+# Rule set
+# -----------------------------
+class RuleSet:
+    """
+    Compiled rule configuration. Each rule is a dict with an "id", a "type"
+    (see RULE_TYPES), optional "severity" / "description", and type-specific
+    fields, e.g. {"id": "renewable_within_energy", "type": "compare",
+    "left": "renewable_kwh", "op": "<=", "right": "energy_kwh"}.
+    """
+
+    def __init__(self, rules: list):
+        seen = set()
+        self.rules = []
+        self._compiled = []
+
+        for rule in rules:
+            _require(rule, "id", "type")
+            if rule["id"] in seen:
+                raise ValueError(f"Duplicate rule id {rule['id']!r}")
+            if rule["type"] not in RULE_TYPES:
+                raise ValueError(f"Rule {rule['id']!r} has unknown type {rule['type']!r}")
+            if rule.get("severity", "error") not in SEVERITIES:
+                raise ValueError(f"Rule {rule['id']!r} has unknown severity {rule['severity']!r}")
+
+            seen.add(rule["id"])
+            columns, mask = RULE_TYPES[rule["type"]](rule)
+            self.rules.append(rule)
+            self._compiled.append((rule["id"], columns, mask))
+
+    def evaluate(self, df: pd.DataFrame) -> RuleFindings:
+        """
+        Evaluates every rule against `df` in one pass over a shared column
+        cache. Rules whose columns are absent are skipped, not failed.
+        """
+        cols = _FrameColumns(df)
+        index_dtype = "int32" if len(df) < np.iinfo("int32").max else "int64"
+        rows, skipped = {}, []
+
+        for rule_id, columns, mask in self._compiled:
+            if not cols.has(*columns):
+                skipped.append(rule_id)
+                continue
+            rows[rule_id] = np.flatnonzero(mask(cols)).astype(index_dtype, copy=False)
+
+        return RuleFindings(self.rules, rows, len(df), skipped)
+
+
+@lru_cache(maxsize=8)
+def load_rules(path: str = RULES_PATH) -> RuleSet:
+    with open(path, encoding="utf-8") as f:
+        return RuleSet(json.load(f))
+
+
+def evaluate_rules(df: pd.DataFrame, rules: RuleSet = None) -> RuleFindings:
+    return (rules or load_rules()).evaluate(df)
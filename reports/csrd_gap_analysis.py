@@ -1,12 +1,13 @@
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import cm
 import io
 from datetime import date
 
 
 def generate_csrd_gap_pdf(kpis: dict, audit_score: int) -> bytes:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
     buffer = io.BytesIO()
 
     doc = SimpleDocTemplate(
@@ -0,0 +1,29 @@
+"""
+Report Downloads
+Streamlit prepare / download controls for the on-demand PDF reports
+"""
+
+import streamlit as st
+
+from reports.lazy_reports import cached_report, submit_report
+
+
+def report_download(kind: str, label: str, file_name: str, *args):
+    """
+    A download button for the `kind` report (see reports.lazy_reports) when
+    it is already rendered for these inputs, else a button that renders it.
+    Shared by the app's Reports tab and the Reports & Versioning page.
+    """
+    pdf = cached_report(kind, *args)
+
+    if pdf is None and st.button(f"🛠️ Prepare {label}", key=f"prepare_{kind}"):
+        with st.spinner(f"Rendering {label}..."):
+            pdf = submit_report(kind, *args).result()
+
+    if pdf is not None:
+        st.download_button(
+            f"⬇️ {label}",
+            pdf,
+            file_name=file_name,
+            mime="application/pdf",
+        )
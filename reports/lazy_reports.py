@@ -0,0 +1,80 @@
+"""
+On-demand Report Generation
+PDF builds deferred until requested, memoized by input fingerprint
+"""
+
+import contextvars
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+
+from pipeline.cache import content_hash, get_cache
+from pipeline.instrumentation import span
+from reports.csrd_gap_analysis import generate_csrd_gap_pdf
+from reports.pdf_report import generate_esg_pdf
+
+REPORT_BUILDERS = {
+    "esg_environmental": generate_esg_pdf,
+    "csrd_gap": generate_csrd_gap_pdf,
+}
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="report")
+_PENDING = {}
+_LOCK = threading.Lock()
+
+
+def report_fingerprint(kind: str, *args) -> tuple:
+    """
+    Cache key for a report: its kind, its inputs and the report date
+    (which is printed on every PDF).
+    """
+    payload = json.dumps(args, sort_keys=True, default=str)
+    return ("report", kind, content_hash(payload, str(date.today())))
+
+
+def cached_report(kind: str, *args):
+    """
+    The rendered PDF if it was already built for these inputs, else None.
+    """
+    found, pdf = get_cache().get(report_fingerprint(kind, *args))
+    return pdf if found else None
+
+
+def get_report(kind: str, *args) -> bytes:
+    return submit_report(kind, *args).result()
+
+
+def submit_report(kind: str, *args) -> Future:
+    """
+    Starts building the report on a background worker and returns its Future.
+
+    A report that is cached comes back as an already completed Future, and a
+    report that is still rendering (e.g. after a Streamlit rerun) returns the
+    in-flight Future instead of starting a second build.
+    """
+    key = report_fingerprint(kind, *args)
+
+    found, pdf = get_cache().get(key)
+    if found:
+        future = Future()
+        future.set_result(pdf)
+        return future
+
+    with _LOCK:
+        if key not in _PENDING:
+            # Run in the caller's context so the build's span reaches its tracer
+            _PENDING[key] = _EXECUTOR.submit(contextvars.copy_context().run, _build, key, kind, args)
+        return _PENDING[key]
+
+
+def _build(key, kind, args) -> bytes:
+    try:
+        with span(f"report.{kind}") as build:
+            pdf = REPORT_BUILDERS[kind](*args)
+            build.set(bytes=len(pdf))
+        get_cache().put(key, pdf)
+        return pdf
+    finally:
+        with _LOCK:
+            _PENDING.pop(key, None)
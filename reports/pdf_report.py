@@ -1,12 +1,14 @@
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import cm
 import io
 from datetime import date
 
 
 def generate_esg_pdf(kpis: dict) -> bytes:
+    # ReportLab is only loaded once a report is actually requested
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
     buffer = io.BytesIO()
 
     doc = SimpleDocTemplate(